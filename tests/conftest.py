@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REDIRECTOR = 'root://mock:1094/'
+USER = 'tester'
+TOP = f'/store/user/{USER}/'
+
+
+@pytest.fixture
+def fs():
+    # all helpers of xrootd_utils use an empty mock (with the mock flags if XRootD is not installed)
+    from xrootd_mock import MockFileSystem, install
+    from xrootd_utils import sessions, client
+    mock = MockFileSystem()
+    mock.add_dir(TOP, modtime=1600000000)
+    install(mock)
+    yield mock
+    sessions.set_backend(None)
+    client.replace(None)
@@ -0,0 +1,44 @@
+from conftest import REDIRECTOR, TOP
+from xrootd_mock import MockFileSystem
+from xrootd_utils import affine_requests, bulk_stat, locate_servers, location_cache, sessions
+
+DATA_SERVER = 'root://mock-data-server:1094/'
+
+
+def _files(fs, n=4) -> list:
+    paths = [TOP + f'file_{i}.root' for i in range(n)]
+    for i, path in enumerate(paths):
+        fs.add_file(path, i)
+    return paths
+
+
+def test_locate_servers(fs):
+    paths = _files(fs)
+    groups = locate_servers(REDIRECTOR, paths + [TOP + 'missing.root'])
+    assert groups == {DATA_SERVER: paths, REDIRECTOR: [TOP + 'missing.root']}
+    assert fs.calls == {'locate': 5}
+
+    fs.reset_counters()
+    assert locate_servers(REDIRECTOR, paths) == {DATA_SERVER: paths}
+    assert fs.calls == {}  # taken from location_cache
+    assert location_cache.get(REDIRECTOR, paths[0]) == DATA_SERVER
+
+
+def test_bulk_stat_with_affinity(fs):
+    paths = _files(fs)
+    statinfos = bulk_stat(REDIRECTOR, paths + [TOP + 'missing.root'], affinity=True)
+    assert [statinfos[path].size for path in paths] == [0, 1, 2, 3]
+    assert statinfos[TOP + 'missing.root'] is None
+    assert fs.calls == {'locate': 5, 'stat': 5}
+
+
+def test_fallback_to_the_redirector(fs):
+    # the data server does not know the files (e.g. they were moved): the requests go to the redirector
+    paths = _files(fs)
+    data_server = MockFileSystem()
+    sessions.set_backend(lambda redirector: data_server if redirector == DATA_SERVER else fs)
+    responses = affine_requests(REDIRECTOR, paths, lambda filesystem, path: filesystem.stat(path))
+    assert [(status.ok, statinfo.size) for status, statinfo in responses] == [(True, i) for i in range(4)]
+    assert data_server.calls == {'stat': 4}
+    assert fs.calls == {'locate': 4, 'stat': 4}
+    assert location_cache.get(REDIRECTOR, paths[0]) is None  # dropped
@@ -0,0 +1,70 @@
+import asyncio
+
+from conftest import REDIRECTOR, USER, TOP
+from xrootd_async import (async_copy, async_dirlist, async_locate, async_mkdir, async_mv, async_rm, async_rmdir,
+                          async_stat, gather_limited)
+from xrootd_utils import listing_cache
+
+
+def test_stat_and_dirlist(fs):
+    fs.add_file(TOP + 'a.root', 3)
+    result = asyncio.run(async_stat(REDIRECTOR, TOP + 'a.root'))
+    assert (result.op, result.path, result.ok, result.response.size) == ('stat', TOP + 'a.root', True, 3)
+    assert not asyncio.run(async_stat(REDIRECTOR, TOP + 'missing.root')).ok
+
+    result = asyncio.run(async_dirlist(REDIRECTOR, TOP))
+    assert result.ok and [entry.name for entry in result.response] == ['a.root']
+    assert fs.calls == {'stat': 2, 'dirlist': 1}
+
+
+def test_gather_limited_keeps_the_order(fs):
+    paths = [TOP + f'file_{i}.root' for i in range(50)]
+    for i, path in enumerate(paths[::2]):
+        fs.add_file(path, i)
+    results = asyncio.run(gather_limited((async_stat(REDIRECTOR, path) for path in paths), limit=8))
+    assert [result.path for result in results] == paths
+    assert [result.ok for result in results] == [i % 2 == 0 for i in range(50)]
+    assert fs.calls == {'stat': 50}
+
+
+def test_modifications_invalidate_the_listing_cache(fs):
+    fs.add_file(TOP + 'a.root', 3)
+    listing_cache.put(REDIRECTOR, TOP, 'stale')
+    assert asyncio.run(async_mkdir(REDIRECTOR, TOP + 'x/y')).ok
+    assert listing_cache.get(REDIRECTOR, TOP) is None
+    assert fs._stat(TOP + 'x/y')[0].ok
+
+    listing_cache.put(REDIRECTOR, TOP, 'stale')
+    assert asyncio.run(async_mv(REDIRECTOR, TOP + 'a.root', TOP + 'x/a.root')).ok
+    assert listing_cache.get(REDIRECTOR, TOP) is None
+    assert fs._stat(TOP + 'x/a.root')[0].ok and not fs._stat(TOP + 'a.root')[0].ok
+
+    assert asyncio.run(async_rm(REDIRECTOR, TOP + 'x/a.root', USER)).ok
+    assert asyncio.run(async_rmdir(REDIRECTOR, TOP + 'x/y', USER)).ok
+    assert not fs._stat(TOP + 'x/y')[0].ok
+
+
+def test_rm_outside_of_the_user_directory(fs):
+    fs.add_dir('/store/user/other')
+    fs.add_file('/store/user/other/a.root', 1)
+    result = asyncio.run(async_rm(REDIRECTOR, '/store/user/other/a.root', USER))
+    assert not result.ok and 'Permission denied' in result.message
+    assert not asyncio.run(async_rmdir(REDIRECTOR, '/store/user/other', USER)).ok
+    assert fs._stat('/store/user/other/a.root')[0].ok
+    assert fs.calls == {}  # nothing was sent
+
+
+def test_locate(fs):
+    fs.add_file(TOP + 'a.root', 1)
+    result = asyncio.run(async_locate(REDIRECTOR, TOP + 'a.root'))
+    assert result.ok and [location.address for location in result.response] == [fs.data_server]
+
+
+def test_copy(fs, tmp_path):
+    local = tmp_path / 'a.txt'
+    local.write_bytes(b'content')
+    result = asyncio.run(async_copy(REDIRECTOR, f'file://{local}', REDIRECTOR + TOP + 'a.txt'))
+    assert (result.op, result.ok) == ('copy', True)
+    assert fs._contents[TOP + 'a.txt'] == b'content'
+    assert not asyncio.run(async_copy(REDIRECTOR, f'file://{local}', REDIRECTOR + TOP + 'a.txt')).ok  # no overwrite
+    assert asyncio.run(async_copy(REDIRECTOR, f'file://{local}', REDIRECTOR + TOP + 'a.txt', force=True)).ok
@@ -0,0 +1,81 @@
+import sys
+import types
+
+from conftest import REDIRECTOR, TOP
+from xrootd_browser import EXIT, NEXT, SEARCH, SORT, Browser, browse
+from xrootd_utils import listing_cache
+
+
+def _tree(fs) -> None:
+    fs.add_dir(TOP + 'dir_b', modtime=1600000002)
+    fs.add_dir(TOP + 'dir_a', modtime=1600000001)
+    for i, name in enumerate(['run_1.root', 'run_22.root', 'other.root', 'big.root', 'new.txt']):
+        fs.add_file(TOP + name, [30, 20, 10, 1000, 5][i], modtime=1600000000 + 10 * i)
+
+
+def _names(browser: Browser) -> list:
+    return [entry.name for entry in browser.page_entries()]
+
+
+def test_pages(fs):
+    _tree(fs)
+    browser = Browser(REDIRECTOR, TOP.rstrip('/'), page_size=3, prefetch=0)
+    assert browser.directory == TOP and browser.n_pages == 3
+    assert _names(browser) == ['dir_a', 'dir_b', 'big.root']  # directories first
+    assert browser.header() == f'{TOP} (2 dirs, 5 files), sorted by name, page 1/3: 1-3 of 7'
+    browser.turn(5)
+    assert _names(browser) == ['run_22.root']
+    assert browser.header().endswith('page 3/3: 7-7 of 7')
+    browser.turn(-1)
+    assert _names(browser) == ['new.txt', 'other.root', 'run_1.root']
+    assert browser.parent_directory() == TOP.rstrip('/').rsplit('/', 1)[0] + '/'
+    assert fs.calls == {'dirlist': 1}
+
+
+def test_search_and_sort(fs):
+    _tree(fs)
+    browser = Browser(REDIRECTOR, TOP, prefetch=0)
+    browser.search('run')
+    assert _names(browser) == ['run_1.root', 'run_22.root']
+    browser.sort('size', reverse=True)
+    assert _names(browser) == ['run_1.root', 'run_22.root']
+    assert ', search: run' in browser.header() and 'sorted by size (descending)' in browser.header()
+
+    browser.search('~r2')  # fuzzy: ranked by relevance
+    assert _names(browser) == ['run_22.root']
+    assert 'sorted by relevance' in browser.header()
+
+    browser.search('')
+    browser.sort('modtime', reverse=True)
+    assert _names(browser) == ['dir_b', 'dir_a', 'new.txt', 'big.root', 'other.root', 'run_22.root', 'run_1.root']
+    assert fs.calls == {'dirlist': 1}  # search and sort do not send requests
+
+
+def test_reload_keeps_the_state(fs):
+    _tree(fs)
+    browser = Browser(REDIRECTOR, TOP, page_size=2, prefetch=0)
+    browser.search('run')
+    status, _ = fs.rm(TOP + 'run_1.root')
+    assert status.ok
+    listing_cache.invalidate(REDIRECTOR, TOP + 'run_1.root')  # like del_file
+    browser.reload()
+    assert _names(browser) == ['run_22.root'] and browser.query == 'run'
+
+
+def _questionary(answers: list) -> types.ModuleType:
+    # replays <answers> as the results of questionary.form(...).ask()
+    module = types.ModuleType('questionary')
+    form = types.SimpleNamespace(ask=lambda: answers.pop(0))
+    module.form = lambda **kwargs: form
+    module.select = module.text = module.Separator = module.Choice = lambda *args, **kwargs: None
+    return module
+
+
+def test_cancelled_search_and_sort_go_back_to_the_page(fs, monkeypatch):
+    _tree(fs)
+    answers = [{'_directory': SEARCH}, {}, {'_directory': SORT}, {}, {'_directory': NEXT},
+               {'_directory': SEARCH}, {'_query': 'big'}, {'_directory': TOP + 'big.root'}, {'_directory': EXIT}]
+    monkeypatch.setitem(sys.modules, 'questionary', _questionary(answers))
+    selected = []
+    browse(REDIRECTOR, TOP, on_file=selected.append, page_size=3, prefetch=0)
+    assert selected == [TOP + 'big.root'] and answers == []
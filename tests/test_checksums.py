@@ -0,0 +1,49 @@
+import zlib
+
+from conftest import REDIRECTOR, TOP
+from xrootd_utils import _local_adler32, checksums_from_local, read_checksum_manifest, verify_checksums
+
+
+def _adler32(content: bytes) -> str:
+    return f'{zlib.adler32(content) & 0xffffffff:08x}'
+
+
+def test_local_adler32(tmp_path):
+    local = tmp_path / 'a.bin'
+    local.write_bytes(b'x' * 1000 + b'y')
+    assert _local_adler32(str(local), blocksize=7) == _adler32(b'x' * 1000 + b'y')
+
+
+def test_read_checksum_manifest(tmp_path):
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text(f'# adler32 path\n\nABCDEF {TOP}a.root\n0badc0de {TOP}b.root extra\n')
+    assert read_checksum_manifest(str(manifest)) == {TOP + 'a.root': '00abcdef', TOP + 'b.root': '0badc0de'}
+
+
+def test_verify_checksums(fs):
+    fs.add_file(TOP + 'a.root', 0, content=b'content of a')
+    fs.add_file(TOP + 'b.root', 0, content=b'content of b')
+    expected = {
+        TOP + 'a.root': _adler32(b'content of a'),
+        TOP + 'b.root': _adler32(b'something else'),
+        TOP + 'missing.root': _adler32(b''),
+    }
+    assert verify_checksums(REDIRECTOR, expected) == [
+        (TOP + 'b.root', _adler32(b'content of b'), _adler32(b'something else')),
+        (TOP + 'missing.root', None, _adler32(b'')),
+    ]
+    assert fs.calls == {'query': 3}  # no data is read
+
+
+def test_checksums_from_local(fs, tmp_path):
+    fs.add_dir(TOP + 'data/sub')
+    fs.add_file(TOP + 'data/a.root', 0, content=b'a')
+    fs.add_file(TOP + 'data/sub/b.root', 0, content=b'b')
+    fs.add_file(TOP + 'data/sub/not_copied.root', 0, content=b'c')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'a.root').write_bytes(b'a')
+    (tmp_path / 'sub' / 'b.root').write_bytes(b'corrupted')
+    checksums = checksums_from_local(REDIRECTOR, TOP + 'data', str(tmp_path))
+    assert checksums == {TOP + 'data/a.root': _adler32(b'a'), TOP + 'data/sub/b.root': _adler32(b'corrupted')}
+    assert verify_checksums(REDIRECTOR, checksums) == [
+        (TOP + 'data/sub/b.root', _adler32(b'b'), _adler32(b'corrupted'))]
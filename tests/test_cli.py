@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import REDIRECTOR, USER, TOP
+from xrootd_cli import run_batch
+
+
+def test_failed_lines_do_not_stop_the_batch(fs, caplog):
+    fs.add_file(TOP + 'a.root', 1)
+    commands = [
+        (1, ['rm', '/store/user/other/a.root']),  # username safeguard
+        (2, ['mv', TOP + 'missing.root', TOP + 'b.root']),  # failed status
+        (3, ['copy-to', '/does/not/exist', TOP + 'c.root']),
+        (4, ['mkdir', TOP + 'new']),
+        (5, ['wait']),
+        (6, ['mv', TOP + 'a.root', TOP + 'new/a.root']),
+    ]
+    with caplog.at_level('INFO'):
+        failed = run_batch(REDIRECTOR, USER, commands, jobs=4)
+    assert [line_number for line_number, _, _ in failed] == [1, 2, 3]
+    assert failed[0][2].startswith('permission denied')
+    assert list(fs._dirs[TOP + 'new/']) == ['a.root']
+    # the output of each operation is attributed to its line
+    assert any(message.startswith('[line 6] ') for message in caplog.messages)
+
+
+def test_invalid_batch_file_is_rejected(fs):
+    with pytest.raises(ValueError):
+        run_batch(REDIRECTOR, USER, [(1, ['mkdir', TOP + 'new']), (2, ['rmdir'])])
+    with pytest.raises(ValueError):
+        run_batch(REDIRECTOR, USER, [(1, ['chmod', TOP])])
+    assert TOP + 'new/' not in fs._dirs  # checked before the first operation is sent
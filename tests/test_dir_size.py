@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import REDIRECTOR, TOP
+from xrootd_mock import make_tree
+from xrootd_utils import _dir_sizes, dir_size, stat_dir
+
+
+def _tree(fs) -> None:
+    fs.add_dir(TOP + 'a/b')
+    fs.add_dir(TOP + 'c')
+    fs.add_file(TOP + 'x.root', 1)
+    fs.add_file(TOP + 'a/y.root', 2)
+    fs.add_file(TOP + 'a/b/z.root', 4)
+    fs.add_file(TOP + 'c/w.root', 8)
+
+
+def test_dir_sizes(fs):
+    _tree(fs)
+    assert _dir_sizes(REDIRECTOR, TOP) == {TOP: 15, TOP + 'a/': 6, TOP + 'a/b/': 4, TOP + 'c/': 8}
+    assert fs.calls == {'dirlist': 4}  # one dirlist per directory, no stats
+
+
+@pytest.mark.parametrize('max_workers', [0, 1, 8])
+def test_dir_size_serial_and_parallel(fs, max_workers):
+    make_tree(fs, TOP + 'tree', n_entries=500, files_per_dir=20, file_size=3)
+    n_dirs = len([d for d in fs._dirs if d.startswith(TOP + 'tree/')])
+    assert dir_size(REDIRECTOR, TOP + 'tree', show_output=False, max_workers=max_workers) == \
+        3 * sum(1 for d in fs._dirs.values() for _, _, is_dir in d.values() if not is_dir)
+    assert fs.calls == {'dirlist': n_dirs}
+
+
+def test_stat_dir_lists_the_top_directory_once(fs):
+    _tree(fs)
+    assert stat_dir(REDIRECTOR, TOP, show_output=False, get_size=True) == 15
+    assert fs.calls == {'dirlist': 4}
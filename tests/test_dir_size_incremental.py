@@ -0,0 +1,53 @@
+from conftest import REDIRECTOR, TOP
+from xrootd_utils import dir_size_incremental
+
+OLD = 1600000000
+
+
+def _tree(fs) -> None:
+    fs.add_dir(TOP + 'a/b', modtime=OLD)
+    fs.add_dir(TOP + 'c', modtime=OLD)
+    fs.add_file(TOP + 'x.root', 1, modtime=OLD)
+    fs.add_file(TOP + 'a/y.root', 2, modtime=OLD)
+    fs.add_file(TOP + 'a/b/z.root', 4, modtime=OLD)
+    fs.add_file(TOP + 'a/b/v.root', 16, modtime=OLD)
+    fs.add_file(TOP + 'c/w.root', 8, modtime=OLD)
+
+
+def test_unchanged_directories_are_taken_from_the_cache(fs, tmp_path):
+    _tree(fs)
+    cache_file = str(tmp_path / 'sizes.json')
+    assert dir_size_incremental(REDIRECTOR, TOP, cache_file, show_output=False) == 31
+    assert fs.calls == {'stat': 1, 'dirlist': 4}
+
+    fs.reset_counters()
+    assert dir_size_incremental(REDIRECTOR, TOP, cache_file, show_output=False) == 31
+    assert fs.calls == {'stat': 4}  # only the directories are stated
+
+
+def test_change_deep_in_the_tree(fs, tmp_path):
+    _tree(fs)
+    cache_file = str(tmp_path / 'sizes.json')
+    dir_size_incremental(REDIRECTOR, TOP, cache_file, show_output=False)
+
+    status, _ = fs.rm(TOP + 'a/b/v.root')  # new modtime of a/b/
+    assert status.ok
+    fs.reset_counters()
+    assert dir_size_incremental(REDIRECTOR, TOP, cache_file, show_output=False) == 15
+    assert fs.calls == {'stat': 4, 'dirlist': 1}
+
+    status, _ = fs.mkdir(TOP + 'c/new')
+    assert status.ok
+    fs.add_file(TOP + 'c/new/n.root', 32)
+    fs.reset_counters()
+    assert dir_size_incremental(REDIRECTOR, TOP, cache_file, show_output=False) == 47
+    assert fs.calls == {'stat': 4, 'dirlist': 2}  # c/ and the new directory below it
+
+
+def test_cache_of_a_different_directory(fs, tmp_path):
+    _tree(fs)
+    cache_file = str(tmp_path / 'sizes.json')
+    dir_size_incremental(REDIRECTOR, TOP + 'a', cache_file, show_output=False)
+    fs.reset_counters()
+    assert dir_size_incremental(REDIRECTOR, TOP, cache_file, show_output=False) == 31
+    assert fs.calls == {'stat': 1, 'dirlist': 4}  # starts from scratch
@@ -0,0 +1,63 @@
+import os
+
+from conftest import REDIRECTOR, TOP
+from xrootd_mock import MockFile, MockStatus
+from xrootd_utils import download_chunked, _chunk_ranges
+
+CONTENT = bytes(range(256)) * 4 + b'tail'
+
+
+def test_chunk_ranges():
+    assert _chunk_ranges(10, 4) == [(0, 4), (4, 4), (8, 2)]
+    assert _chunk_ranges(8, 4) == [(0, 4), (4, 4)]
+
+
+def test_download_chunked(fs, tmp_path):
+    fs.add_file(TOP + 'big.root', 0, content=CONTENT)
+    dest = str(tmp_path / 'out' / 'big.root')
+    assert download_chunked(REDIRECTOR, TOP + 'big.root', dest, streams=4, chunk_size=100)
+    with open(dest, 'rb') as f:
+        assert f.read() == CONTENT
+    assert not os.path.exists(dest + '.part')
+    assert fs.calls['read'] == 11 and fs.calls['open'] <= 4  # one open file per stream
+    assert fs.calls['query'] == 1  # server side checksum
+
+
+def test_failed_range_keeps_the_part_file(fs, tmp_path, monkeypatch):
+    fs.add_file(TOP + 'big.root', 0, content=CONTENT)
+    monkeypatch.setattr(MockFile, 'read', lambda *args, **kwargs: (MockStatus(False, '[ERROR] Operation expired', 206), None))
+    dest = str(tmp_path / 'big.root')
+    assert not download_chunked(REDIRECTOR, TOP + 'big.root', dest, streams=2, chunk_size=100)
+    assert not os.path.exists(dest) and os.path.exists(dest + '.part')
+
+
+def test_checksum_mismatch(fs, tmp_path, monkeypatch):
+    fs.add_file(TOP + 'big.root', 0, content=CONTENT)
+    monkeypatch.setattr(fs, '_query', lambda querycode, arg: (MockStatus(), b'adler32 00000001\0'))
+    dest = str(tmp_path / 'big.root')
+    assert not download_chunked(REDIRECTOR, TOP + 'big.root', dest, chunk_size=100)
+    assert not os.path.exists(dest)
+
+
+def test_interrupted_download_is_resumed(fs, tmp_path, monkeypatch):
+    fs.add_file(TOP + 'big.root', 0, content=CONTENT)
+    dest = str(tmp_path / 'big.root')
+    journal = str(tmp_path / 'download.journal')
+    read = MockFile.read
+
+    def _read(self, offset=0, size=0, timeout=0, callback=None):  # the ranges from 500 on fail
+        if offset >= 500:
+            return MockStatus(False, '[ERROR] Operation expired', 206), None
+        return read(self, offset, size, timeout, callback)
+    monkeypatch.setattr(MockFile, 'read', _read)
+    assert not download_chunked(REDIRECTOR, TOP + 'big.root', dest, streams=1, chunk_size=100, journal=journal)
+    monkeypatch.undo()
+
+    fs.reset_counters()
+    assert download_chunked(REDIRECTOR, TOP + 'big.root', dest, streams=1, chunk_size=100, journal=journal)
+    assert fs.calls['read'] == 6  # only the missing ranges
+    with open(dest, 'rb') as f:
+        assert f.read() == CONTENT
+    fs.reset_counters()
+    assert download_chunked(REDIRECTOR, TOP + 'big.root', dest, journal=journal)  # done according to the journal
+    assert 'read' not in fs.calls
@@ -0,0 +1,61 @@
+from conftest import REDIRECTOR, TOP
+from xrootd_utils import _matches, create_file_list
+
+DIR_STR = TOP.replace('/', '_')
+
+
+def _tree(fs) -> None:
+    fs.add_dir(TOP + 'a/b')
+    fs.add_file(TOP + 'x_1.root', 10)
+    fs.add_file(TOP + 'x.log', 10)
+    fs.add_file(TOP + 'a/y_2.root', 100)
+    fs.add_file(TOP + 'a/b/z_3.root', 1000)
+    fs.add_file(TOP + 'a/b/z.txt', 1)
+
+
+def _read(name: str) -> list:
+    with open(name) as f:
+        return f.read().splitlines()
+
+
+def test_matches():
+    assert _matches('/store/a_1.root', ['*.root'])
+    assert _matches('/store/2018/a.root', ['*/2018*/*'])
+    assert _matches('/store/a_1.root', ['*.txt', r're:_[0-9]+\.root$'])
+    assert not _matches('/store/a.root', [r're:_[0-9]+\.root$'])
+    assert not _matches('/store/a.root', [])
+
+
+def test_flat(fs, tmp_path, monkeypatch):
+    _tree(fs)
+    monkeypatch.chdir(tmp_path)
+    create_file_list(REDIRECTOR, TOP, '.log')
+    assert sorted(_read(f'list{DIR_STR}.txt')) == [TOP + 'a/', TOP + 'x_1.root']
+    assert fs.calls == {'dirlist': 1}
+
+
+def test_recursive_with_filters(fs, tmp_path, monkeypatch):
+    _tree(fs)
+    monkeypatch.chdir(tmp_path)
+    create_file_list(REDIRECTOR, TOP, '', recursive=True)
+    assert sorted(_read(f'list{DIR_STR}.txt')) == sorted([TOP + 'x_1.root', TOP + 'x.log', TOP + 'a/y_2.root',
+                                                          TOP + 'a/b/z_3.root', TOP + 'a/b/z.txt'])
+    assert fs.calls == {'dirlist': 3}
+
+    create_file_list(REDIRECTOR, TOP, '', recursive=True, include=['*.root'], exclude_patterns=['*/b/*'])
+    assert sorted(_read(f'list{DIR_STR}.txt')) == [TOP + 'a/y_2.root', TOP + 'x_1.root']
+
+    create_file_list(REDIRECTOR, TOP, '', recursive=True, include=[r're:_[0-9]+\.root$'], min_size=50, max_size=100)
+    assert _read(f'list{DIR_STR}.txt') == [TOP + 'a/y_2.root']
+
+
+def test_shards(fs, tmp_path, monkeypatch):
+    fs.add_dir(TOP + 'many')
+    for i in range(10):
+        fs.add_file(TOP + f'many/f_{i}.root', 1)
+    monkeypatch.chdir(tmp_path)
+    create_file_list(REDIRECTOR, TOP + 'many', '', recursive=True, shards=3)
+    shards = [_read(f'list{(TOP + "many").replace("/", "_")}_{i}.txt') for i in range(3)]
+    assert [len(shard) for shard in shards] == [4, 3, 3]  # round robin
+    assert sorted(sum(shards, [])) == sorted(TOP + f'many/f_{i}.root' for i in range(10))
+    assert not (tmp_path / f'list{(TOP + "many").replace("/", "_")}.txt').exists()
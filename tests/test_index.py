@@ -0,0 +1,47 @@
+from conftest import REDIRECTOR, TOP
+from xrootd_index import build_index, refresh_index, covers, mark_stale, index_ls, index_dir_size
+
+
+def _index(fs, tmp_path) -> str:
+    fs.add_dir(TOP + 'd/e')
+    fs.add_file(TOP + 'a.root', 1)
+    fs.add_file(TOP + 'd/b.root', 2)
+    fs.add_file(TOP + 'd/e/c.root', 4)
+    db = str(tmp_path / 'index.sqlite')
+    build_index(REDIRECTOR, TOP, db)
+    return db
+
+
+def test_covers(fs, tmp_path):
+    db = _index(fs, tmp_path)
+    assert covers(db, REDIRECTOR, TOP) and covers(db, REDIRECTOR, TOP + 'd/e')
+    assert not covers(db, 'root://other:1094/', TOP + 'd/')  # built with another redirector
+    assert not covers(db, REDIRECTOR, TOP + 'a.root')  # a file: ls falls back to the storage
+    assert not covers(db, REDIRECTOR, TOP + 'missing/')
+    assert not covers(db, REDIRECTOR, '/store/user/')
+
+
+def test_refresh_of_a_stale_subtree(fs, tmp_path, caplog):
+    db = _index(fs, tmp_path)
+    fs.add_file(TOP + 'd/new.root', 8)
+    mark_stale(db, REDIRECTOR, [TOP + 'd/new.root'])
+    assert not covers(db, REDIRECTOR, TOP + 'd/') and not covers(db, REDIRECTOR, TOP)
+    assert not covers(db, REDIRECTOR, TOP + 'x/')
+
+    refresh_index(db, TOP + 'd/')
+    assert covers(db, REDIRECTOR, TOP + 'd/') and covers(db, REDIRECTOR, TOP)
+    caplog.clear()
+    with caplog.at_level('INFO'):
+        index_ls(db, TOP)
+        index_ls(db, TOP + 'd/')
+    assert f'{TOP}, N: 2' in caplog.text and ' d (dir)' in caplog.text  # the refreshed directory is kept
+    assert f'{TOP}d/, N: 3' in caplog.text and 'new.root (file)' in caplog.text
+    assert index_dir_size(db, TOP, show_output=False) == 15
+
+
+def test_mkdir_marks_the_deepest_indexed_directory(fs, tmp_path):
+    db = _index(fs, tmp_path)
+    mark_stale(db, REDIRECTOR, [TOP + 'd/x/y/z'])  # mkdir -p: x and y are new
+    assert not covers(db, REDIRECTOR, TOP + 'd/e/') and not covers(db, REDIRECTOR, TOP)
+    refresh_index(db, TOP + 'd/')
+    assert covers(db, REDIRECTOR, TOP + 'd/e/')
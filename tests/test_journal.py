@@ -0,0 +1,41 @@
+from xrootd_utils import TransferJournal, _JournalProgressHandler
+
+
+class _Status:
+    def __init__(self, ok: bool) -> None:
+        self.ok = ok
+
+
+def _drive(handler: _JournalProgressHandler, results: list) -> None:
+    # same calls as the progress wrapper of CopyProcess.run (jobs numbered from 1)
+    for job_id, ok in enumerate(results, 1):
+        handler.begin(job_id, len(results), 'source', 'target')
+        handler.update(job_id, 0, 10)
+        assert handler.should_cancel(job_id) is False
+        handler.update(job_id, 10, 10)
+        handler.end(job_id, {'status': _Status(ok)})
+
+
+def test_handler_records_finished_jobs(tmp_path):
+    local_paths = []
+    for name in ('a', 'b', 'c'):
+        path = tmp_path / name
+        path.write_bytes(b'x' * 3)
+        local_paths.append(str(path))
+    jobs = [(f'file://{path}', f'root://r//store/{i}') for i, path in enumerate(local_paths)]
+    journal_file = str(tmp_path / 'transfers.journal')
+
+    _drive(_JournalProgressHandler(TransferJournal(journal_file), jobs, local_paths), [True, False, True])
+
+    journal = TransferJournal(journal_file)  # reloaded from disk
+    assert [journal.is_done(source, dest, path) for (source, dest), path in zip(jobs, local_paths)] == \
+        [True, False, True]
+
+
+def test_changed_local_file_is_not_done(tmp_path):
+    path = tmp_path / 'a'
+    path.write_bytes(b'abc')
+    journal = TransferJournal(str(tmp_path / 'transfers.journal'))
+    journal.add_file('file://a', 'root://r//a', str(path))
+    path.write_bytes(b'abcd')
+    assert not TransferJournal(journal.path).is_done('file://a', 'root://r//a', str(path))
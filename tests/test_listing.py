@@ -0,0 +1,71 @@
+import pytest
+
+from conftest import REDIRECTOR, TOP
+from xrootd_mock import MockDirectoryList, MockListEntry, MockStatInfo
+from xrootd_utils import Listing, _get_directory_listing, interactive_listing, interactive_ls
+
+
+def _listing() -> Listing:
+    # server order, directories and files mixed
+    entries = [MockListEntry('zeta.root', MockStatInfo(30, 16, 3)), MockListEntry('run2', MockStatInfo(512, 19, 5)),
+               MockListEntry('alpha.root', MockStatInfo(10, 16, 9)), MockListEntry('run1', MockStatInfo(512, 19, 1)),
+               MockListEntry('run1_ana.root', MockStatInfo(20, 16, 7))]
+    return Listing.from_dirlist(MockDirectoryList(TOP, entries))
+
+
+def test_views():
+    listing = _listing()
+    assert len(listing) == 5
+    assert list(listing.dirs.names()) == ['run2', 'run1']  # directories first, server order
+    assert list(listing.files.names()) == ['zeta.root', 'alpha.root', 'run1_ana.root']
+    assert list(listing.dirs.paths()) == [TOP + 'run2/', TOP + 'run1/']
+    assert listing.size == 5  # like DirectoryList.size
+    assert sum(listing.files.sizes) == 60
+    assert list(listing.files.sizes) == [30, 10, 20]
+    assert [entry.name for entry in listing.files[1:]] == ['alpha.root', 'run1_ana.root']
+    assert listing[0].is_dir and not listing[-1].is_dir
+    with pytest.raises(ValueError):
+        listing[::2]
+
+
+def test_order():
+    listing = _listing()
+    assert [entry.name for entry in listing.iter_sorted('name')] == \
+        ['run1', 'run2', 'alpha.root', 'run1_ana.root', 'zeta.root']
+    assert [entry.name for entry in listing.files.iter_sorted('size', reverse=True)] == \
+        ['zeta.root', 'run1_ana.root', 'alpha.root']
+    assert [entry.name for entry in listing.iter_sorted('modtime')] == \
+        ['run1', 'run2', 'zeta.root', 'run1_ana.root', 'alpha.root']
+    with pytest.raises(ValueError):
+        listing.order('owner')
+
+
+def test_search_and_find():
+    listing = _listing()
+    assert [entry.name for entry in listing.take(listing.search('run1'))] == ['run1', 'run1_ana.root']
+    assert [entry.name for entry in listing.files.take(listing.files.search('run'))] == ['run1_ana.root']
+    assert [entry.name for entry in listing.take(listing.search('ROOT', fuzzy=True))] == \
+        ['zeta.root', 'alpha.root', 'run1_ana.root']  # substring matches, shortest first
+    assert [entry.name for entry in listing.take(listing.search('aa', fuzzy=True))] == ['alpha.root', 'run1_ana.root']
+    assert len(listing.search('')) == 5
+    assert listing.find(TOP + 'run2/').size == 512
+    assert 'alpha.root' in listing and 'alpha.root' not in listing.dirs
+    assert listing.find('alpha') is None
+
+
+def test_directory_listing_is_cached(fs):
+    fs.add_dir(TOP + 'sub')
+    fs.add_file(TOP + 'a.root', 5)
+    listing = _get_directory_listing(REDIRECTOR, TOP)
+    assert list(listing.names()) == ['sub', 'a.root']
+    assert _get_directory_listing(REDIRECTOR, TOP) is listing
+    assert fs.calls == {'dirlist': 1}
+
+
+def test_interactive_ls(fs):
+    fs.add_dir(TOP + 'sub')
+    fs.add_file(TOP + 'a.root', 1)
+    assert interactive_ls(REDIRECTOR, TOP) == ([TOP + 'sub/'], [TOP + 'a.root'])  # full paths, like before
+    dirs, files = interactive_listing(REDIRECTOR, TOP)
+    assert TOP + 'sub/' in dirs and [entry.size for entry in files] == [1]
+    assert fs.calls == {'dirlist': 1}  # the second call is answered from the listing cache
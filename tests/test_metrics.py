@@ -0,0 +1,93 @@
+import json
+import logging
+import threading
+
+from conftest import REDIRECTOR, TOP
+from xrootd_metrics import BUCKETS, Metrics, metrics
+from xrootd_mock import MockStatus
+from xrootd_utils import sessions
+
+
+def _recorded() -> Metrics:
+    recorder = Metrics()
+    recorder.record('stat', TOP + 'a.root', 0.002, True)
+    recorder.record('stat', TOP + 'a.root', 0.2, True)
+    recorder.record('stat', TOP + 'b.root', 20., False, '[ERROR] No such file')
+    recorder.record('dirlist', TOP, 0.0005, True)
+    return recorder
+
+
+def test_calls_through_the_session_pool_are_recorded(fs):
+    fs.add_file(TOP + 'a.root', 1)
+    metrics.reset()
+    myclient = sessions.get(REDIRECTOR)
+    myclient.stat(TOP + 'a.root')
+    myclient.stat(TOP + 'missing.root')
+    done = threading.Event()
+    myclient.dirlist(TOP, 0, callback=lambda status, response, hostlist: done.set())
+    assert done.wait(5)
+    assert metrics.calls == {'stat': 2, 'dirlist': 1}
+    assert metrics.errors == {'stat': 1}
+    assert [record[:2] for record in metrics.records][:2] == [('stat', TOP + 'a.root'), ('stat', TOP + 'missing.root')]
+
+
+def test_timed():
+    recorder = Metrics()
+    with recorder.timed('copy', 'a -> b'):
+        pass
+    with recorder.timed('copy', 'c -> d') as result:
+        result.append(MockStatus(False, 'failed'))
+    assert recorder.calls == {'copy': 2} and recorder.errors == {'copy': 1}
+    assert recorder.records[-1][3:] == (False, 'failed')
+
+
+def test_disabled():
+    recorder = Metrics()
+    recorder.enabled = False
+    recorder.record('stat', TOP, 0.1, True)
+    assert recorder.calls == {} and len(recorder.records) == 0
+
+
+def test_summary(caplog):
+    with caplog.at_level(logging.INFO):
+        _recorded().summary(top=2)
+    text = caplog.text
+    assert 'dirlist' in text and 'total: 4 calls' in text
+    assert f'20000.0 ms stat {TOP}b.root (failed)' in text
+    assert f'2x stat {TOP}a.root' in text
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        Metrics().summary()
+    assert 'No XRootD calls recorded.' in caplog.text
+
+
+def test_export_json(tmp_path):
+    output_name = str(tmp_path / 'metrics.json')
+    _recorded().export(output_name)
+    with open(output_name) as f:
+        exported = json.load(f)
+    assert exported['operations']['stat']['calls'] == 3
+    assert exported['operations']['stat']['errors'] == 1
+    assert exported['operations']['stat']['buckets'][str(0.005)] == 1
+    assert len(exported['records']) == 4
+    assert exported['records'][2] == {'op': 'stat', 'path': TOP + 'b.root', 'latency': 20., 'ok': False,
+                                      'message': '[ERROR] No such file'}
+
+
+def test_export_prometheus(tmp_path):
+    output_name = str(tmp_path / 'metrics.prom')
+    _recorded().export(output_name)
+    with open(output_name) as f:
+        lines = f.read().splitlines()
+    assert 'xrootd_requests_total{op="stat"} 3' in lines
+    assert 'xrootd_request_errors_total{op="dirlist"} 0' in lines
+    # the buckets are cumulative
+    assert 'xrootd_request_duration_seconds_bucket{op="stat",le="0.001"} 0' in lines
+    assert 'xrootd_request_duration_seconds_bucket{op="stat",le="0.005"} 1' in lines
+    assert 'xrootd_request_duration_seconds_bucket{op="stat",le="0.25"} 2' in lines
+    assert 'xrootd_request_duration_seconds_bucket{op="stat",le="10"} 2' in lines
+    assert 'xrootd_request_duration_seconds_bucket{op="stat",le="+Inf"} 3' in lines
+    assert 'xrootd_request_duration_seconds_count{op="stat"} 3' in lines
+    assert len([line for line in lines if line.startswith('xrootd_request_duration_seconds_bucket')]) == 2 * len(BUCKETS)
+    assert not (tmp_path / 'metrics.prom.tmp').exists()
@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import REDIRECTOR, USER, TOP
+from xrootd_utils import PermissionDenied, del_dir, bulk_mv, _run_copy_process, TransferJournal
+
+
+def test_del_dir(fs):
+    fs.add_dir(TOP + 'old/a/b')
+    fs.add_file(TOP + 'old/x.root', 10)
+    fs.add_file(TOP + 'old/a/b/y.root', 20)
+    fs.add_file(TOP + 'keep.root', 30)
+    del_dir(REDIRECTOR, TOP + 'old/', USER, ask=False, max_workers=4)
+    assert set(fs._dirs) == {'/', '/store/', '/store/user/', TOP}
+    assert list(fs._dirs[TOP]) == ['keep.root']
+    assert fs.calls['rm'] == 2 and fs.calls['rmdir'] == 3
+    assert 'locate' not in fs.calls  # deletions always go through the redirector
+
+
+def test_del_dir_safeguard(fs):
+    fs.add_dir('/store/user/other/dir')
+    with pytest.raises(PermissionDenied):
+        del_dir(REDIRECTOR, '/store/user/other/dir/', USER, ask=False)
+    assert '/store/user/other/dir/' in fs._dirs
+
+
+def test_bulk_mv(fs, tmp_path):
+    for name in ('run1_a.root', 'run1_b.root', 'run2_a.root'):
+        fs.add_file(TOP + name, 1)
+    fs.add_dir(TOP + 'run2')
+    fs.add_file(TOP + 'run2/run2_a.root', 1)  # target exists: no overwrite
+    pairs = [(TOP + name, f'{TOP}{name[:4]}/{name}') for name in ('run1_a.root', 'run1_b.root', 'run2_a.root')]
+    report = tmp_path / 'failed.txt'
+    failed = bulk_mv(REDIRECTOR, pairs, max_workers=4, report_file=str(report))
+    assert sorted(fs._dirs[TOP + 'run1/']) == ['run1_a.root', 'run1_b.root']
+    assert [(source, dest) for source, dest, _ in failed] == [pairs[2]]
+    assert report.read_text().split() == list(pairs[2])
+    assert fs.calls['mkdir'] == 2  # once per target directory
+
+
+def test_copy_process_with_journal(fs, tmp_path):
+    local_dir = tmp_path / 'data'
+    local_dir.mkdir()
+    local_paths = []
+    for name in ('a.root', 'b.root'):
+        (local_dir / name).write_bytes(name.encode())
+        local_paths.append(str(local_dir / name))
+    jobs = [(f'file://{path}', f'{REDIRECTOR}{TOP}new/{i}.root') for i, path in enumerate(local_paths)]
+    journal = str(tmp_path / 'copy.journal')
+
+    report = _run_copy_process(jobs, parallel=2, journal=journal, local_paths=local_paths)
+    assert [ok for _, _, ok in report] == [True, True]
+    assert fs._contents[TOP + 'new/0.root'] == b'a.root'
+    assert all(TransferJournal(journal).is_done(source, target, path) for (source, target), path in zip(jobs, local_paths))
+
+    # second run: nothing is copied again, a changed local file is
+    (local_dir / 'b.root').write_bytes(b'changed')
+    fs.reset_counters()
+    report = _run_copy_process(jobs, parallel=2, force=True, journal=journal, local_paths=local_paths)
+    assert [ok for _, _, ok in report] == [True, True]
+    assert fs.calls == {'copy': 1}
+    assert fs._contents[TOP + 'new/1.root'] == b'changed'
+
+
+def test_copy_process_reports_failed_jobs(fs, tmp_path):
+    local = tmp_path / 'a.root'
+    local.write_bytes(b'a')
+    fs.add_file(TOP + 'a.root', 1)
+    jobs = [(f'file://{local}', f'{REDIRECTOR}{TOP}a.root'), (f'file://{local}', f'{REDIRECTOR}{TOP}b.root')]
+    report = _run_copy_process(jobs)
+    assert [ok for _, _, ok in report] == [False, True]  # no overwrite without force
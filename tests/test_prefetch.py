@@ -0,0 +1,78 @@
+from conftest import REDIRECTOR, TOP
+from xrootd_browser import Browser, Prefetcher
+from xrootd_utils import listing_cache
+
+
+def _dirs(fs, n=4) -> list:
+    directories = [TOP + f'dir_{i}/' for i in range(n)]
+    for i, directory in enumerate(directories):
+        fs.add_dir(directory)
+        fs.add_file(directory + 'a.root', i)
+    return directories
+
+
+def _wait(prefetcher: Prefetcher) -> None:
+    for future in list(prefetcher._futures.values()):
+        future.result()
+
+
+def test_prefetch_fills_the_listing_cache(fs):
+    directories = _dirs(fs)
+    prefetcher = Prefetcher(REDIRECTOR)
+    prefetcher.prefetch(directories[:2] + directories[:1])
+    _wait(prefetcher)
+    assert [listing_cache.get(REDIRECTOR, directory) is not None for directory in directories] == [True, True, False, False]
+    assert fs.calls == {'dirlist': 2}
+
+    prefetcher.prefetch(directories)  # the cached ones are not listed again
+    _wait(prefetcher)
+    assert fs.calls == {'dirlist': 4}
+    prefetcher.close()
+
+
+def test_budget(fs):
+    directories = _dirs(fs)
+    prefetcher = Prefetcher(REDIRECTOR, budget=2)
+    prefetcher.prefetch(directories)
+    assert sorted(prefetcher._futures) == directories[:2]
+    _wait(prefetcher)
+    assert fs.calls == {'dirlist': 2}
+    prefetcher.close()
+
+
+def test_get_uses_the_prefetch(fs):
+    directories = _dirs(fs)
+    prefetcher = Prefetcher(REDIRECTOR)
+    prefetcher.prefetch(directories[1:2])
+    listing = prefetcher.get(directories[1])
+    assert [entry.size for entry in listing] == [1]
+    assert fs.calls == {'dirlist': 1}
+    assert [entry.size for entry in prefetcher.get(directories[2])] == [2]  # not prefetched: listed
+    assert fs.calls == {'dirlist': 2}
+    prefetcher.close()
+
+
+def test_failed_prefetch_is_listed_again(fs):
+    directories = _dirs(fs)
+    prefetcher = Prefetcher(REDIRECTOR)
+    prefetcher.prefetch([TOP + 'missing/'])
+    _wait(prefetcher)
+    fs.add_dir(TOP + 'missing')
+    assert len(prefetcher.get(TOP + 'missing/')) == 0
+    assert fs.calls == {'dirlist': 2}
+    prefetcher.close()
+
+
+def test_browser_opens_subdirectories_from_the_prefetch(fs):
+    directories = _dirs(fs)
+    browser = Browser(REDIRECTOR, TOP, prefetch=8)
+    browser.prefetch(browser.page_entries())
+    _wait(browser._prefetcher)
+    assert fs.calls == {'dirlist': 1 + len(directories) + 1}  # top, the subdirectories and the parent of top
+    fs.reset_counters()
+    browser.open(directories[3])
+    assert [entry.name for entry in browser.page_entries()] == ['a.root']
+    browser.open(browser.parent_directory())
+    assert browser.directory == TOP
+    assert fs.calls == {}
+    browser.close()
@@ -0,0 +1,52 @@
+from xrootd_mock import MockFileSystem, MockStatus
+from xrootd_redirectors import RedirectorManager
+from xrootd_utils import copy_file_from_remote, copy_files_from_remote, sessions
+
+DOWN = 'root://down:1094/'
+UP = 'root://up:1094/'
+
+
+class _TimingOut(MockFileSystem):
+    # every request runs into the request timeout (errOperationExpired)
+    def _call(self, op, function, callback, *args):
+        self._count(op)
+        return MockStatus(False, '[FATAL] Operation expired', 206), None
+
+
+def test_only_reads_fail_over(fs):
+    down = _TimingOut()
+    filesystems = {DOWN: down, UP: fs}
+    sessions.set_backend(lambda redirector: filesystems[redirector])
+    fs.add_file('/store/a.root', 1)
+    redirector = RedirectorManager([DOWN, UP], state_file=None).activate(DOWN)
+    myclient = sessions.get(redirector)
+
+    status, statinfo = myclient.stat('/store/a.root')
+    assert status.ok and statinfo.size == 1  # sent again to the next candidate
+    assert down.calls == {'stat': 1}
+
+    redirector = RedirectorManager([DOWN, UP], state_file=None).activate(DOWN)
+    status, _ = sessions.get(redirector).mv('/store/a.root', '/store/b.root')
+    assert status.code == 206  # not sent again: the mv may have been applied
+    assert down.calls == {'stat': 1, 'mv': 1} and 'mv' not in fs.calls
+
+
+def test_copies_after_a_failover_use_the_new_redirector(fs, tmp_path, monkeypatch):
+    filesystems = {DOWN: _TimingOut(), UP: fs}
+    sessions.set_backend(lambda redirector: filesystems[redirector])
+    fs.add_file('/store/a.root', 0, content=b'a')
+    redirector = RedirectorManager([DOWN, UP], state_file=None).activate(DOWN)
+    assert sessions.current_url(redirector + '/store/a.root') == DOWN + '/store/a.root'
+    assert sessions.get(redirector).stat('/store/a.root')[0].ok  # fails over to UP
+    assert sessions.current_url(redirector + '/store/a.root') == UP + '/store/a.root'
+    assert sessions.current_url('file:///tmp/a.root') == 'file:///tmp/a.root'
+
+    urls = []
+    copy = MockFileSystem._copy
+    monkeypatch.setattr(MockFileSystem, '_copy', lambda self, source, target, force: (
+        urls.append((source, target)), copy(self, source, target, force))[1])
+    copy_file_from_remote(redirector, '/store/a.root', str(tmp_path / 'a.root'))
+    report = copy_files_from_remote(redirector, [('/store/a.root', str(tmp_path / 'b.root'))])
+    assert [source for source, _ in urls] == [UP + '/store/a.root'] * 2
+    assert report == [(DOWN + '/store/a.root', 'file://' + str(tmp_path / 'b.root'), True)]  # like it was given
+    assert 'copy' not in filesystems[DOWN].calls
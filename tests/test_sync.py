@@ -0,0 +1,52 @@
+from typing import Any
+
+import xrootd_utils
+from conftest import REDIRECTOR, TOP
+from xrootd_utils import _leaf_dirs, _sync_plan, sync_to_remote
+
+
+def test_leaf_dirs():
+    assert _leaf_dirs(['/a/b', '/a/', '/a/b/c/', '/a/b1/', '/x/y/', '/x/y/']) == ['/a/b/c/', '/a/b1/', '/x/y/']
+    assert _leaf_dirs([]) == []
+    # no trailing slash, duplicate slashes: /a/b1 is not within /a/b
+    assert _leaf_dirs(['/a/b', '/a/b1', '//a//b/./c']) == ['/a/b/c/', '/a/b1/']
+
+
+class _CountingPath(str):
+    # counts the prefix comparisons of _leaf_dirs
+    comparisons = 0
+
+    def startswith(self, *args: Any) -> bool:
+        _CountingPath.comparisons += 1
+        return super().startswith(*args)
+
+
+def test_leaf_dirs_is_not_quadratic(monkeypatch):
+    normalize_dir = xrootd_utils._normalize_dir
+    monkeypatch.setattr(xrootd_utils, '_normalize_dir', lambda directory: _CountingPath(normalize_dir(directory)))
+    directories = [f'/store/user/u/d{i}/sub{j}/' for i in range(500) for j in range(10)]
+    directories += [f'/store/user/u/d{i}/' for i in range(500)]
+    _CountingPath.comparisons = 0
+    leaves = _leaf_dirs(directories)
+    assert 0 < _CountingPath.comparisons <= len(directories)  # one comparison with the successor per directory
+    assert leaves == sorted(directories[:5000])
+
+
+def test_sync_plan():
+    source = {'a': (1, 10), 'b': (2, 10), 'c': (3, 10)}
+    dest = {'a': (1, 10), 'b': (5, 10)}
+    assert sorted(_sync_plan(source, dest)) == ['b', 'c']
+
+
+def test_sync_to_remote_stats_the_remote_directory_once(fs, tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'a.txt').write_bytes(b'a')
+    (tmp_path / 'sub' / 'b.txt').write_bytes(b'bb')
+    results = sync_to_remote(REDIRECTOR, str(tmp_path), TOP + 'new')
+    assert sorted(ok for _, _, ok in results) == [True, True]
+    assert fs._contents[TOP + 'new/sub/b.txt'] == b'bb'
+    assert fs.calls['stat'] == 1  # only the existence check of the remote directory
+
+    fs.reset_counters()
+    assert sync_to_remote(REDIRECTOR, str(tmp_path), TOP + 'new') == []
+    assert fs.calls == {'stat': 1, 'dirlist': 2}
@@ -0,0 +1,63 @@
+import csv
+import json
+
+from conftest import REDIRECTOR, TOP
+from xrootd_utils import REPORT_COLUMNS, usage_report
+
+T = 1600000000
+
+
+def _tree(fs) -> None:
+    fs.add_dir(TOP + 'a/b/d')
+    fs.add_dir(TOP + 'c')
+    fs.add_dir(TOP + 'empty')
+    fs.add_file(TOP + 'x.root', 1, modtime=T + 100)
+    fs.add_file(TOP + 'a/y.root', 2, modtime=T + 300)
+    fs.add_file(TOP + 'a/b/z.root', 4, modtime=T + 200)
+    fs.add_file(TOP + 'a/b/d/w.root', 16, modtime=T + 50)
+    fs.add_file(TOP + 'c/v.root', 8, modtime=T + 400)
+
+
+def test_depth_aggregation(fs):
+    _tree(fs)
+    report = usage_report(REDIRECTOR, TOP.rstrip('/'), depth=1, top_n=2, show_output=False)
+    assert report['total'] == {'path': TOP, 'depth': 0, 'size': 31, 'files': 5, 'dirs': 5,
+                               'oldest': T + 50, 'newest': T + 400}
+    assert report['dirs'] == [
+        report['total'],
+        {'path': TOP + 'a/', 'depth': 1, 'size': 22, 'files': 3, 'dirs': 2, 'oldest': T + 50, 'newest': T + 300},
+        {'path': TOP + 'c/', 'depth': 1, 'size': 8, 'files': 1, 'dirs': 0, 'oldest': T + 400, 'newest': T + 400},
+        {'path': TOP + 'empty/', 'depth': 1, 'size': 0, 'files': 0, 'dirs': 0, 'oldest': None, 'newest': None},
+    ]
+    assert fs.calls == {'dirlist': 6}  # one traversal
+
+    assert [row['path'] for row in usage_report(REDIRECTOR, TOP, depth=0, show_output=False)['dirs']] == [TOP]
+    rows = {row['path']: row for row in usage_report(REDIRECTOR, TOP, depth=2, show_output=False)['dirs']}
+    assert (rows[TOP + 'a/b/']['depth'], rows[TOP + 'a/b/']['size'], rows[TOP + 'a/b/']['dirs']) == (2, 20, 1)
+    assert TOP + 'a/b/d/' not in rows
+    assert rows[TOP]['size'] == 31
+
+
+def test_top_lists(fs):
+    _tree(fs)
+    report = usage_report(REDIRECTOR, TOP, depth=1, top_n=2, show_output=False)
+    assert [row['path'] for row in report['largest_dirs']] == [TOP + 'a/', TOP + 'c/']
+    assert report['largest_files'] == [{'path': TOP + 'a/b/d/w.root', 'size': 16, 'modtime': T + 50},
+                                       {'path': TOP + 'c/v.root', 'size': 8, 'modtime': T + 400}]
+    assert report['oldest_files'] == [{'path': TOP + 'a/b/d/w.root', 'size': 16, 'modtime': T + 50},
+                                      {'path': TOP + 'x.root', 'size': 1, 'modtime': T + 100}]
+    assert [row['path'] for row in report['oldest_dirs']] == [TOP + 'a/', TOP + 'c/']  # without files: not listed
+
+
+def test_export(fs, tmp_path):
+    _tree(fs)
+    json_file, csv_file = str(tmp_path / 'report.json'), str(tmp_path / 'report.csv')
+    report = usage_report(REDIRECTOR, TOP, depth=1, json_file=json_file, csv_file=csv_file)
+    with open(json_file) as f:
+        assert json.load(f) == report
+    with open(csv_file, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == REPORT_COLUMNS
+    assert [(row['path'], row['size'], row['oldest']) for row in rows] == [
+        (TOP, '31', str(T + 50)), (TOP + 'a/', '22', str(T + 50)), (TOP + 'c/', '8', str(T + 400)),
+        (TOP + 'empty/', '0', '')]
@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import REDIRECTOR, TOP
+from xrootd_mock import make_tree
+from xrootd_utils import walk
+
+
+@pytest.mark.parametrize('prefetch', [0, 4])
+def test_walk_is_top_down_and_complete(fs, prefetch):
+    make_tree(fs, TOP, n_entries=300, files_per_dir=10, dirs_per_dir=3)
+    seen = []
+    n_files = 0
+    for current, dirs, files in walk(REDIRECTOR, TOP, prefetch):
+        assert current == TOP or current.rstrip('/').rsplit('/', 1)[0] + '/' in seen  # parent first
+        assert all(isinstance(name, str) and statinfo.flags == 19 for name, statinfo in dirs)
+        seen.append(current)
+        n_files += len(files)
+    assert sorted(seen) == sorted(d for d in fs._dirs if d.startswith(TOP))
+    assert n_files == sum(1 for d in fs._dirs.values() for _, _, is_dir in d.values() if not is_dir)
+
+
+def test_walk_prunes_in_place(fs):
+    fs.add_dir(TOP + 'keep/sub')
+    fs.add_dir(TOP + 'skip/sub')
+    seen = []
+    for current, dirs, _ in walk(REDIRECTOR, TOP, prefetch=2):
+        seen.append(current)
+        dirs[:] = [(name, statinfo) for name, statinfo in dirs if name != 'skip']
+    assert sorted(seen) == [TOP, TOP + 'keep/', TOP + 'keep/sub/']
+    assert fs.calls['dirlist'] == 3
+
+
+def test_walk_of_a_missing_directory(fs):
+    with pytest.raises(AssertionError):
+        list(walk(REDIRECTOR, TOP + 'missing/'))
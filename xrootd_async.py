@@ -0,0 +1,276 @@
+import logging
+from typing import Any, Awaitable, Iterable, List, NamedTuple
+
+# asyncio and xrootd_utils are imported on first use: importing this module stays fast (see xrootd_bench.py --startup)
+
+log = logging.getLogger()
+
+#################################################################
+# asyncio API                                                   #
+# The requests are sent with the callback form of the bindings  #
+# (callback=...). The XRootD thread hands the response back to  #
+# the event loop, so thousands of requests can be overlapped    #
+# without one thread per request. Each function returns an      #
+# XrdResult instead of only logging.                            #
+#################################################################
+
+
+class XrdResult(NamedTuple):
+    """
+    Result of one asynchronous operation.
+
+    op       : name of the operation (stat, dirlist, ...)
+    path     : path the operation was applied to
+    ok       : status.ok
+    message  : status.message
+    response : xrd response (statinfo, dirlist output, locations, ...) or None
+    """
+    op: str
+    path: str
+    ok: bool
+    message: str
+    response: Any
+
+
+########## helper functions ###############
+def _utils() -> Any:
+    import xrootd_utils  # sessions, listing_cache and the flags; XRootD itself is imported lazily by xrootd_utils
+    return xrootd_utils
+
+
+async def _request(op: str, path: str, method: Any, *args: Any) -> XrdResult:
+    """
+    Sends <method>(*args) with a callback and waits for the response without blocking the event loop.
+
+    Parameters
+    ----------
+    op     : str
+    path   : str
+    method : callable
+        bound method of the FileSystem
+    args   : any
+        arguments of the method (without the callback)
+
+    Returns
+    -------
+    XrdResult
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _set_result(result: XrdResult) -> None:
+        if not future.done():  # the waiting task could have been cancelled
+            future.set_result(result)
+
+    def _handler(status: Any, response: Any, hostlist: Any) -> None:
+        # called from an XRootD thread
+        result = XrdResult(op, path, bool(status.ok), status.message, response)
+        loop.call_soon_threadsafe(_set_result, result)
+
+    status = method(*args, callback=_handler)
+    if not status.ok:  # the request could not even be sent
+        log.debug(f'[async {op}] {path} Status: {status}')
+        return XrdResult(op, path, False, status.message, None)
+    result = await future
+    log.debug(f'[async {op}] {path} ok: {result.ok}, {result.message}')
+    return result
+
+
+async def gather_limited(coroutines: Iterable[Awaitable], limit=100) -> List[Any]:
+    """
+    Like asyncio.gather, but at most <limit> coroutines run at the same time.
+
+    Parameters
+    ----------
+    coroutines : iterable
+    limit      : int
+
+    Returns
+    -------
+    list
+        results in the order of <coroutines>
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _limited(coroutine: Awaitable) -> Any:
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(_limited(coroutine) for coroutine in coroutines))
+
+
+###########################################
+
+
+async def async_stat(redirector: str, path: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.stat. The response is the statinfo.
+
+    Parameters
+    ----------
+    redirector : str
+    path       : str
+
+    Returns
+    -------
+    XrdResult
+    """
+    utils = _utils()
+    return await _request('stat', path, utils.sessions.get(redirector).stat, path)
+
+
+async def async_dirlist(redirector: str, directory: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.dirlist with statinfo. The response is the dirlist output.
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+
+    Returns
+    -------
+    XrdResult
+    """
+    utils = _utils()
+    return await _request('dirlist', directory, utils.sessions.get(redirector).dirlist, directory, utils.DirListFlags.STAT)
+
+
+async def async_rm(redirector: str, filepath: str, user: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.rm. Like del_file, the path has to contain <user>.
+    Note: There is no confirmation!
+
+    Parameters
+    ----------
+    redirector : str
+    filepath   : str
+    user       : str
+
+    Returns
+    -------
+    XrdResult
+    """
+    utils = _utils()
+    if user not in filepath:
+        return XrdResult('rm', filepath, False, 'Permission denied. Your username was not found in the filepath!', None)
+    result = await _request('rm', filepath, utils.sessions.get(redirector).rm, filepath)
+    utils.listing_cache.invalidate(redirector, filepath)
+    return result
+
+
+async def async_rmdir(redirector: str, directory: str, user: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.rmdir (the directory has to be empty). The path has to contain <user>.
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+    user       : str
+
+    Returns
+    -------
+    XrdResult
+    """
+    utils = _utils()
+    if user not in directory:
+        return XrdResult('rmdir', directory, False, 'Permission denied. Your username was not found in the path!', None)
+    result = await _request('rmdir', directory, utils.sessions.get(redirector).rmdir, directory)
+    utils.listing_cache.invalidate(redirector, directory)
+    return result
+
+
+async def async_mv(redirector: str, source: str, dest: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.mv (no overwrite, see mv).
+
+    Parameters
+    ----------
+    redirector : str
+    source     : str
+    dest       : str
+
+    Returns
+    -------
+    XrdResult
+        with path=<source>
+    """
+    utils = _utils()
+    result = await _request('mv', source, utils.sessions.get(redirector).mv, source, dest)
+    utils.listing_cache.invalidate(redirector, source)
+    utils.listing_cache.invalidate(redirector, dest)
+    return result
+
+
+async def async_mkdir(redirector: str, directory: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.mkdir "-p" (creates the entire tree).
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+
+    Returns
+    -------
+    XrdResult
+    """
+    utils = _utils()
+    result = await _request('mkdir', directory, utils.sessions.get(redirector).mkdir, directory, utils.MkDirFlags.MAKEPATH)
+    utils.listing_cache.invalidate(redirector, directory, ancestors=True)
+    return result
+
+
+async def async_locate(redirector: str, filepath: str) -> XrdResult:
+    """
+    Asynchronous FileSystem.locate. The response contains the locations.
+
+    Parameters
+    ----------
+    redirector : str
+    filepath   : str
+
+    Returns
+    -------
+    XrdResult
+    """
+    utils = _utils()
+    return await _request('locate', filepath, utils.sessions.get(redirector).locate, filepath, utils.OpenFlags.REFRESH)
+
+
+async def async_copy(redirector: str, source: str, dest: str, force=False) -> XrdResult:
+    """
+    Copy with FileSystem.copy for full urls (e.g. 'file:///home/<user>/test.txt', redirector + '/store/...').
+    The bindings do not offer a callback for copies, therefore the copy runs in the default executor
+    of the event loop. For many files, copy_files_to_remote/copy_files_from_remote are more efficient.
+
+    Parameters
+    ----------
+    redirector : str
+    source     : str
+    dest       : str
+    force      : bool
+        overwrite the target
+
+    Returns
+    -------
+    XrdResult
+        with path=<source>
+    """
+    import asyncio
+    utils = _utils()
+    loop = asyncio.get_running_loop()
+    status, _ = await loop.run_in_executor(None, lambda: utils.sessions.get(redirector).copy(source, dest, force=force))
+    if dest.startswith(redirector):
+        utils.listing_cache.invalidate(redirector, dest[len(redirector):])
+    log.debug(f'[async copy] {source} -> {dest} Status: {status}')
+    return XrdResult('copy', source, bool(status.ok), status.message, None)
+
+
+########################## Examples #############################
+# import asyncio
+# results = asyncio.run(gather_limited((async_stat(redirector, path) for path in paths), limit=200))
+# failed = [result.path for result in results if not result.ok]
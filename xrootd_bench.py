@@ -0,0 +1,218 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import xrootd_utils
+from xrootd_mock import MockFileSystem, make_tree, install
+
+#################################################################
+# Benchmarks of the xrootd_utils functions against the          #
+# in-memory FileSystem of xrootd_mock (no grid site necessary). #
+# For every operation and tree size, the round trips, the wall  #
+# time and the peak python memory (tracemalloc) are reported.   #
+#################################################################
+# Example:
+#   $ python3 xrootd_bench.py --entries 1000 10000 100000 --latency 0.001 --json bench.json
+# Startup time (import without side effects, target in seconds above the bare interpreter):
+#   $ python3 xrootd_bench.py --startup --startup-target 0.1
+
+REDIRECTOR = 'root://mock.bench:1094/'
+TOP = '/store/user/bench/'
+USER = 'bench'
+
+
+########## operations ###############
+def _operations(workers: int) -> Dict[str, Callable[[], Any]]:
+    """
+    The benchmarked operations. Serial and parallel variants of the recursive operations
+    are measured separately (prefetch/max_workers=0 means one request after the other).
+    """
+    return {
+        'ls': lambda: xrootd_utils.ls(REDIRECTOR, TOP),
+        'interactive_ls': lambda: xrootd_utils.interactive_ls(REDIRECTOR, TOP),
+        'interactive_listing': lambda: xrootd_utils.interactive_listing(REDIRECTOR, TOP),
+        'dir_size (serial)': lambda: xrootd_utils.dir_size(REDIRECTOR, TOP, False, max_workers=0),
+        'dir_size (parallel)': lambda: xrootd_utils.dir_size(REDIRECTOR, TOP, False, max_workers=workers),
+        'usage_report': lambda: xrootd_utils.usage_report(REDIRECTOR, TOP, show_output=False, max_workers=workers),
+        'create_file_list': lambda: xrootd_utils.create_file_list(REDIRECTOR, TOP, ''),
+        'del_dir (serial)': lambda: xrootd_utils.del_dir(REDIRECTOR, TOP, USER, ask=False, max_workers=0),
+        'del_dir (parallel)': lambda: xrootd_utils.del_dir(REDIRECTOR, TOP, USER, ask=False, max_workers=workers),
+    }
+
+
+def _measure(fs: MockFileSystem, operation: Callable[[], Any], setup: Callable[[], None]) -> Dict[str, float]:
+    """
+    Runs <operation> twice on a fresh tree: once for the wall time and the round trips,
+    once with tracemalloc for the peak memory (tracemalloc slows down the run).
+
+    Parameters
+    ----------
+    fs        : MockFileSystem
+    operation : callable
+    setup     : callable
+        (re)creates the tree
+
+    Returns
+    -------
+    dict
+        round_trips, wall_time [s], peak_memory [MiB]
+    """
+    setup()
+    xrootd_utils.listing_cache.clear()
+    xrootd_utils.location_cache.clear()
+    fs.reset_counters()
+    start = time.perf_counter()
+    operation()
+    wall_time = time.perf_counter() - start
+    round_trips = fs.round_trips()
+
+    setup()
+    xrootd_utils.listing_cache.clear()
+    xrootd_utils.location_cache.clear()
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'round_trips': round_trips, 'wall_time': wall_time, 'peak_memory': peak / (1 << 20)}
+
+
+def run(entries: List[int], latency: float, workers: int, files_per_dir: int, selected: List[str]) -> List[Dict]:
+    """
+    Runs all <selected> operations for all tree sizes in <entries>.
+
+    Parameters
+    ----------
+    entries       : list
+        number of entries of the synthetic trees
+    latency       : float
+        simulated latency per round trip in seconds
+    workers       : int
+        parallel requests for the parallel variants
+    files_per_dir : int
+    selected      : list
+        names of the operations (see _operations), empty list for all
+
+    Returns
+    -------
+    list
+        one dict per operation and tree size
+    """
+    results = []
+    operations = _operations(workers)
+    for name in selected:
+        if name not in operations:
+            raise ValueError(f'Unknown operation {name}. Available: {list(operations)}')
+    for n_entries in entries:
+        for name, operation in operations.items():
+            if len(selected) > 0 and name not in selected:
+                continue
+            fs = MockFileSystem(latency=latency)
+            install(fs)
+
+            def setup() -> None:
+                fs.clear()
+                make_tree(fs, TOP, n_entries, files_per_dir=files_per_dir)
+
+            result = _measure(fs, operation, setup)
+            result.update({'operation': name, 'entries': n_entries, 'latency': latency})
+            results.append(result)
+            print('{0:<22} {1:>9} {2:>12} {3:>12.3f} {4:>12.1f}'.format(
+                name, n_entries, result['round_trips'], result['wall_time'], result['peak_memory']))
+    return results
+
+
+########## startup ###############
+# executed in a fresh interpreter: imports <module> and checks that the import had no side effects
+STARTUP_CHECK = """
+import logging, sys
+root = logging.getLogger()
+level, handlers = root.level, list(root.handlers)
+import {module}
+assert root.level == level and root.handlers == handlers, 'logging configured on import'
+heavy = [name for name in ('XRootD', 'questionary') if name in sys.modules]
+assert not heavy, f'imported on import: {{heavy}}'
+"""
+
+
+def _run_python(args: List[str]) -> float:
+    # wall time of one fresh interpreter
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def startup(repeat=10, target=0.1) -> List[Dict]:
+    """
+    Measures the startup time of the modules (import, and --help of xrootd_interactive.py) in fresh interpreters.
+    The median above the startup of the bare interpreter is compared with <target>.
+    Every import also checks that no logging is configured and XRootD/questionary are not imported.
+
+    Parameters
+    ----------
+    repeat : int
+        interpreter starts per measurement
+    target : float
+        maximum startup time above the bare interpreter in seconds
+
+    Returns
+    -------
+    list
+        one dict per measurement with the median startup time, the overhead and whether the target is met
+    """
+    baseline = statistics.median(_run_python(['-c', 'pass']) for _ in range(repeat))
+    commands = {f'import {module}': ['-c', STARTUP_CHECK.format(module=module)]
+                for module in ('xrootd_utils', 'xrootd_async', 'xrootd_index', 'xrootd_redirectors', 'xrootd_browser',
+                               'xrootd_interactive', 'xrootd_cli')}
+    commands['xrootd_interactive.py --help'] = ['xrootd_interactive.py', '--help']
+    commands['xrootd_cli.py --help'] = ['xrootd_cli.py', '--help']
+    results = []
+    for name, command in commands.items():
+        median = statistics.median(_run_python(command) for _ in range(repeat))
+        result = {'operation': name, 'startup': median, 'overhead': median - baseline, 'target': target,
+                  'ok': median - baseline <= target}
+        results.append(result)
+        print('{0:<30} {1:>12.3f} {2:>12.3f} {3:>8}'.format(
+            name, median, median - baseline, 'OK' if result['ok'] else 'SLOW'))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmarks of xrootd_utils with a mock FileSystem')
+    parser.add_argument('-n', '--entries', help='tree sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--latency', help='latency per round trip in seconds', type=float, default=0.)
+    parser.add_argument('-w', '--workers', help='parallel requests for the parallel variants', type=int, default=8)
+    parser.add_argument('--files-per-dir', help='files per directory of the synthetic tree', type=int, default=100)
+    parser.add_argument('-o', '--operations', help='operations to run (default: all)', nargs='*', default=[])
+    parser.add_argument('--json', help='write the results to this file (e.g. to compare runs)')
+    parser.add_argument('--startup', help='measure the startup time instead', action='store_true')
+    parser.add_argument('--startup-target', help='maximum startup time above the bare interpreter in seconds',
+                        type=float, default=0.1)
+    args = vars(parser.parse_args())
+    json_out = None if args['json'] is None else os.path.abspath(args['json'])
+
+    if args['startup']:
+        print('{0:<30} {1:>12} {2:>12} {3:>8}'.format('operation', 'startup [s]', 'overhead [s]', 'target'))
+        startup_results = startup(target=args['startup_target'])
+        if json_out is not None:
+            with open(json_out, 'w') as f:
+                json.dump(startup_results, f, indent=2)
+        sys.exit(0 if all(result['ok'] for result in startup_results) else 1)
+
+    logging.getLogger().setLevel('ERROR')  # the functions log every entry on INFO
+    os.chdir(tempfile.mkdtemp())  # create_file_list writes into the working directory
+
+    print('{0:<22} {1:>9} {2:>12} {3:>12} {4:>12}'.format(
+        'operation', 'entries', 'round trips', 'wall [s]', 'peak [MiB]'))
+    bench_results = run(args['entries'], args['latency'], args['workers'], args['files_per_dir'], args['operations'])
+    if json_out is not None:
+        with open(json_out, 'w') as f:
+            json.dump(bench_results, f, indent=2)
@@ -0,0 +1,339 @@
+import logging
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from xrootd_utils import Listing, ListingEntry, _get_directory_listing, listing_cache, sessions, DirListFlags
+
+log = logging.getLogger()
+
+#################################################################
+# Paginated browser for the interactive ls/rm                   #
+# Only the entries of the current page are turned into choices, #
+# the listing of the directory stays packed in memory (see      #
+# xrootd_utils.Listing). Search (prefix or fuzzy) and sorting   #
+# (name, size, mtime) use the statinfo of the one dirlist of    #
+# the directory, no further requests are sent to the server.    #
+# While a page is shown, the listings of its subdirectories and #
+# of the parent are prefetched in the background, so that       #
+# changing the directory is answered from the listing cache.    #
+#################################################################
+
+EXIT = 'exit'
+UP = '..'
+SEARCH = '[search]'
+SORT = '[sort]'
+PREVIOUS = '<< previous page'
+NEXT = '>> next page'
+
+# menu title -> (sort key, reverse)
+SORTS = {
+    'name': ('name', False),
+    'size (largest first)': ('size', True),
+    'modtime (newest first)': ('modtime', True),
+    'modtime (oldest first)': ('modtime', False),
+}
+
+
+class Prefetcher:
+    """
+    Lists directories speculatively on background workers into the listing cache.
+    At most <budget> directories are queued at the same time, the ones which are no longer
+    wanted (e.g. the page changed) are cancelled if they did not start yet.
+    A failed prefetch is only logged (DEBUG), the directory is listed again when it is opened.
+
+    Parameters
+    ----------
+    redirector  : str
+    max_workers : int
+        dirlist requests in flight
+    budget      : int
+        maximal number of queued directories
+    """
+
+    def __init__(self, redirector: str, max_workers=2, budget=8) -> None:
+        self.redirector = redirector
+        self.budget = budget
+        self._pool = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix='prefetch')
+        self._futures: Dict[str, Future] = {}  # directory -> prefetch
+
+    def _fetch(self, directory: str) -> Optional[Listing]:
+        status, dirlist = sessions.get(self.redirector).dirlist(directory, DirListFlags.STAT)
+        if not status.ok:
+            log.debug(f'[prefetch] {directory} Status: {status.message}')
+            return None
+        listing = Listing.from_dirlist(dirlist)
+        listing_cache.put(self.redirector, directory, listing)
+        log.debug(f'[prefetch] {directory}: {len(listing)} entries')
+        return listing
+
+    def prefetch(self, directories: List[str]) -> None:
+        """
+        Prefetches <directories> (the first <budget> ones, which are not cached yet).
+        Queued prefetches of other directories are cancelled.
+
+        Parameters
+        ----------
+        directories : list
+            directory paths with a trailing "/", most wanted first
+
+        Returns
+        -------
+        None
+        """
+        for directory, future in list(self._futures.items()):
+            if future.done():  # the listing is in the cache now (or the prefetch failed and is tried again)
+                del self._futures[directory]
+        wanted: List[str] = []
+        for directory in directories:
+            if len(wanted) == self.budget:
+                break
+            if directory not in wanted and (directory in self._futures or
+                                            listing_cache.get(self.redirector, directory) is None):
+                wanted.append(directory)
+        for directory, future in list(self._futures.items()):
+            if directory not in wanted and future.cancel():
+                del self._futures[directory]
+        for directory in wanted:
+            if directory not in self._futures:
+                self._futures[directory] = self._pool.submit(self._fetch, directory)
+        return None
+
+    def get(self, directory: str) -> Listing:
+        """
+        The listing of <directory>: waits for its prefetch if it is in flight,
+        otherwise it is taken from the listing cache or listed (see _get_directory_listing).
+        """
+        future = self._futures.pop(directory, None)
+        if future is not None and not future.cancel():
+            try:
+                listing = future.result()
+            except BaseException as error:  # e.g. exit on unknown flags within the worker
+                log.debug(f'[prefetch] {directory}: {error!r}')
+                listing = None
+            if listing is not None:
+                return listing
+        return _get_directory_listing(self.redirector, directory)
+
+    def close(self) -> None:
+        """
+        Cancels the queued prefetches, running dirlists finish in the background.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
+        return None
+
+
+class Browser:
+    """
+    State of the browser: the listing of the current directory, the search, the sort order and the page.
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+    page_size  : int
+        number of entries per page
+    prefetch   : int
+        number of subdirectories (of the current page) and parent directory, which are listed
+        in the background (see Prefetcher), 0 to disable
+    """
+
+    def __init__(self, redirector: str, directory: str, page_size=50, prefetch=8) -> None:
+        self.redirector = redirector
+        self.page_size = max(page_size, 1)
+        self.sort_key, self.reverse = 'name', False
+        self._prefetcher = Prefetcher(redirector, budget=prefetch) if prefetch > 0 else None
+        self.open(directory)
+
+    def open(self, directory: str) -> None:
+        """
+        Changes to <directory> (listing from the prefetch or the listing cache if possible), the search is reset.
+        """
+        directory = directory if directory.endswith('/') else directory + '/'
+        if self._prefetcher is not None:
+            self.listing: Listing = self._prefetcher.get(directory)
+        else:
+            self.listing = _get_directory_listing(self.redirector, directory)
+        self.directory = self.listing.parent
+        self.query, self.fuzzy = '', False
+        self.page = 0
+        self._positions: Any = None
+        return None
+
+    def reload(self) -> None:
+        """
+        Lists the current directory again (e.g. after a rm), search, sort order and page are kept.
+        """
+        self.listing = _get_directory_listing(self.redirector, self.directory)
+        self._positions = None
+        self.page = min(self.page, self.n_pages - 1)
+        return None
+
+    def parent_directory(self) -> str:
+        return self.directory.rstrip('/').rsplit('/', 1)[0] + '/'
+
+    def search(self, query: str) -> None:
+        """
+        Shows only the entries starting with <query>, "~<query>" for a fuzzy search, "" shows all entries.
+        """
+        self.fuzzy = query.startswith('~')
+        self.query = query[1:] if self.fuzzy else query
+        self.page = 0
+        self._positions = None
+        return None
+
+    def sort(self, key: str, reverse=False) -> None:
+        """
+        Sorts by "name", "size" or "modtime" (directories first). Fuzzy results stay ranked by relevance.
+        """
+        self.sort_key, self.reverse = key, reverse
+        self.page = 0
+        self._positions = None
+        return None
+
+    @property
+    def positions(self) -> Any:
+        # positions of the shown entries within the listing, in the order they are shown
+        if self._positions is None:
+            if len(self.query) == 0:
+                self._positions = self.listing.order(self.sort_key, self.reverse)
+            elif self.fuzzy:
+                self._positions = self.listing.search(self.query, fuzzy=True)
+            else:
+                matches = set(self.listing.search(self.query))
+                self._positions = array('Q', (position for position in self.listing.order(self.sort_key, self.reverse)
+                                              if position in matches))
+        return self._positions
+
+    @property
+    def n_pages(self) -> int:
+        return max((len(self.positions) + self.page_size - 1) // self.page_size, 1)
+
+    def turn(self, pages: int) -> None:
+        self.page = min(max(self.page + pages, 0), self.n_pages - 1)
+        return None
+
+    def page_entries(self) -> List[ListingEntry]:
+        """
+        The entries of the current page.
+        """
+        start = self.page * self.page_size
+        return list(self.listing.take(self.positions[start:start + self.page_size]))
+
+    def prefetch(self, entries: List[ListingEntry]) -> None:
+        """
+        Lists the parent and the subdirectories within <entries> (the shown page) in the background.
+        """
+        if self._prefetcher is not None:
+            parent = self.parent_directory()
+            directories = [parent] if parent != self.directory else []
+            self._prefetcher.prefetch(directories + [entry.path for entry in entries if entry.is_dir])
+        return None
+
+    def close(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+        return None
+
+    def header(self) -> str:
+        start = self.page * self.page_size
+        stop = min(start + self.page_size, len(self.positions))
+        order = 'relevance' if self.fuzzy and len(self.query) > 0 else \
+            self.sort_key + (' (descending)' if self.reverse else '')
+        search = f', search: {"~" if self.fuzzy else ""}{self.query}' if len(self.query) > 0 else ''
+        return (f'{self.directory} ({len(self.listing.dirs)} dirs, {len(self.listing.files)} files{search}), '
+                f'sorted by {order}, page {self.page + 1}/{self.n_pages}: {min(start + 1, stop)}-{stop} of {len(self.positions)}')
+
+
+def _title(entry: ListingEntry) -> str:
+    return '{0} {1:>12} {2}'.format(entry.modtimestr, entry.size, entry.name + ('/' if entry.is_dir else ''))
+
+
+def browse(redirector: str, directory: str, on_file: Callable[[str], Any], file_label='will be stated',
+           page_size=50, prefetch=8) -> None:
+    """
+    Interactive, paginated navigation through the remote directories (questionary).
+    Selecting a directory changes into it, selecting a file calls <on_file> with its path
+    (e.g. stat or rm), afterwards the directory is listed again (from the cache, if unchanged).
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+    on_file    : callable
+        called with the full path of the selected file
+    file_label : str
+        shown above the files, e.g. "will be DELETED!!"
+    page_size  : int
+        number of entries per page
+    prefetch   : int
+        number of directories listed in the background while the page is shown (see Browser)
+
+    Returns
+    -------
+    None
+    """
+    import questionary  # only needed for the interactive mode
+
+    browser = Browser(redirector, directory, page_size, prefetch)
+    try:
+        while True:
+            choices: List[Any] = [EXIT, UP, SEARCH, SORT]
+            if browser.page > 0:
+                choices.append(PREVIOUS)
+            if browser.page + 1 < browser.n_pages:
+                choices.append(NEXT)
+            choices.append(questionary.Separator(f'------{browser.header()}------'))
+            entries = browser.page_entries()
+            dirs = [entry for entry in entries if entry.is_dir]
+            files = [entry for entry in entries if not entry.is_dir]
+            if dirs:
+                choices.append(questionary.Separator('------Directories:------'))
+                choices += [questionary.Choice(_title(entry), value=entry.path) for entry in dirs]
+            if files:
+                choices.append(questionary.Separator(f'------Files ({file_label}):------'))
+                choices += [questionary.Choice(_title(entry), value=entry.path) for entry in files]
+            browser.prefetch(entries)  # listed while the menu is read
+
+            answers = questionary.form(
+                _directory=questionary.select('Whats next?', choices=choices),
+            ).ask()
+            selected = answers.get("_directory")
+            log.info(f'{selected}')
+            if selected is None or selected == EXIT:
+                break
+            if selected == UP:
+                browser.open(browser.parent_directory())
+            elif selected == SEARCH:
+                answers1 = questionary.form(
+                    _query=questionary.text('Search (prefix, "~" for fuzzy, empty: show all):')
+                ).ask()
+                if answers1.get("_query") is not None:  # cancelled (Ctrl-C): back to the page
+                    browser.search(answers1["_query"])
+            elif selected == SORT:
+                answers1 = questionary.form(
+                    _sort=questionary.select('Sort by?', choices=list(SORTS))
+                ).ask()
+                if answers1.get("_sort") is not None:  # cancelled (Ctrl-C): back to the page
+                    browser.sort(*SORTS[answers1["_sort"]])
+            elif selected == PREVIOUS:
+                browser.turn(-1)
+            elif selected == NEXT:
+                browser.turn(1)
+            elif selected.endswith('/'):  # the type is known from the dirlist, no extra stat
+                browser.open(selected)
+            else:
+                on_file(selected)
+                browser.reload()
+    finally:
+        browser.close()
+    return None
+
+
+########################## Examples #############################
+# browse(redirector, '/store/user/<username>/', on_file=lambda path: stat(redirector, path))
+# without questionary:
+# browser = Browser(redirector, '/store/user/<username>/', page_size=100)
+# browser.search('~run2018'); browser.sort('size', reverse=True)
+# for entry in browser.page_entries(): ...
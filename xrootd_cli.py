@@ -0,0 +1,253 @@
+import argparse
+import logging
+import shlex
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import xrootd_utils
+from xrootd_metrics import metrics
+from xrootd_redirectors import RedirectorManager
+
+log = logging.getLogger()
+
+#################################################################
+# Non-interactive command line                                  #
+# One subcommand per operation, or "batch" to run a file of     #
+# operations (one per line) over one shared session with       #
+# <jobs> operations in flight. Meant for scripts and cron jobs: #
+# one Python process for hundreds of operations.                #
+#################################################################
+# Examples:
+#   $ python3 xrootd_cli.py -r root://cmsxrootd-kit.gridka.de:1094/ ls /store/user/<username>/
+#   $ python3 xrootd_cli.py -r root://cmsxrootd-kit.gridka.de:1094/ report /store/user/<username>/ --depth 3 --csv usage.csv
+#   $ python3 xrootd_cli.py -r root://cmsxrootd-kit.gridka.de:1094/ -u <username> batch ops.txt --jobs 16
+#
+# Batch file: "<operation> <arguments>" per line (shell quoting), empty lines and lines starting with "#" are skipped.
+# The lines run concurrently, "wait" waits until all previous lines are done (e.g. mkdir before copy-to):
+#   mkdir /store/user/<username>/new
+#   wait
+#   copy-to /home/<user>/a.root /store/user/<username>/new/a.root
+#   mv /store/user/<username>/old.root /store/user/<username>/new/old.root
+#   rm /store/user/<username>/tmp.root
+
+BARRIER = 'wait'
+
+_batch_line = threading.local()  # line number of the batch operation run by the current thread
+
+
+class _LineFilter(logging.Filter):
+    """
+    Prefixes the log records of a batch operation with its line number,
+    the output of concurrent operations is interleaved otherwise.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        line_number = getattr(_batch_line, 'number', None)
+        if line_number is not None:
+            record.msg = f'[line {line_number}] {record.msg}'
+        return True
+
+
+########## operations ###############
+def _operations(redirector: str, user: str, ask: bool) -> Dict[str, Tuple[int, Callable[..., Any]]]:
+    """
+    The available operations with their number of arguments.
+    rm and rmdir use the username safeguard of xrootd_utils.
+
+    Parameters
+    ----------
+    redirector : str
+    user       : str
+    ask        : bool
+        confirmation before rm/rmdir (never in batch mode)
+
+    Returns
+    -------
+    dict
+        name -> (number of arguments, function)
+    """
+    return {
+        'ls': (1, lambda path: xrootd_utils.ls(redirector, path)),
+        'stat': (1, lambda path: xrootd_utils.stat(redirector, path)),
+        'du': (1, lambda path: xrootd_utils.dir_size(redirector, path)),
+        'report': (1, lambda path: xrootd_utils.usage_report(redirector, path)),
+        'rm': (1, lambda path: xrootd_utils.del_file(redirector, path, user, ask=ask)),
+        'rmdir': (1, lambda path: xrootd_utils.del_dir(redirector, path, user, ask=ask)),
+        'mv': (2, lambda source, dest: xrootd_utils.mv(redirector, source, dest)),
+        'mkdir': (1, lambda path: xrootd_utils.mkdir(redirector, path)),
+        'copy-to': (2, lambda source, dest: xrootd_utils.copy_file_to_remote(redirector, source, dest)),
+        'copy-from': (2, lambda source, dest: xrootd_utils.copy_file_from_remote(redirector, source, dest)),
+    }
+
+
+def read_batch_file(batch_file: str) -> List[Tuple[int, List[str]]]:
+    """
+    Reads the operations of a batch file ("-" for stdin).
+
+    Parameters
+    ----------
+    batch_file : str
+
+    Returns
+    -------
+    list
+        (line number, [operation, arguments...]) for each operation
+    """
+    f = sys.stdin if batch_file == '-' else open(batch_file)
+    commands = []
+    with f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            commands.append((line_number, shlex.split(line)))
+    return commands
+
+
+def _run_one(operations: Dict[str, Tuple[int, Callable[..., Any]]], command: List[str]) -> Tuple[bool, str]:
+    # the functions of xrootd_utils assert on a failed status and exit on a failed safeguard or a missing path
+    try:
+        operations[command[0]][1](*command[1:])
+    except xrootd_utils.PermissionDenied as error:
+        return False, f'permission denied: {error}'
+    except SystemExit as error:
+        return False, str(error.code) if error.code is not None else 'exited'
+    except AssertionError as error:
+        return False, str(error) or 'failed, see log'
+    except Exception as error:  # one failed line must not abort the batch
+        return False, f'{type(error).__name__}: {error}'
+    return True, ''
+
+
+def _run_line(operations: Dict[str, Tuple[int, Callable[..., Any]]], line_number: int,
+              command: List[str]) -> Tuple[bool, str]:
+    _batch_line.number = line_number
+    try:
+        return _run_one(operations, command)
+    finally:
+        _batch_line.number = None
+
+
+def run_batch(redirector: str, user: str, commands: List[Tuple[int, List[str]]], jobs=8) -> List[Tuple[int, str, str]]:
+    """
+    Runs the <commands> of a batch file with at most <jobs> operations at the same time.
+    All operations share one FileSystem per redirector (see xrootd_utils.sessions).
+    The whole file is checked before the first operation is sent.
+    A failed operation does not stop the others, the log output of each
+    operation is prefixed with its line number.
+
+    Parameters
+    ----------
+    redirector : str
+    user       : str
+        username safeguard for rm/rmdir
+    commands   : list
+        see read_batch_file
+    jobs       : int
+        number of operations in flight
+
+    Returns
+    -------
+    list
+        (line number, line, message) for each failed operation
+    """
+    operations = _operations(redirector, user, ask=False)
+    for line_number, command in commands:
+        if command[0] == BARRIER and len(command) == 1:
+            continue
+        if command[0] not in operations:
+            raise ValueError(f'line {line_number}: unknown operation {command[0]}. Available: {list(operations)}')
+        if len(command) - 1 != operations[command[0]][0]:
+            raise ValueError(f'line {line_number}: {command[0]} needs {operations[command[0]][0]} argument(s)')
+
+    # the lines between two "wait" run concurrently
+    groups: List[List[Tuple[int, List[str]]]] = [[]]
+    for line_number, command in commands:
+        if command[0] == BARRIER:
+            groups.append([])
+        else:
+            groups[-1].append((line_number, command))
+
+    failed = []
+    line_filter = _LineFilter()
+    log.addFilter(line_filter)
+    try:
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+            for group in groups:
+                results = pool.map(lambda numbered: _run_line(operations, *numbered), group)
+                for (line_number, command), (ok, message) in zip(group, results):
+                    if not ok:
+                        log.critical(f'[FAILED] line {line_number}: {shlex.join(command)}: {message}')
+                        failed.append((line_number, shlex.join(command), message))
+    finally:
+        log.removeFilter(line_filter)
+    n_operations = sum(len(group) for group in groups)
+    log.info(f'{n_operations - len(failed)} of {n_operations} operations done, {len(failed)} failed.')
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='xrootd python bindings for dummies (non-interactive)')
+    parser.add_argument('-r', '--redirector', help='root://xrd-redirector:1094/ or "auto" (fastest healthy, with failover)',
+                        required=True)
+    parser.add_argument('-u', '--user', help='username (safeguard for rm/rmdir)', default='')
+    parser.add_argument('-l', '--loglevel', help='python loglevel={"WARNING", "INFO", "DEBUG"}', default='INFO')
+    parser.add_argument('-m', '--metrics', help='export the XRootD call metrics at exit (*.json or Prometheus textfile *.prom)')
+    subparsers = parser.add_subparsers(dest='operation', required=True)
+    for name, help_text in (('ls', 'list a file or directory'), ('stat', 'stat a file or directory'),
+                            ('du', 'size of a directory tree'), ('mkdir', 'create a directory (full tree)')):
+        subparsers.add_parser(name, help=help_text).add_argument('path')
+    for name, help_text in (('rm', 'remove a file'), ('rmdir', 'remove a directory with all its content')):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument('path')
+        subparser.add_argument('-y', '--yes', help='do not ask for confirmation', action='store_true')
+    for name, help_text in (('mv', 'move or rename (no overwrite)'),
+                            ('copy-to', 'copy a local file to remote (filename within dest!)'),
+                            ('copy-from', 'copy a remote file to local (filename within dest!)')):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument('source')
+        subparser.add_argument('dest')
+    subparser = subparsers.add_parser('report', help='usage report: size/files/age per directory, top-N largest and oldest')
+    subparser.add_argument('path')
+    subparser.add_argument('-d', '--depth', help='levels of subdirectories within the report', type=int, default=2)
+    subparser.add_argument('-n', '--top', help='length of the top lists', type=int, default=20)
+    subparser.add_argument('-j', '--jobs', help='parallel dirlist requests', type=int, default=8)
+    subparser.add_argument('--json', help='export the full report as json')
+    subparser.add_argument('--csv', help='export one row per directory as csv')
+    subparser = subparsers.add_parser('batch', help='run a file of operations ("-" for stdin), see xrootd_cli.py')
+    subparser.add_argument('batch_file')
+    subparser.add_argument('-j', '--jobs', help='number of operations in flight', type=int, default=8)
+    args = vars(parser.parse_args())
+
+    logging.basicConfig(format='%(message)s')
+    log.setLevel(args['loglevel'])
+    if args['operation'] in ('rm', 'rmdir', 'batch') and len(args['user']) == 0:
+        parser.error(f'{args["operation"]} needs --user (safeguard: the username has to be within the paths)')
+    if args['redirector'] == 'auto':
+        args['redirector'] = RedirectorManager().activate()
+
+    if args['operation'] == 'batch':
+        try:
+            failed = run_batch(args['redirector'], args['user'], read_batch_file(args['batch_file']), args['jobs'])
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        operations = _operations(args['redirector'], args['user'], ask=not args.get('yes', False))
+        if args['operation'] == 'report':
+            operations['report'] = (1, lambda path: xrootd_utils.usage_report(
+                args['redirector'], path, args['depth'], args['top'], args['jobs'], args['json'], args['csv']))
+        arguments = [args['path']] if 'path' in args else [args['source'], args['dest']]
+        ok, message = _run_one(operations, [args['operation']] + arguments)
+        failed = [] if ok else [(0, args['operation'], message)]
+        if not ok:
+            log.critical(f'[FAILED] {args["operation"]}: {message}')
+
+    if args['metrics'] is not None:
+        metrics.export(args['metrics'])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
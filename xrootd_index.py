@@ -0,0 +1,443 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+from xrootd_utils import walk
+
+log = logging.getLogger()
+
+#################################################################
+# Local namespace index                                         #
+# The remote tree below a base path is crawled once (see walk)  #
+# and stored in a SQLite file. ls, dir size, create file list   #
+# and search can then be answered locally without asking the    #
+# storage again. Refresh the index to see remote changes.       #
+#################################################################
+# Paths are stored like the paths of a Listing of xrootd_utils:
+# directories end with a "/", files do not.
+# Changes made through this tool (rm, mv, mkdir, copy to) mark the
+# deepest indexed directory above the changed path as stale (see
+# mark_stale), it is not answered from the index until refreshed.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path   TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    flags  INTEGER NOT NULL,
+    mtime  INTEGER NOT NULL,
+    is_dir INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stale (
+    path TEXT PRIMARY KEY
+);
+"""
+
+
+########## helper functions ###############
+def _connect(db_path: str) -> sqlite3.Connection:
+    """
+    Opens the index <db_path> and creates the tables if necessary.
+
+    Parameters
+    ----------
+    db_path : str
+
+    Returns
+    -------
+    sqlite3.Connection
+    """
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _as_dir(directory: str) -> str:
+    return directory if directory.endswith('/') else directory + '/'
+
+
+def _subtree(directory: str) -> Tuple[str, str]:
+    """
+    Returns the bounds of a range query for all paths below <directory>.
+    Since "0" directly follows "/", all paths starting with "<directory>/" are
+    within [<directory>/, <directory>0). This way the primary key index is used.
+    Note: the lower bound is the path of <directory> itself.
+
+    Parameters
+    ----------
+    directory : str
+
+    Returns
+    -------
+    (str, str)
+        lower and upper bound
+    """
+    prefix = _as_dir(directory)
+    return prefix, prefix[:-1] + '0'
+
+
+def _get_meta(connection: sqlite3.Connection) -> dict:
+    return dict(connection.execute('SELECT key, value FROM meta'))
+
+
+def _crawl(connection: sqlite3.Connection, redirector: str, directory: str, prefetch=8) -> int:
+    """
+    Crawls <directory> with walk and inserts all entries into the index.
+    The statinfo of the dirlist is used, therefore no additional stats are necessary.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+    redirector : str
+    directory  : str
+    prefetch   : int
+
+    Returns
+    -------
+    int
+        number of indexed entries
+    """
+    n_entries = 0
+    for current, dirs, files in walk(redirector, directory, prefetch):
+        rows = [(current + name + '/', current, name, statinfo.size, statinfo.flags, statinfo.modtime, 1)
+                for name, statinfo in dirs]
+        rows += [(current + name, current, name, statinfo.size, statinfo.flags, statinfo.modtime, 0)
+                 for name, statinfo in files]
+        connection.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        n_entries += len(rows)
+        log.debug(f'[index] {current}: {len(rows)} entries')
+    return n_entries
+
+
+def _age(meta: dict) -> str:
+    built = int(meta.get('built', 0))
+    return (f'index from {time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(built))} UTC, '
+            f'{(time.time() - built) / 3600:.1f}h old')
+
+
+def _is_dir_row(connection: sqlite3.Connection, directory: str) -> bool:
+    return connection.execute('SELECT 1 FROM entries WHERE path = ? AND is_dir = 1', (directory,)).fetchone() is not None
+
+
+def _check_indexed(connection: sqlite3.Connection, meta: dict, directory: str) -> None:
+    """
+    Asserts that <directory> is an indexed directory (an empty answer would look like an empty directory).
+    """
+    directory = _as_dir(directory)
+    indexed = directory == meta.get('basepath') or _is_dir_row(connection, directory)
+    if not indexed:
+        log.critical(f'{directory} is not within the index. Check the path or refresh the index.')
+    assert indexed  # directory not indexed
+
+
+def covers(db_path: str, redirector: str, path: str) -> bool:
+    """
+    Checks if <path> of <redirector> can be answered from the index <db_path>:
+    the index was built with the same redirector, <path> is an indexed directory within
+    its base path and no stale directory (see mark_stale) is above or below <path>.
+
+    Parameters
+    ----------
+    db_path    : str
+    redirector : str
+    path       : str
+
+    Returns
+    -------
+    bool
+    """
+    if not os.path.exists(db_path):  # do not create an empty index
+        return False
+    path = _as_dir(path)
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    stale = [row[0] for row in connection.execute('SELECT path FROM stale')]
+    indexed = path == meta.get('basepath') or _is_dir_row(connection, path)  # not a file or an unknown path
+    connection.close()
+    if meta.get('redirector') != redirector or 'basepath' not in meta or not path.startswith(meta['basepath']):
+        return False
+    if not indexed:
+        return False
+    for directory in stale:
+        if path.startswith(directory) or directory.startswith(path):
+            log.debug(f'[index] {path}: {directory} was changed in this session, the index is not used.')
+            return False
+    return True
+
+
+def mark_stale(db_path: str, redirector: str, paths: List[str]) -> None:
+    """
+    Marks the deepest indexed directory above each of <paths> as stale after the paths were changed
+    (rm, mv, mkdir, copy). Paths of other redirectors or outside the index are ignored.
+
+    Parameters
+    ----------
+    db_path    : str
+    redirector : str
+    paths      : list
+
+    Returns
+    -------
+    None
+    """
+    if not os.path.exists(db_path):
+        return None
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    if meta.get('redirector') != redirector or 'basepath' not in meta:
+        connection.close()
+        return None
+    stale = set()
+    for directory in {path.rstrip('/').rsplit('/', 1)[0] + '/' for path in paths}:
+        if not directory.startswith(meta['basepath']):
+            continue
+        # e.g. mkdir -p: the parent directories may be new as well
+        while directory != meta['basepath'] and not _is_dir_row(connection, directory):
+            directory = directory.rstrip('/').rsplit('/', 1)[0] + '/'
+        stale.add(directory)
+    with connection:
+        connection.executemany('INSERT OR IGNORE INTO stale VALUES (?)', [(directory,) for directory in stale])
+    connection.close()
+    log.debug(f'[index] marked as stale: {sorted(stale)}')
+    return None
+
+
+###########################################
+
+
+def build_index(redirector: str, basepath: str, db_path: str, prefetch=8) -> None:
+    """
+    Crawls <basepath> once and writes all entries (path, size, flags, mtime) into the index <db_path>.
+    An existing index in <db_path> is replaced.
+
+    Parameters
+    ----------
+    redirector : str
+    basepath   : str
+    db_path    : str
+    prefetch   : int
+        number of directory listings requested in advance (see walk)
+
+    Returns
+    -------
+    None
+    """
+    basepath = _as_dir(basepath)
+    start = time.monotonic()
+    connection = _connect(db_path)
+    with connection:  # one transaction: the old index stays valid if the crawl fails
+        connection.execute('DELETE FROM entries')
+        connection.execute('DELETE FROM meta')
+        connection.execute('DELETE FROM stale')
+        n_entries = _crawl(connection, redirector, basepath, prefetch)
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('redirector', redirector),
+            ('basepath', basepath),
+            ('built', str(int(time.time()))),
+        ])
+    connection.close()
+    log.info(f'Index {db_path} built: {n_entries} entries below {basepath} ({time.monotonic() - start:.1f}s).')
+    return None
+
+
+def refresh_index(db_path: str, directory: Optional[str] = None, prefetch=8) -> None:
+    """
+    Re-crawls <directory> (default: the whole base path) and replaces its entries in the index.
+
+    Parameters
+    ----------
+    db_path   : str
+    directory : str
+        has to be within the base path of the index
+    prefetch  : int
+
+    Returns
+    -------
+    None
+    """
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    if 'basepath' not in meta:
+        log.critical(f'{db_path} is not a valid index. Please build it first.')
+        connection.close()
+        return None
+    directory = meta['basepath'] if directory is None else _as_dir(directory)
+    if not directory.startswith(meta['basepath']):
+        log.critical(f'{directory} is not within the base path of the index ({meta["basepath"]}).')
+        connection.close()
+        return None
+
+    with connection:
+        lower, upper = _subtree(directory)
+        # the row of <directory> itself (within the listing of its parent) is kept, the walk only yields its content
+        connection.execute('DELETE FROM entries WHERE path > ? AND path < ?', (lower, upper))
+        n_entries = _crawl(connection, meta['redirector'], directory, prefetch)
+        connection.execute('DELETE FROM stale WHERE path >= ? AND path < ?', (lower, upper))
+        if directory == meta['basepath']:
+            connection.execute("UPDATE meta SET value = ? WHERE key = 'built'", (str(int(time.time())),))
+    connection.close()
+    log.info(f'Index {db_path} refreshed: {n_entries} entries below {directory}.')
+    return None
+
+
+def index_ls(db_path: str, directory: str) -> None:
+    """
+    ls from the index (same output as xrootd_utils.ls for a directory).
+
+    Parameters
+    ----------
+    db_path   : str
+    directory : str
+
+    Returns
+    -------
+    None
+    """
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    try:
+        _check_indexed(connection, meta, directory)
+        rows = connection.execute(
+            'SELECT name, size, mtime, is_dir FROM entries WHERE parent = ? ORDER BY is_dir, name', (_as_dir(directory),)
+        ).fetchall()
+    finally:
+        connection.close()
+
+    log.info(f'{_as_dir(directory)}, N: {len(rows)} ({_age(meta)})')
+    for name, size, mtime, is_dir in rows:
+        log.info('{0} {1:>10} {2} {3}'.format(
+            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(mtime)), size, name, '(dir)' if is_dir else '(file)')
+        )
+    return None
+
+
+def index_dir_size(db_path: str, directory: str, show_output=True) -> int:
+    """
+    dir_size from the index.
+
+    Parameters
+    ----------
+    db_path     : str
+    directory   : str
+    show_output : bool
+
+    Returns
+    -------
+    int
+        directory size in Byte
+    """
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    try:
+        _check_indexed(connection, meta, directory)
+        lower, upper = _subtree(directory)
+        dirsize, n_files = connection.execute(
+            'SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries WHERE path >= ? AND path < ? AND is_dir = 0',
+            (lower, upper)
+        ).fetchone()
+    finally:
+        connection.close()
+    GiB = dirsize / (1 << 30)
+    log.debug(f'[index dir size] {directory}: files: {n_files}, GiB: {GiB}')
+    if show_output:
+        log.info(f'Byte: {dirsize} (GiB: {GiB}G) ({_age(meta)})')
+    return dirsize
+
+
+def index_create_file_list(db_path: str, directory: str, exclude: str) -> None:
+    """
+    create_file_list from the index (same output file as xrootd_utils.create_file_list).
+
+    Parameters
+    ----------
+    db_path   : str
+    directory : str
+    exclude   : str
+        file type ending to be excluded
+
+    Returns
+    -------
+    None
+    """
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    try:
+        _check_indexed(connection, meta, directory)
+        rows = connection.execute(
+            'SELECT path, is_dir FROM entries WHERE parent = ? ORDER BY path', (_as_dir(directory),)
+        ).fetchall()
+    finally:
+        connection.close()
+
+    dir_str = directory.replace('/', '_')
+    output_name = f'list{dir_str}.txt'
+    warn = False
+    with open(output_name, 'w') as filelist:
+        for entry, is_dir in rows:
+            if len(exclude) > 0 and exclude in entry:
+                log.debug(f'[index create file list] {entry} excluded.')
+                continue
+            if is_dir:
+                warn = True
+            filelist.write(entry + '\n')
+    if warn:
+        log.warning('+++ Warning +++ There are directories listed in your filelist')
+    log.info(f'{output_name} created ({_age(meta)}).')
+    return None
+
+
+def index_search(db_path: str, pattern: str, directory: Optional[str] = None, show_output=True) -> List[str]:
+    """
+    Searches the index for entries whose name matches the glob <pattern> (e.g. "*.root", "nano_*").
+    Note: The SQLite GLOB is case sensitive.
+
+    Parameters
+    ----------
+    db_path     : str
+    pattern     : str
+    directory   : str
+        only search below this directory
+    show_output : bool
+
+    Returns
+    -------
+    list
+        matching paths
+    """
+    connection = _connect(db_path)
+    meta = _get_meta(connection)
+    if directory is None:
+        rows = connection.execute('SELECT path, size FROM entries WHERE name GLOB ? ORDER BY path', (pattern,))
+    else:
+        lower, upper = _subtree(directory)
+        rows = connection.execute(
+            'SELECT path, size FROM entries WHERE path >= ? AND path < ? AND name GLOB ? ORDER BY path',
+            (lower, upper, pattern)
+        )
+    matches = []
+    for path, size in rows:
+        matches.append(path)
+        if show_output:
+            log.info('{0:>12} {1}'.format(size, path))
+    connection.close()
+    log.info(f'{len(matches)} entries found ({_age(meta)}).')
+    return matches
+
+
+########################## Examples #############################
+# build_index(redirector, '/store/user/<username>/', 'xrd_index.sqlite')
+# refresh_index('xrd_index.sqlite')  # or only a subdirectory: refresh_index('xrd_index.sqlite', full_path_to_dir)
+# index_ls('xrd_index.sqlite', full_path_to_dir)
+# index_dir_size('xrd_index.sqlite', full_path_to_dir)
+# index_create_file_list('xrd_index.sqlite', full_path_to_dir, exclude='.log')
+# index_search('xrd_index.sqlite', '*.root', full_path_to_dir)
+# if covers('xrd_index.sqlite', redirector, full_path_to_dir): index_dir_size('xrd_index.sqlite', full_path_to_dir)
+# mark_stale('xrd_index.sqlite', redirector, [full_path_to_file])  # after changing the remote tree
@@ -1,335 +1,579 @@
 import argparse
+import atexit
 import logging
 
-import questionary
-
-from xrootd_utils import _check_file_or_directory  # , _check_redirector
-from xrootd_utils import (stat, stat_dir, ls, interactive_ls,
+# from xrootd_utils import _check_redirector
+from xrootd_utils import (stat, stat_dir, ls,
                           copy_file_to_remote, copy_file_from_remote, del_file, del_dir, mv, mkdir,
-                          dir_size, create_file_list)
-
-parser = argparse.ArgumentParser(
-    description='xrootd python bindings for dummies')
-parser.add_argument('-r', '--redirector', help='root://xrd-redirector:1094/')
-parser.add_argument('-u', '--user', help='username', required=True)
-parser.add_argument('-b', '--basepath', help='default: /store/user/', default='/store/user/')
-parser.add_argument('-l', '--loglevel', help='python loglevel={"WARNING", "INFO", "DEBUG"}', default='INFO')
-args = vars(parser.parse_args())
-
-##################################################
-basepath: str
-redirector: str
-user: str
-##################################################
-
-# set logging
-FORMAT = '%(message)s'
-logging.basicConfig(format=FORMAT)
-log = logging.getLogger()
-
-if args["loglevel"] is not None:
-    log.setLevel(args["loglevel"])
-
-# set user
-user = args["user"]
-###################################################
-
-############################################
-# first, select a redirector and base path #
-############################################
-if args["redirector"] is not None:
-    # set and check redirector
-    redirector = args["redirector"]
-    # _check_redirector(redirector)  # not supported from dcache door
-else:
-    answers0 = questionary.form(
-        _redirector=questionary.select('Please select a redirector:',
-                                       choices=[
-                                           'root://cmsxrootd-kit.gridka.de:1094/, (RW) [default]',
-                                           'root://cmsxrootd-redirectors.gridka.de:1094/, (RO) [not recommended]',
-                                           'other'
-                                       ])
-    ).ask()
-    if answers0["_redirector"] == 'other':
-        redirector = str(input('Which redirector you want to use?'))
-        if len(redirector) == 0:
-            exit('No redirector specified! Please try again.')
+                          dir_size, dir_size_incremental, create_file_list, read_copy_list, copy_files_to_remote, copy_files_from_remote,
+                          copy_dir_to_remote, copy_dir_from_remote, verify_checksums, checksums_from_local,
+                          read_checksum_manifest, sync_to_remote, sync_from_remote, download_chunked,
+                          bulk_mv, mv_pairs_from_pattern, usage_report)
+from xrootd_metrics import metrics
+from xrootd_index import (covers, mark_stale, build_index, refresh_index, index_ls, index_dir_size,
+                          index_create_file_list, index_search)
+from xrootd_redirectors import RedirectorManager
+from xrootd_browser import browse
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='xrootd python bindings for dummies')
+    parser.add_argument('-r', '--redirector', help='root://xrd-redirector:1094/ or "auto" (fastest healthy, with failover)')
+    parser.add_argument('-u', '--user', help='username', required=True)
+    parser.add_argument('-b', '--basepath', help='default: /store/user/', default='/store/user/')
+    parser.add_argument('-l', '--loglevel', help='python loglevel={"WARNING", "INFO", "DEBUG"}', default='INFO')
+    parser.add_argument('-m', '--metrics', help='export the XRootD call metrics at exit (*.json or Prometheus textfile *.prom)')
+    parser.add_argument('-i', '--index', help='local SQLite namespace index (see "build index"), default: xrd_index.sqlite',
+                        default='xrd_index.sqlite')
+    parser.add_argument('--use-index', help='answer ls, dir size and create file list from the index (see "use index")',
+                        action='store_true')
+    args = vars(parser.parse_args())
+
+    import questionary  # imported after the argument parsing: --help and usage errors stay fast
+
+    ##################################################
+    basepath: str
+    redirector: str
+    user: str
+    index_db: str
+    use_index: bool
+    ##################################################
+
+    # set logging
+    FORMAT = '%(message)s'
+    logging.basicConfig(format=FORMAT)
+    log = logging.getLogger()
+
+    if args["loglevel"] is not None:
+        log.setLevel(args["loglevel"])
+
+    def report_metrics() -> None:
+        # latency and calls per operation of this session, also after Ctrl-C, a cancelled prompt or an exception
+        metrics.summary()
+        if args["metrics"] is not None:
+            metrics.export(args["metrics"])
+    atexit.register(report_metrics)
+
+    # set user
+    user = args["user"]
+
+    # if enabled, ls, dir size and create file list are answered from the index for paths within its base path
+    index_db = args["index"]
+    use_index = args["use_index"]
+
+    def changed(*paths: str) -> None:
+        # the index is not used for the directories changed in this session (until refreshed)
+        mark_stale(index_db, redirector, list(paths))
+    ###################################################
+
+    ############################################
+    # first, select a redirector and base path #
+    ############################################
+    if args["redirector"] is not None:
+        # set and check redirector
+        redirector = args["redirector"]
+        # _check_redirector(redirector)  # not supported from dcache door
     else:
-        redirector = answers0["_redirector"].split(',')[0]  # take redirector from choices
-
-log.info(f'Redirector selected: {redirector}')
-
-# set and check base path
-basepath = args["basepath"]
-log.info(f'Selected base path: {basepath}')
-if len(basepath) > 0 and (basepath[0] != '/' or basepath[-1] != '/'):
-    exit('The base path has to begin and end with a "/"!')
-
-log.info(f'Current base path: {basepath}')
-log.debug(f'All inputs: {user}, {basepath}, {redirector}, {args["loglevel"]}')
-#####################
-# Start questionary #
-#####################
-while True:
-    answers = questionary.form(
-        _function=questionary.select('What do you want to do?',
-                                     choices=[
-                                         'exit',
-                                         'ls',
-                                         'interactive ls',
-                                         'stat',
-                                         'stat directory',
-                                         'dir size',
-                                         'rm file',
-                                         'interactive file rm',
-                                         'rm dir',
-                                         'mv',
-                                         'mkdir',
-                                         'copy file to',
-                                         'copy file from',
-                                         'create file list',
-                                         'change base path',
-                                         'change redirector',
-                                         'help',
-                                     ])
-    ).ask()
-
-    ########## exit ##########
-    if answers["_function"] == 'exit':
-        exit(0)
-
-    ########## ls ##########
-    if answers["_function"] == 'ls':
-        answers1 = questionary.form(
-            _directory=questionary.text(f'Which directory? \n>{basepath}')
+        answers0 = questionary.form(
+            _redirector=questionary.select('Please select a redirector:',
+                                           choices=[
+                                               'root://cmsxrootd-kit.gridka.de:1094/, (RW) [default]',
+                                               'root://cmsxrootd-redirectors.gridka.de:1094/, (RO) [not recommended]',
+                                               'auto, (fastest healthy redirector, failover on timeouts)',
+                                               'other'
+                                           ])
         ).ask()
-        ls(redirector, basepath + answers1["_directory"])
+        if answers0["_redirector"] == 'other':
+            redirector = str(input('Which redirector you want to use?'))
+            if len(redirector) == 0:
+                exit('No redirector specified! Please try again.')
+        else:
+            redirector = answers0["_redirector"].split(',')[0]  # take redirector from choices
+    if redirector == 'auto':
+        # probe with a stat (ping is not supported from dcache door)
+        redirector = RedirectorManager(probe_path=args["basepath"]).activate()
 
-    ########## interactive ls ##########
-    if answers["_function"] == 'interactive ls':
-        answers1 = questionary.form(
-            _directory=questionary.text(f'Which directory? \n>{basepath}')
+    log.info(f'Redirector selected: {redirector}')
+
+    # set and check base path
+    basepath = args["basepath"]
+    log.info(f'Selected base path: {basepath}')
+    if len(basepath) > 0 and (basepath[0] != '/' or basepath[-1] != '/'):
+        exit('The base path has to begin and end with a "/"!')
+
+    log.info(f'Current base path: {basepath}')
+    log.debug(f'All inputs: {user}, {basepath}, {redirector}, {args["loglevel"]}')
+    #####################
+    # Start questionary #
+    #####################
+    while True:
+        answers = questionary.form(
+            _function=questionary.select('What do you want to do?',
+                                         choices=[
+                                             'exit',
+                                             'ls',
+                                             'interactive ls',
+                                             'stat',
+                                             'stat directory',
+                                             'dir size',
+                                             'dir size (incremental)',
+                                             'usage report',
+                                             'rm file',
+                                             'interactive file rm',
+                                             'rm dir',
+                                             'mv',
+                                             'bulk mv',
+                                             'mkdir',
+                                             'copy file to',
+                                             'copy file from',
+                                             'batch copy to',
+                                             'batch copy from',
+                                             'sync to',
+                                             'sync from',
+                                             'verify checksums',
+                                             'create file list',
+                                             'build index',
+                                             'refresh index',
+                                             'search index',
+                                             'use index',
+                                             'change base path',
+                                             'change redirector',
+                                             'help',
+                                         ])
         ).ask()
-        dirs, files = interactive_ls(redirector, basepath + answers1["_directory"])
-        current_dir = basepath + answers1["_directory"]
-        choices = ['exit'] + ['..'] + ['------Directories:------'] + dirs + [
-            '------Files (will be stated):------'] + files
-        stop = False
-        while not stop:
-            answers2 = questionary.form(
-                _directory=questionary.select('Whats next?', choices=choices),
+
+        ########## exit ##########
+        if not answers or answers["_function"] in (None, 'exit'):  # empty: cancelled with Ctrl-C
+            exit(0)  # the metrics are reported at exit (see report_metrics)
+
+        ########## ls ##########
+        if answers["_function"] == 'ls':
+            answers1 = questionary.form(
+                _directory=questionary.text(f'Which directory? \n>{basepath}')
             ).ask()
-            log.info(f'{answers2["_directory"]}')
-            if '------' in answers2["_directory"]:
-                continue
-            if answers2["_directory"] == 'exit':
-                break
-            if answers2["_directory"] != '..':
-                current_dir = answers2["_directory"]
-            if answers2["_directory"] == '..':
-                dirs, files = interactive_ls(redirector, '/'.join(current_dir.split('/')[:-2]))
-                choices = ['exit'] + ['..'] + ['------Directories:------'] + dirs + [
-                    '------Files (will be stated):------'] + files
-                current_dir = '/'.join(current_dir.split('/')[:-2])
-                continue
-            if _check_file_or_directory(redirector, answers2["_directory"]) == 'dir':
-                dirs, files = interactive_ls(redirector, answers2["_directory"])
-                choices = ['exit'] + ['..'] + ['------Directories:------'] + dirs + [
-                    '------Files (will be stated):------'] + files
+            if use_index and covers(index_db, redirector, basepath + answers1["_directory"]):
+                index_ls(index_db, basepath + answers1["_directory"])
             else:
-                stat(redirector, answers2["_directory"])
+                ls(redirector, basepath + answers1["_directory"])
 
-    ########## stat ##########
-    if answers["_function"] == 'stat':
-        answers1 = questionary.form(
-            _directory=questionary.text(f'Which file or directory do you want to stat? \
-            \n  Note: To stat the directories content, please use "stat dir". \n >{basepath}')
-        ).ask()
-        stat(redirector, basepath + answers1["_directory"])
+        ########## interactive ls ##########
+        if answers["_function"] == 'interactive ls':
+            answers1 = questionary.form(
+                _directory=questionary.text(f'Which directory? \n>{basepath}')
+            ).ask()
+            browse(redirector, basepath + answers1["_directory"], on_file=lambda path: stat(redirector, path),
+                   file_label='will be stated')
 
-    ########## stat directory ##########
-    if answers["_function"] == 'stat directory':
-        answers1 = questionary.form(
-            _directory=questionary.text(f'Which directory do you want to stat? \n >{basepath}')
-        ).ask()
-        stat_dir(redirector, basepath + answers1["_directory"], True, False)
+        ########## stat ##########
+        if answers["_function"] == 'stat':
+            answers1 = questionary.form(
+                _directory=questionary.text(f'Which file or directory do you want to stat? \
+                \n  Note: To stat the directories content, please use "stat dir". \n >{basepath}')
+            ).ask()
+            stat(redirector, basepath + answers1["_directory"])
 
-    ########## rm file ##########
-    if answers["_function"] == 'rm file':
-        answers1 = questionary.form(
-            _filepath=questionary.text(f'Which file do you want to delete? \n >{basepath}')
-        ).ask()
-        del_file(redirector, basepath + answers1["_filepath"], user, ask=True)
+        ########## stat directory ##########
+        if answers["_function"] == 'stat directory':
+            answers1 = questionary.form(
+                _directory=questionary.text(f'Which directory do you want to stat? \n >{basepath}')
+            ).ask()
+            stat_dir(redirector, basepath + answers1["_directory"], True, False)
 
-    ########## interactive file rm ##########
-    if answers["_function"] == 'interactive file rm':
-        answers1 = questionary.form(
-            _directory=questionary.text(f'In which directory you want to delete a file? \n>{basepath}')
-        ).ask()
-        dirs, files = interactive_ls(redirector, basepath + answers1["_directory"])
-        current_dir = basepath + answers1["_directory"]
-        choices = ['exit'] + ['..'] + ['------Directories:------'] + dirs + [
-            '------Files (will be DELETED!!):------'] + files
-        stop = False
-        while not stop:
-            answers2 = questionary.form(
-                _directory=questionary.select('Which file should be DELETED next?', choices=choices),
+        ########## rm file ##########
+        if answers["_function"] == 'rm file':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which file do you want to delete? \n >{basepath}')
+            ).ask()
+            del_file(redirector, basepath + answers1["_filepath"], user, ask=True)
+            changed(basepath + answers1["_filepath"])
+
+        ########## interactive file rm ##########
+        if answers["_function"] == 'interactive file rm':
+            answers1 = questionary.form(
+                _directory=questionary.text(f'In which directory you want to delete a file? \n>{basepath}')
+            ).ask()
+            # Note: the selected path is the file in this case!
+            def rm_file(path: str) -> None:
+                del_file(redirector, path, user, True)
+                changed(path)
+
+            browse(redirector, basepath + answers1["_directory"], on_file=rm_file, file_label='will be DELETED!!')
+
+        ########## rm dir ##########
+        if answers["_function"] == 'rm dir':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory do you want to delete? \n >{basepath}')
+            ).ask()
+            del_dir(redirector, basepath + answers1["_filepath"], user, ask=True)
+            changed(basepath + answers1["_filepath"])
+
+        ########## mv ##########
+        if answers["_function"] == "mv":
+            answers1 = questionary.form(
+                _source=questionary.text(f'Which file do you want to move? \
+                    \n  Note: no relative paths! No overwrite! Destination has to be given explicit. \nSource: >{basepath}'
+                                         ),
+                _dest=questionary.text(f'\nDestination: >{basepath}'),
             ).ask()
-            log.info(f'{answers2["_directory"]}')
-            if '------' in answers2["_directory"]:
-                continue
-            if answers2["_directory"] == 'exit':
-                break
-            if answers2["_directory"] != '..':
-                current_dir = answers2["_directory"]
-            if answers2["_directory"] == '..':
-                dirs, files = interactive_ls(redirector, '/'.join(current_dir.split('/')[:-2]))
-                choices = ['exit'] + ['..'] + ['------Directories:------'] + dirs + [
-                    '------Files (will be DELETED!!):------'] + files
-                current_dir = '/'.join(current_dir.split('/')[:-2])
-                continue
-            if _check_file_or_directory(redirector, answers2["_directory"]) == 'dir':
-                dirs, files = interactive_ls(redirector, answers2["_directory"])
-                choices = ['exit'] + ['..'] + ['------Directories:------'] + dirs + [
-                    '------Files (will be DELETED!!):------'] + files
+            log.info(f'{answers1["_source"]} will be moved/renamed to {answers1["_dest"]}')
+            mv(redirector, basepath + answers1["_source"], basepath + answers1["_dest"])
+            changed(basepath + answers1["_source"], basepath + answers1["_dest"])
+
+        ########## bulk mv ##########
+        if answers["_function"] == "bulk mv":
+            answers1 = questionary.form(
+                _mode=questionary.select('Which moves?',
+                                         choices=['mapping file with "<source> <dest>" per line',
+                                                  'pattern rule (regular expression) within a directory'])
+            ).ask()
+            if answers1["_mode"].startswith('mapping file'):
+                answers2 = questionary.form(
+                    _list=questionary.text('Which mapping file? (paths are complete: /store/user/xyz/file.name) \n>'),
+                ).ask()
+                pairs = read_copy_list(answers2["_list"])
             else:
-                # Note: answers2["_directory"] is the file in this case!
-                del_file(redirector, answers2["_directory"], user, True)
-                choices.remove(answers2["_directory"])
-
-    ########## rm dir ##########
-    if answers["_function"] == 'rm dir':
-        answers1 = questionary.form(
-            _filepath=questionary.text(f'Which directory do you want to delete? \n >{basepath}')
-        ).ask()
-        del_dir(redirector, basepath + answers1["_filepath"], user, ask=True)
-
-    ########## mv ##########
-    if answers["_function"] == "mv":
-        answers1 = questionary.form(
-            _source=questionary.text(f'Which file do you want to move? \
-                \n  Note: no relative paths! No overwrite! Destination has to be given explicit. \nSource: >{basepath}'
-                                     ),
-            _dest=questionary.text(f'\nDestination: >{basepath}'),
-        ).ask()
-        log.info(f'{answers1["_source"]} will be moved/renamed to {answers1["_dest"]}')
-        mv(redirector, basepath + answers1["_source"], basepath + answers1["_dest"])
-
-    ########## mkdir ##########
-    if answers["_function"] == 'mkdir':
-        answers1 = questionary.form(
-            _filepath=questionary.text(
-                f'Which directory do you want to create? (Full tree will be created!) \n >{basepath}'
-            )
-        ).ask()
-        mkdir(redirector, basepath + answers1["_filepath"])
-
-    ########## copy file to ##########
-    if answers["_function"] == "copy file to":
-        answers1 = questionary.form(
-            _source=questionary.text(
-                f'Which file do you want to copy to remote? Note: Complete path necessary! \nSource: >'
-            ),
-            _dest=questionary.text(f'Destination? Note: the path has to end with the desired filename! (/store/user/xyz/file.name) \
-                    \n>{basepath}'
-                                   )
-        ).ask()
-        log.info(f'{answers1["_source"]} will be copied to {basepath}{answers1["_dest"]}')
-        copy_file_to_remote(redirector, answers1["_source"], basepath + answers1["_dest"])
-
-    ########## copy file from ##########
-    if answers["_function"] == "copy file from":
-        answers1 = questionary.form(
-            _source=questionary.text(f'Which file do you want to copy from remote? \
-                     \nSource: >{basepath}'
-                                     ),
-            _dest=questionary.text(
-                f'Destination? Note: the path has to end with the desired filename! (/home/user/dir/<filename.txt>) \n>'
-            )
-        ).ask()
-        log.info(f'{answers1["_source"]} will be copied to {basepath}{answers1["_dest"]}')
-        copy_file_from_remote(redirector, basepath + answers1["_source"], answers1["_dest"])
+                answers2 = questionary.form(
+                    _directory=questionary.text(f'Which directory? \n>{basepath}'),
+                    _pattern=questionary.text('Pattern (relative path, e.g. ^(run\\d+)_(.*)$)? \n>'),
+                    _replacement=questionary.text('Replacement (e.g. \\1/\\1_\\2)? \n>'),
+                    _recursive=questionary.confirm('Include all subdirectories?', default=False),
+                ).ask()
+                pairs = mv_pairs_from_pattern(redirector, basepath + answers2["_directory"], answers2["_pattern"],
+                                              answers2["_replacement"], answers2["_recursive"])
+            bulk_mv(redirector, pairs, dry_run=True)
+            answers3 = questionary.form(
+                _confirm=questionary.confirm(f'Move {len(pairs)} entries?', default=False),
+                _report=questionary.text('Write the failed moves into (empty: none) \n>', default='failed_moves.txt'),
+            ).ask()
+            if answers3["_confirm"]:
+                bulk_mv(redirector, pairs, report_file=answers3["_report"] or None)
+                changed(*[path for pair in pairs for path in pair])
 
-    ########## dir size ##########
-    if answers["_function"] == 'dir size':
-        answers1 = questionary.form(
-            _filepath=questionary.text(f'Which directory? \n >{basepath}'
-                                       )
-        ).ask()
-        dir_size(redirector, basepath + answers1["_filepath"], True)
+        ########## mkdir ##########
+        if answers["_function"] == 'mkdir':
+            answers1 = questionary.form(
+                _filepath=questionary.text(
+                    f'Which directory do you want to create? (Full tree will be created!) \n >{basepath}'
+                )
+            ).ask()
+            mkdir(redirector, basepath + answers1["_filepath"])
+            changed(basepath + answers1["_filepath"])
 
-    ########## create file list ##########
-    if answers["_function"] == 'create file list':
-        answers1 = questionary.form(
-            _filepath=questionary.text(f'Which directory? \n >{basepath}'
+        ########## copy file to ##########
+        if answers["_function"] == "copy file to":
+            answers1 = questionary.form(
+                _source=questionary.text(
+                    f'Which file do you want to copy to remote? Note: Complete path necessary! \nSource: >'
+                ),
+                _dest=questionary.text(f'Destination? Note: the path has to end with the desired filename! (/store/user/xyz/file.name) \
+                        \n>{basepath}'
                                        )
-        ).ask()
-        answers2 = questionary.form(
-            exclude=questionary.text(f'Do you want to exclude fils (e.g. ".log") [Enter to continue]? \n >')
-        ).ask()
-        create_file_list(redirector, basepath + answers1["_filepath"], answers2["exclude"])
-
-    ########## change base path ##########
-    if answers["_function"] == 'change base path':
-        basepath = str(input('Which basepath you want to use (default: /store/user/)?'))
-        log.info(f'Selected base path: {basepath}')
-        if basepath[0] != '/' or basepath[-1] != '/':
-            exit('The base path has to begin and end with a "/"!')
-        log.debug(f'[DEBUG] {redirector}, {basepath}')
-        stat_dir(redirector, basepath, False, False)  # check, if dir exists
-        log.info(f'Base path set to {basepath}')
-
-    ########## change redirector ##########
-    if answers["_function"] == 'change redirector':
-        log.info(f'current redirector: {redirector}')
-        answers1 = questionary.form(
-            _redirector=questionary.select('Which redirector you want to use?',
-                                           choices=[
-                                               'root://cmsxrootd-redirectors.gridka.de:1094/, (RO)',
-                                               'root://cmsxrootd-kit.gridka.de:1094/, (RW)',
-                                               'other'
-                                           ])
-        ).ask()
-        if answers1["_redirector"] == 'other':
-            redirector = str(input('Which redirector you want to use?'))
-            if len(redirector) == 0:
-                exit('No redirector specified!')
-        else:
-            redirector = answers1["_redirector"].split(',')[0]
-        log.info(f'Redirector changed to {redirector}')
-
-    ########## help  ##########
-    if answers["_function"] == 'help':
-        help_dict = {
-            '<exit>': 'exit the script',
-            '<help>': 'print this help',
-            '<ls>': 'static ls on a fixed directory',
-            '<interactive ls>': 'interactive ls through the energy FTW!',
-            '<stat>': 'xrdfs stat on file or directory',
-            '<stat directory>': 'xrdfs stat on directory content',
-            '<dir size>': 'prints the size of the directory. With DEBUG: gives sizes of sub-dirs',
-            '<rm file>': 'remove a file from remote',
-            '<interactive file rm>': 'select a file on CLI to remove',
-            '<rm dir>': 'remove a directory on remote',
-            '<mv>': 'move or rename a file/directory; paths need to be explicit!',
-            '<mkdir>': 'xrdfs mkdir; full tree creation enabled',
-            '<copy file to>': 'copy a file to remote',
-            '<copy file from>': 'copy a file from remote',
-            '<change base path>': 'changing the base path for convenience',
-            '<change redirector>': 'change the redirector',
-            '<create file list>': 'write out file list of given directory'
-        }
-        print('#####################################')
-        print('# General notes and recommendations #')
-        print('#####################################')
-        print('First of all: ---BE CAREFUL!---')
-        print('   Like xrdfs rm/gfal-rm, there is no real user access management! \
-                \n   You can potentially delete everything...'
-              )
-
-        print('###################################################')
-        print('-----------------------------------------------')
-        for key, val in help_dict.items():
-            print(key, ': ', val)
+            ).ask()
+            log.info(f'{answers1["_source"]} will be copied to {basepath}{answers1["_dest"]}')
+            copy_file_to_remote(redirector, answers1["_source"], basepath + answers1["_dest"])
+            changed(basepath + answers1["_dest"])
+
+        ########## copy file from ##########
+        if answers["_function"] == "copy file from":
+            answers1 = questionary.form(
+                _source=questionary.text(f'Which file do you want to copy from remote? \
+                         \nSource: >{basepath}'
+                                         ),
+                _dest=questionary.text(
+                    f'Destination? Note: the path has to end with the desired filename! (/home/user/dir/<filename.txt>) \n>'
+                ),
+                _streams=questionary.text('Number of parallel streams? (>1: chunked download, e.g. for large files) \n>',
+                                          default='1'),
+            ).ask()
+            log.info(f'{answers1["_source"]} will be copied to {basepath}{answers1["_dest"]}')
+            if int(answers1["_streams"]) > 1:
+                answers2 = questionary.form(
+                    _journal=questionary.text('Transfer journal to resume an interrupted download? (empty: none) \n>',
+                                              default=''),
+                ).ask()
+                download_chunked(redirector, basepath + answers1["_source"], answers1["_dest"], int(answers1["_streams"]),
+                                 journal=answers2["_journal"] or None)
+            else:
+                copy_file_from_remote(redirector, basepath + answers1["_source"], answers1["_dest"])
+
+        ########## batch copy to ##########
+        if answers["_function"] == "batch copy to":
+            answers1 = questionary.form(
+                _mode=questionary.select('What do you want to copy to remote?',
+                                         choices=['local directory', 'list file with "<local source> <remote dest>" per line'])
+            ).ask()
+            if answers1["_mode"] == 'local directory':
+                answers2 = questionary.form(
+                    _source=questionary.text('Which local directory? Note: Complete path necessary! \nSource: >'),
+                    _dest=questionary.text(f'Destination directory? \n>{basepath}'),
+                    _parallel=questionary.text('Number of parallel copy jobs? \n>', default='4'),
+                    _journal=questionary.text('Transfer journal to resume interrupted copies? (empty: none) \n>', default=''),
+                ).ask()
+                copy_dir_to_remote(redirector, answers2["_source"], basepath + answers2["_dest"],
+                                   int(answers2["_parallel"]), journal=answers2["_journal"] or None)
+                changed(basepath + answers2["_dest"])
+            else:
+                answers2 = questionary.form(
+                    _list=questionary.text('Which list file? (remote paths are complete: /store/user/xyz/file.name) \n>'),
+                    _parallel=questionary.text('Number of parallel copy jobs? \n>', default='4'),
+                    _journal=questionary.text('Transfer journal to resume interrupted copies? (empty: none) \n>', default=''),
+                ).ask()
+                pairs = read_copy_list(answers2["_list"])
+                copy_files_to_remote(redirector, pairs, int(answers2["_parallel"]), journal=answers2["_journal"] or None)
+                changed(*[dest for _, dest in pairs])
+
+        ########## batch copy from ##########
+        if answers["_function"] == "batch copy from":
+            answers1 = questionary.form(
+                _mode=questionary.select('What do you want to copy from remote?',
+                                         choices=['remote directory', 'list file with "<remote source> <local dest>" per line'])
+            ).ask()
+            if answers1["_mode"] == 'remote directory':
+                answers2 = questionary.form(
+                    _source=questionary.text(f'Which remote directory? \nSource: >{basepath}'),
+                    _dest=questionary.text('Local destination directory? Note: Complete path necessary! \n>'),
+                    _parallel=questionary.text('Number of parallel copy jobs? \n>', default='4'),
+                    _journal=questionary.text('Transfer journal to resume interrupted copies? (empty: none) \n>', default=''),
+                ).ask()
+                copy_dir_from_remote(redirector, basepath + answers2["_source"], answers2["_dest"],
+                                     int(answers2["_parallel"]), journal=answers2["_journal"] or None)
+            else:
+                answers2 = questionary.form(
+                    _list=questionary.text('Which list file? (remote paths are complete: /store/user/xyz/file.name) \n>'),
+                    _parallel=questionary.text('Number of parallel copy jobs? \n>', default='4'),
+                    _journal=questionary.text('Transfer journal to resume interrupted copies? (empty: none) \n>', default=''),
+                ).ask()
+                copy_files_from_remote(redirector, read_copy_list(answers2["_list"]), int(answers2["_parallel"]),
+                                       journal=answers2["_journal"] or None)
+
+        ########## sync to ##########
+        if answers["_function"] == "sync to":
+            answers1 = questionary.form(
+                _source=questionary.text('Which local directory? Note: Complete path necessary! \nSource: >'),
+                _dest=questionary.text(f'Destination directory? \n>{basepath}'),
+                _checksum=questionary.confirm('Compare equal sized files by checksum instead of modification time?',
+                                              default=False),
+                _parallel=questionary.text('Number of parallel copy jobs? \n>', default='4'),
+            ).ask()
+            sync_to_remote(redirector, answers1["_source"], basepath + answers1["_dest"], answers1["_checksum"],
+                           int(answers1["_parallel"]))
+            changed(basepath + answers1["_dest"])
+
+        ########## sync from ##########
+        if answers["_function"] == "sync from":
+            answers1 = questionary.form(
+                _source=questionary.text(f'Which remote directory? \nSource: >{basepath}'),
+                _dest=questionary.text('Local destination directory? Note: Complete path necessary! \n>'),
+                _checksum=questionary.confirm('Compare equal sized files by checksum instead of modification time?',
+                                              default=False),
+                _parallel=questionary.text('Number of parallel copy jobs? \n>', default='4'),
+            ).ask()
+            sync_from_remote(redirector, basepath + answers1["_source"], answers1["_dest"], answers1["_checksum"],
+                             int(answers1["_parallel"]))
+
+        ########## verify checksums ##########
+        if answers["_function"] == "verify checksums":
+            answers1 = questionary.form(
+                _mode=questionary.select('What are the remote checksums compared against?',
+                                         choices=['local copy of a remote directory', 'manifest with "<adler32> <remote path>" per line']),
+                _affinity=questionary.confirm('Query the data servers directly (one extra locate per file)?',
+                                              default=False),
+            ).ask()
+            if answers1["_mode"] == 'local copy of a remote directory':
+                answers2 = questionary.form(
+                    _source=questionary.text(f'Which remote directory? \n>{basepath}'),
+                    _local=questionary.text('Which local directory? Note: Complete path necessary! \n>'),
+                ).ask()
+                verify_checksums(redirector, checksums_from_local(redirector, basepath + answers2["_source"], answers2["_local"]),
+                                 affinity=answers1["_affinity"])
+            else:
+                answers2 = questionary.form(
+                    _manifest=questionary.text('Which manifest? \n>'),
+                ).ask()
+                verify_checksums(redirector, read_checksum_manifest(answers2["_manifest"]), affinity=answers1["_affinity"])
+
+        ########## dir size ##########
+        if answers["_function"] == 'dir size':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory? \n >{basepath}'
+                                           )
+            ).ask()
+            if use_index and covers(index_db, redirector, basepath + answers1["_filepath"]):
+                index_dir_size(index_db, basepath + answers1["_filepath"], True)
+            else:
+                dir_size(redirector, basepath + answers1["_filepath"], True)
+
+        ########## dir size (incremental) ##########
+        if answers["_function"] == 'dir size (incremental)':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory? \n >{basepath}')
+            ).ask()
+            dir_str = (basepath + answers1["_filepath"]).rstrip('/').replace('/', '_')
+            answers2 = questionary.form(
+                _cache=questionary.text('Which file keeps the results of the previous run? \n >',
+                                        default=f'dirsize{dir_str}.json')
+            ).ask()
+            dir_size_incremental(redirector, basepath + answers1["_filepath"], answers2["_cache"], True)
+
+        ########## usage report ##########
+        if answers["_function"] == 'usage report':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory? \n >{basepath}'),
+                _depth=questionary.text('Levels of subdirectories within the report?', default='2'),
+                _top=questionary.text('Length of the top lists (largest/oldest)?', default='20')
+            ).ask()
+            dir_str = (basepath + answers1["_filepath"]).rstrip('/').replace('/', '_')
+            answers2 = questionary.form(
+                _json=questionary.text('Export the report as json (empty: no export)? \n >', default=f'usage{dir_str}.json'),
+                _csv=questionary.text('Export the directories as csv (empty: no export)? \n >', default=f'usage{dir_str}.csv')
+            ).ask()
+            usage_report(redirector, basepath + answers1["_filepath"], int(answers1["_depth"]), int(answers1["_top"]),
+                         json_file=answers2["_json"] or None, csv_file=answers2["_csv"] or None)
+
+        ########## create file list ##########
+        if answers["_function"] == 'create file list':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory? \n >{basepath}'
+                                           )
+            ).ask()
+            answers2 = questionary.form(
+                exclude=questionary.text(f'Do you want to exclude fils (e.g. ".log") [Enter to continue]? \n >')
+            ).ask()
+            answers3 = questionary.form(
+                recursive=questionary.confirm('Full tree (recursive, only files)?', default=False)
+            ).ask()
+            if answers3["recursive"]:
+                answers4 = questionary.form(
+                    include=questionary.text('Only include (glob or "re:<regex>", separated by spaces) [Enter for all]? \n >'),
+                    exclude=questionary.text('Exclude (glob or "re:<regex>", separated by spaces) [Enter for none]? \n >'),
+                    min_size=questionary.text('Minimal file size in Byte [Enter for none]? \n >'),
+                    max_size=questionary.text('Maximal file size in Byte [Enter for none]? \n >'),
+                    shards=questionary.text('Split into how many lists? \n >', default='1'),
+                ).ask()
+                create_file_list(redirector, basepath + answers1["_filepath"], answers2["exclude"], recursive=True,
+                                 include=answers4["include"].split(), exclude_patterns=answers4["exclude"].split(),
+                                 min_size=int(answers4["min_size"]) if len(answers4["min_size"]) > 0 else None,
+                                 max_size=int(answers4["max_size"]) if len(answers4["max_size"]) > 0 else None,
+                                 shards=int(answers4["shards"]))
+            elif use_index and covers(index_db, redirector, basepath + answers1["_filepath"]):
+                index_create_file_list(index_db, basepath + answers1["_filepath"], answers2["exclude"])
+            else:
+                create_file_list(redirector, basepath + answers1["_filepath"], answers2["exclude"])
+
+        ########## build index ##########
+        if answers["_function"] == 'build index':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory should be indexed? (Full tree will be crawled!) \n >{basepath}')
+            ).ask()
+            build_index(redirector, basepath + answers1["_filepath"], index_db)
+
+        ########## refresh index ##########
+        if answers["_function"] == 'refresh index':
+            answers1 = questionary.form(
+                _filepath=questionary.text(f'Which directory should be refreshed? [Enter for the full index] \n >{basepath}')
+            ).ask()
+            refresh_index(index_db, basepath + answers1["_filepath"] if len(answers1["_filepath"]) > 0 else None)
+
+        ########## search index ##########
+        if answers["_function"] == 'search index':
+            answers1 = questionary.form(
+                _pattern=questionary.text('Which file or directory names? (glob pattern, e.g. "*.root") \n >'),
+                _filepath=questionary.text(f'Within which directory? \n >{basepath}')
+            ).ask()
+            index_search(index_db, answers1["_pattern"], basepath + answers1["_filepath"])
+
+        ########## use index ##########
+        if answers["_function"] == 'use index':
+            answers1 = questionary.form(
+                _use=questionary.confirm(f'Answer ls, dir size and create file list from the index {index_db}?',
+                                         default=not use_index)
+            ).ask()
+            use_index = answers1["_use"]
+            log.info(f'Index {"enabled" if use_index else "disabled"}.')
+
+        ########## change base path ##########
+        if answers["_function"] == 'change base path':
+            basepath = str(input('Which basepath you want to use (default: /store/user/)?'))
+            log.info(f'Selected base path: {basepath}')
+            if basepath[0] != '/' or basepath[-1] != '/':
+                exit('The base path has to begin and end with a "/"!')
+            log.debug(f'[DEBUG] {redirector}, {basepath}')
+            stat_dir(redirector, basepath, False, False)  # check, if dir exists
+            log.info(f'Base path set to {basepath}')
+
+        ########## change redirector ##########
+        if answers["_function"] == 'change redirector':
+            log.info(f'current redirector: {redirector}')
+            answers1 = questionary.form(
+                _redirector=questionary.select('Which redirector you want to use?',
+                                               choices=[
+                                                   'root://cmsxrootd-redirectors.gridka.de:1094/, (RO)',
+                                                   'root://cmsxrootd-kit.gridka.de:1094/, (RW)',
+                                                   'auto, (fastest healthy redirector, failover on timeouts)',
+                                                   'other'
+                                               ])
+            ).ask()
+            if answers1["_redirector"] == 'other':
+                redirector = str(input('Which redirector you want to use?'))
+                if len(redirector) == 0:
+                    exit('No redirector specified!')
+            else:
+                redirector = answers1["_redirector"].split(',')[0]
+            if redirector == 'auto':
+                redirector = RedirectorManager(probe_path=basepath).activate()
+            log.info(f'Redirector changed to {redirector}')
+
+        ########## help  ##########
+        if answers["_function"] == 'help':
+            help_dict = {
+                '<exit>': 'exit the script',
+                '<help>': 'print this help',
+                '<ls>': 'static ls on a fixed directory',
+                '<interactive ls>': 'interactive ls through the energy FTW! Pages, prefix/fuzzy search, sort by size/mtime',
+                '<stat>': 'xrdfs stat on file or directory',
+                '<stat directory>': 'xrdfs stat on directory content',
+                '<dir size>': 'prints the size of the directory. With DEBUG: gives sizes of sub-dirs',
+                '<dir size (incremental)>': 'like dir size, but only directories changed since the last run are listed',
+                '<usage report>': 'size/files/age of all directories up to a depth, top-N largest dirs/files and oldest data (json/csv)',
+                '<rm file>': 'remove a file from remote',
+                '<interactive file rm>': 'select a file on CLI to remove (same browser as interactive ls)',
+                '<rm dir>': 'remove a directory on remote',
+                '<mv>': 'move or rename a file/directory; paths need to be explicit!',
+                '<bulk mv>': 'move many files at once from a mapping file or a regular expression rule (parallel requests)',
+                '<mkdir>': 'xrdfs mkdir; full tree creation enabled',
+                '<copy file to>': 'copy a file to remote',
+                '<copy file from>': 'copy a file from remote (optional: parallel byte range streams for large files)',
+                '<batch copy to>': 'copy a local directory or a list of files to remote with parallel jobs',
+                '<batch copy from>': 'copy a remote directory or a list of files from remote with parallel jobs',
+                '<transfer journal>': 'batch copies with a journal skip the files finished by an interrupted run',
+                '<sync to>': 'rsync-like: copy only new or changed files of a local directory to remote',
+                '<sync from>': 'rsync-like: copy only new or changed files of a remote directory to local',
+                '<verify checksums>': 'compare the server side adler32 checksums with local files or a manifest',
+                '<change base path>': 'changing the base path for convenience',
+                '<change redirector>': 'change the redirector ("auto": fastest healthy one, reads fail over on timeouts)',
+                '<create file list>': 'write out file list of given directory (optional: full tree with filters and shards)',
+                '<build index>': 'crawl a directory tree once into the local index (see use index)',
+                '<refresh index>': 'crawl (parts of) the indexed tree again to see remote changes',
+                '<search index>': 'search file/directory names in the local index',
+                '<use index>': 'answer ls, dir size and create file list from the index (off by default, or --use-index); '
+                               'directories changed in this session are always listed remotely'
+            }
+            print('#####################################')
+            print('# General notes and recommendations #')
+            print('#####################################')
+            print('First of all: ---BE CAREFUL!---')
+            print('   Like xrdfs rm/gfal-rm, there is no real user access management! \
+                    \n   You can potentially delete everything...'
+                  )
+
+            print('###################################################')
             print('-----------------------------------------------')
-        print('###################################################')
+            for key, val in help_dict.items():
+                print(key, ': ', val)
+                print('-----------------------------------------------')
+            print('###################################################')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+log = logging.getLogger()
+
+#################################################################
+# Instrumentation of the XRootD calls                           #
+# Every call of a pooled FileSystem (see SessionPool) goes      #
+# through InstrumentedFileSystem, which records the operation,  #
+# path, latency and status. Per operation, the calls, errors    #
+# and a latency histogram are kept. The summary shows whether   #
+# time is spent on the server/network (latency per call) or on #
+# redundant calls (same operation on the same path).            #
+#################################################################
+
+# upper bounds of the latency histogram buckets in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10., float('inf'))
+
+# FileSystem methods which are one request to the server
+INSTRUMENTED = ('stat', 'dirlist', 'rm', 'rmdir', 'mv', 'mkdir', 'locate', 'query', 'ping', 'copy',
+                'chmod', 'truncate', 'prepare', 'protocol', 'sendinfo', 'statvfs', 'deeplocate')
+
+
+class Metrics:
+    """
+    Thread safe store of the recorded calls.
+
+    Parameters
+    ----------
+    max_records : int
+        number of recent calls which are kept with their path
+    """
+
+    def __init__(self, max_records=10000) -> None:
+        self.enabled = True
+        self.records: deque = deque(maxlen=max_records)  # (op, path, latency, ok, message)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.latency_sum: Counter = Counter()
+        self.histograms: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, op: str, path: str, latency: float, ok: bool, message='') -> None:
+        """
+        Records one call.
+
+        Parameters
+        ----------
+        op      : str
+        path    : str
+        latency : float
+            in seconds
+        ok      : bool
+        message : str
+
+        Returns
+        -------
+        None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.records.append((op, path, latency, ok, message))
+            self.calls[op] += 1
+            self.latency_sum[op] += latency
+            if not ok:
+                self.errors[op] += 1
+            histogram = self.histograms.setdefault(op, [0] * len(BUCKETS))
+            for i, bound in enumerate(BUCKETS):
+                if latency <= bound:
+                    histogram[i] += 1
+                    break
+        log.debug(f'[metrics] {op} {path}: {latency * 1000:.1f} ms, ok: {ok}')
+        return None
+
+    @contextmanager
+    def timed(self, op: str, path: str) -> Iterator[List]:
+        """
+        Records the block as one call, for calls which do not go through a FileSystem (e.g. CopyProcess.run).
+        The status can be set with: with metrics.timed(op, path) as result: ... result.append(status)
+
+        Parameters
+        ----------
+        op   : str
+        path : str
+
+        Yields
+        ------
+        list
+            put the xrd status into it; without a status, the call counts as ok
+        """
+        result: List = []
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            status = result[0] if result else None
+            self.record(op, path, time.perf_counter() - start,
+                        True if status is None else bool(status.ok), '' if status is None else status.message)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self.calls.clear()
+            self.errors.clear()
+            self.latency_sum.clear()
+            self.histograms.clear()
+        return None
+
+    def _quantile(self, op: str, q: float) -> float:
+        # upper bound of the histogram bucket containing the quantile <q>
+        histogram = self.histograms[op]
+        target = q * sum(histogram)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return BUCKETS[-1]
+
+    def summary(self, top=5) -> None:
+        """
+        Logs the calls, errors and latencies per operation, the slowest recent calls
+        and the redundant calls (same operation on the same path).
+
+        Parameters
+        ----------
+        top : int
+            number of slowest/redundant calls to show
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            ops = sorted(self.calls)
+            records = list(self.records)
+        if len(ops) == 0:
+            log.info('No XRootD calls recorded.')
+            return None
+        log.info('----------------------- XRootD calls -----------------------')
+        log.info('{0:<10} {1:>8} {2:>7} {3:>10} {4:>10} {5:>10} {6:>10}'.format(
+            'operation', 'calls', 'errors', 'total [s]', 'mean [ms]', 'p50 [ms]', 'p95 [ms]'))
+        for op in ops:
+            log.info('{0:<10} {1:>8} {2:>7} {3:>10.2f} {4:>10.1f} {5:>10} {6:>10}'.format(
+                op, self.calls[op], self.errors[op], self.latency_sum[op],
+                1000 * self.latency_sum[op] / self.calls[op],
+                f'<{1000 * self._quantile(op, 0.5):g}', f'<{1000 * self._quantile(op, 0.95):g}'))
+        log.info(f'total: {sum(self.calls.values())} calls, {sum(self.latency_sum.values()):.2f}s')
+
+        slowest = sorted(records, key=lambda r: r[2], reverse=True)[:top]
+        if slowest:
+            log.info('slowest calls:')
+            for op, path, latency, ok, _ in slowest:
+                log.info(f'  {1000 * latency:>9.1f} ms {op} {path}{"" if ok else " (failed)"}')
+        redundant = [(key, n) for key, n in Counter((r[0], r[1]) for r in records).most_common(top) if n > 1]
+        if redundant:
+            log.info('repeated calls (same operation and path):')
+            for (op, path), n in redundant:
+                log.info(f'  {n:>5}x {op} {path}')
+        log.info('-------------------------------------------------------------')
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns the metrics (without the per-call records) as dict.
+        """
+        with self._lock:
+            return {
+                op: {
+                    'calls': self.calls[op],
+                    'errors': self.errors[op],
+                    'latency_sum': self.latency_sum[op],
+                    'buckets': {str(bound): count for bound, count in zip(BUCKETS, self.histograms[op])},
+                } for op in sorted(self.calls)
+            }
+
+    def export_json(self, output_name: str) -> None:
+        """
+        Writes the metrics and the recent calls to <output_name> (json).
+
+        Parameters
+        ----------
+        output_name : str
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            records = [{'op': op, 'path': path, 'latency': latency, 'ok': ok, 'message': message}
+                       for op, path, latency, ok, message in self.records]
+        with open(output_name, 'w') as f:
+            json.dump({'operations': self.as_dict(), 'records': records}, f, indent=1)
+        log.info(f'{output_name} created.')
+        return None
+
+    def export_prometheus(self, output_name: str) -> None:
+        """
+        Writes the metrics in the Prometheus text format to <output_name>,
+        e.g. for the textfile collector of the node exporter (file name has to end with .prom).
+        The file is replaced atomically.
+
+        Parameters
+        ----------
+        output_name : str
+
+        Returns
+        -------
+        None
+        """
+        operations = self.as_dict()
+        lines = [
+            '# HELP xrootd_requests_total XRootD requests per operation.',
+            '# TYPE xrootd_requests_total counter',
+        ]
+        lines += [f'xrootd_requests_total{{op="{op}"}} {m["calls"]}' for op, m in operations.items()]
+        lines += [
+            '# HELP xrootd_request_errors_total Failed XRootD requests per operation.',
+            '# TYPE xrootd_request_errors_total counter',
+        ]
+        lines += [f'xrootd_request_errors_total{{op="{op}"}} {m["errors"]}' for op, m in operations.items()]
+        lines += [
+            '# HELP xrootd_request_duration_seconds Latency of the XRootD requests.',
+            '# TYPE xrootd_request_duration_seconds histogram',
+        ]
+        for op, m in operations.items():
+            cumulative = 0
+            for bound, count in zip(BUCKETS, m['buckets'].values()):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'xrootd_request_duration_seconds_bucket{{op="{op}",le="{le}"}} {cumulative}')
+            lines.append(f'xrootd_request_duration_seconds_sum{{op="{op}"}} {m["latency_sum"]}')
+            lines.append(f'xrootd_request_duration_seconds_count{{op="{op}"}} {m["calls"]}')
+        with open(output_name + '.tmp', 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(output_name + '.tmp', output_name)
+        log.info(f'{output_name} created.')
+        return None
+
+    def export(self, output_name: str) -> None:
+        """
+        export_json for *.json, else export_prometheus.
+        """
+        if output_name.endswith('.json'):
+            return self.export_json(output_name)
+        return self.export_prometheus(output_name)
+
+
+metrics = Metrics()
+
+
+class InstrumentedFileSystem:
+    """
+    Wrapper around a FileSystem, which records every request in <metrics>.
+    For the callback form (callback=...), the latency is measured until the response arrives.
+    All other attributes are passed through.
+
+    Parameters
+    ----------
+    filesystem : client.FileSystem or compatible
+    metrics    : Metrics
+    """
+
+    def __init__(self, filesystem: Any, metrics: Metrics) -> None:
+        self._filesystem = filesystem
+        self._metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._filesystem, name)
+        if name not in INSTRUMENTED or not callable(attribute):
+            return attribute
+        recorder = self._metrics
+
+        def _instrumented(*args: Any, **kwargs: Any) -> Any:
+            path = str(args[0]) if args else ''
+            if name == 'query' and len(args) > 1:
+                path = str(args[1])  # query(querycode, arg)
+            start = time.perf_counter()
+            callback = kwargs.get('callback')
+            if callback is not None:
+                def _callback(status: Any, response: Any, hostlist: Any) -> None:
+                    recorder.record(name, path, time.perf_counter() - start, bool(status.ok), status.message)
+                    callback(status, response, hostlist)
+                kwargs['callback'] = _callback
+                return attribute(*args, **kwargs)
+            response = attribute(*args, **kwargs)
+            status = response[0] if isinstance(response, tuple) else response
+            recorder.record(name, path, time.perf_counter() - start, bool(status.ok), status.message)
+            return response
+
+        return _instrumented
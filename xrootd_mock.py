@@ -0,0 +1,618 @@
+import importlib.util
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+#################################################################
+# In-memory stand-in for client.FileSystem                      #
+# Used for benchmarks (see xrootd_bench.py) and for trying out  #
+# the functions without a grid site. The flags mirror the dcache#
+# door (dirlist: dir 19, file 16; stat: dir 51, file 48).       #
+# Every call counts as one round trip and sleeps <latency> s.   #
+# Without the bindings, install() also provides the flags.      #
+#################################################################
+# Usage:
+# fs = MockFileSystem(latency=0.05)
+# make_tree(fs, '/store/user/<username>/', n_entries=10**4)
+# install(fs)  # all helpers of xrootd_utils now use the mock (including File and CopyProcess)
+
+
+########## flags (same values as XRootD.client.flags) ###############
+class MockDirListFlags:
+    NONE = 0
+    STAT = 1
+    LOCATE = 2
+    RECURSIVE = 4
+    MERGE = 8
+    CHUNKED = 16
+    ZIP = 32
+    CKSM = 64
+
+
+class MockOpenFlags:
+    NONE = 0
+    COMPRESS = 1
+    DELETE = 2
+    FORCE = 4
+    NEW = 8
+    READ = 16
+    UPDATE = 32
+    REFRESH = 64
+    MAKEPATH = 128
+    APPEND = 256
+    REPLICA = 512
+    POSC = 1024
+    NOWAIT = 2048
+    SEQIO = 4096
+    WRITE = 8192
+
+
+class MockMkDirFlags:
+    NONE = 0
+    MAKEPATH = 1
+
+
+class MockQueryCode:
+    STATS = 1
+    PREPARE = 2
+    CHECKSUM = 3
+    XATTR = 4
+    SPACE = 5
+    CHECKSUMCANCEL = 6
+    CONFIG = 7
+    VISA = 8
+    OPAQUE = 16
+    OPAQUEFILE = 32
+
+
+class MockStatus:
+    """
+    Replacement for XRootDStatus.
+    """
+    __slots__ = ('ok', 'message', 'code', 'errno')
+
+    def __init__(self, ok=True, message='', code=0, errno=0) -> None:
+        self.ok = ok
+        self.message = message if message else ('[SUCCESS]' if ok else '[ERROR]')
+        self.code = code
+        self.errno = errno
+
+    def __repr__(self) -> str:
+        return f'<status: {self.message}, ok: {self.ok}>'
+
+
+class MockStatInfo:
+    """
+    Replacement for StatInfo.
+    """
+    __slots__ = ('id', 'size', 'flags', 'modtime')
+
+    def __init__(self, size: int, flags: int, modtime: int) -> None:
+        self.id = '0'
+        self.size = size
+        self.flags = flags
+        self.modtime = modtime
+
+    @property
+    def modtimestr(self) -> str:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self.modtime))
+
+    def __repr__(self) -> str:
+        return f'<size: {self.size}, flags: {self.flags}, modtime: {self.modtime}>'
+
+
+class MockListEntry:
+    """
+    Replacement for ListEntry of a DirectoryList.
+    """
+    __slots__ = ('hostaddr', 'name', 'statinfo')
+
+    def __init__(self, name: str, statinfo: MockStatInfo) -> None:
+        self.hostaddr = 'mock:1094'
+        self.name = name
+        self.statinfo = statinfo
+
+    def __repr__(self) -> str:
+        return f'<name: {self.name}, statinfo: {self.statinfo}>'
+
+
+class MockDirectoryList(list):
+    """
+    Replacement for DirectoryList: list of MockListEntry with .parent and .size.
+    """
+
+    def __init__(self, parent: str, entries: list) -> None:
+        super().__init__(entries)
+        self.parent = parent
+        self.size = len(entries)
+
+
+class MockLocation:
+    """
+    Replacement for a location of LocationInfo.
+    """
+    __slots__ = ('address', 'type', 'accesstype', 'is_manager', 'is_server')
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.type = 2  # LocationType.SERVER_ONLINE
+        self.accesstype = 1  # AccessType.READ_WRITE
+        self.is_manager = False
+        self.is_server = True
+
+
+class MockFileSystem:
+    """
+    In-memory FileSystem with the same call signatures as client.FileSystem
+    (including the callback= form). Directories are stored as dicts name -> [size, modtime, is_dir].
+
+    Parameters
+    ----------
+    latency     : float
+        sleep per call in seconds (simulated round trip)
+    data_server : str
+        address returned by locate
+    """
+
+    _DIRLIST_FLAGS = {True: 19, False: 16}
+    _STAT_FLAGS = {True: 51, False: 48}
+
+    def __init__(self, latency=0., data_server='mock-data-server:1094') -> None:
+        self.latency = latency
+        self.data_server = data_server
+        self.calls: Dict[str, int] = {}
+        self._dirs: Dict[str, Dict[str, list]] = {'/': {}}
+        self._contents: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._callbacks: Optional[ThreadPoolExecutor] = None
+
+    ########## bookkeeping ###############
+    @staticmethod
+    def _split(path: str) -> Tuple[str, str]:
+        path = '/' + path.strip('/')
+        parent, name = path.rsplit('/', 1)
+        return parent + '/', name
+
+    def _count(self, op: str) -> None:
+        with self._lock:
+            self.calls[op] = self.calls.get(op, 0) + 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def round_trips(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def clear(self) -> None:
+        """
+        Removes all files and directories.
+        """
+        with self._lock:
+            self._dirs = {'/': {}}
+            self._contents = {}
+
+    def _call(self, op: str, function: Any, callback: Any, *args: Any) -> Any:
+        if callback is None:
+            self._count(op)
+            return function(*args)
+        # the callback form returns immediately; the response arrives from another thread
+        if self._callbacks is None:
+            self._callbacks = ThreadPoolExecutor(max_workers=64)
+
+        def _run() -> None:
+            self._count(op)
+            status, response = function(*args)
+            callback(status, response, None)
+        self._callbacks.submit(_run)
+        return MockStatus()
+
+    ########## tree manipulation (no round trips) ###############
+    def add_dir(self, path: str, modtime=0) -> None:
+        """
+        Creates the directory <path> including all parents (no round trip counted).
+        """
+        path = '/' + path.strip('/')
+        if path == '/':
+            return None
+        parent, name = self._split(path)
+        self.add_dir(parent, modtime)
+        with self._lock:
+            if path + '/' not in self._dirs:
+                self._dirs[path + '/'] = {}
+                self._dirs[parent][name] = [512, modtime or int(time.time()), True]
+        return None
+
+    def add_file(self, path: str, size: int, modtime=0, content: Optional[bytes] = None) -> None:
+        """
+        Creates the file <path> (no round trip counted). The parent directory has to exist.
+        """
+        parent, name = self._split(path)
+        with self._lock:
+            self._dirs[parent][name] = [size if content is None else len(content), modtime or int(time.time()), False]
+            if content is not None:
+                self._contents[parent + name] = content
+        return None
+
+    ########## FileSystem interface ###############
+    def _stat(self, path: str) -> Tuple[MockStatus, Any]:
+        if path.strip('/') == '':
+            return MockStatus(), MockStatInfo(512, 51, 0)
+        parent, name = self._split(path)
+        with self._lock:
+            entry = self._dirs.get(parent, {}).get(name)
+        if entry is None:
+            return MockStatus(False, '[ERROR] Server responded with an error: [3011] No such file or directory',
+                              400, 3011), None
+        return MockStatus(), MockStatInfo(entry[0], self._STAT_FLAGS[entry[2]], entry[1])
+
+    def stat(self, path: str, timeout=0, callback=None) -> Any:
+        return self._call('stat', self._stat, callback, path)
+
+    def _dirlist(self, path: str, flags: int) -> Tuple[MockStatus, Any]:
+        parent = '/' + path.strip('/')
+        parent = parent if parent == '/' else parent + '/'
+        with self._lock:
+            children = self._dirs.get(parent)
+            if children is None:
+                return MockStatus(False, '[ERROR] Server responded with an error: [3011] No such directory',
+                                  400, 3011), None
+            entries = [MockListEntry(name, MockStatInfo(size, self._DIRLIST_FLAGS[is_dir], modtime))
+                       for name, (size, modtime, is_dir) in children.items()]
+        return MockStatus(), MockDirectoryList(parent, entries)
+
+    def dirlist(self, path: str, flags=0, timeout=0, callback=None) -> Any:
+        return self._call('dirlist', self._dirlist, callback, path, flags)
+
+    def _rm(self, path: str) -> Tuple[MockStatus, Any]:
+        parent, name = self._split(path)
+        with self._lock:
+            entry = self._dirs.get(parent, {}).get(name)
+            if entry is None or entry[2]:
+                return MockStatus(False, '[ERROR] No such file', 400, 3011), None
+            del self._dirs[parent][name]
+            self._contents.pop(parent + name, None)
+            self._dirs_touch(parent)
+        return MockStatus(), None
+
+    def rm(self, path: str, timeout=0, callback=None) -> Any:
+        return self._call('rm', self._rm, callback, path)
+
+    def _rmdir(self, path: str) -> Tuple[MockStatus, Any]:
+        parent, name = self._split(path)
+        with self._lock:
+            children = self._dirs.get(parent + name + '/')
+            if children is None:
+                return MockStatus(False, '[ERROR] No such directory', 400, 3011), None
+            if children:
+                return MockStatus(False, '[ERROR] Directory not empty', 400, 3006), None
+            del self._dirs[parent + name + '/']
+            del self._dirs[parent][name]
+            self._dirs_touch(parent)
+        return MockStatus(), None
+
+    def rmdir(self, path: str, timeout=0, callback=None) -> Any:
+        return self._call('rmdir', self._rmdir, callback, path)
+
+    def _mkdir(self, path: str, flags: int) -> Tuple[MockStatus, Any]:
+        parent, name = self._split(path)
+        if parent not in self._dirs and not flags & 1:  # MkDirFlags.MAKEPATH
+            return MockStatus(False, '[ERROR] No such directory', 400, 3011), None
+        self.add_dir(path)
+        with self._lock:
+            self._dirs_touch(parent)
+        return MockStatus(), None
+
+    def mkdir(self, path: str, flags=0, mode=0, timeout=0, callback=None) -> Any:
+        return self._call('mkdir', self._mkdir, callback, path, flags)
+
+    def _mv(self, source: str, dest: str) -> Tuple[MockStatus, Any]:
+        source_parent, source_name = self._split(source)
+        dest_parent, dest_name = self._split(dest)
+        with self._lock:
+            entry = self._dirs.get(source_parent, {}).get(source_name)
+            if entry is None or dest_parent not in self._dirs or dest_name in self._dirs[dest_parent]:
+                return MockStatus(False, '[ERROR] mv failed (no source, no target dir or target exists)',
+                                  400, 3011), None
+            del self._dirs[source_parent][source_name]
+            self._dirs[dest_parent][dest_name] = entry
+            old_prefix, new_prefix = source_parent + source_name, dest_parent + dest_name
+            if entry[2]:
+                for directory in [d for d in self._dirs if d.startswith(old_prefix + '/')]:
+                    self._dirs[new_prefix + directory[len(old_prefix):]] = self._dirs.pop(directory)
+            for path in [p for p in self._contents if p == old_prefix or p.startswith(old_prefix + '/')]:
+                self._contents[new_prefix + path[len(old_prefix):]] = self._contents.pop(path)
+            self._dirs_touch(source_parent)
+            self._dirs_touch(dest_parent)
+        return MockStatus(), None
+
+    def mv(self, source: str, dest: str, timeout=0, callback=None) -> Any:
+        return self._call('mv', self._mv, callback, source, dest)
+
+    def _locate(self, path: str, flags: int) -> Tuple[MockStatus, Any]:
+        status, _ = self._stat(path)
+        if not status.ok:
+            return status, None
+        return MockStatus(), [MockLocation(self.data_server)]
+
+    def locate(self, path: str, flags=0, timeout=0, callback=None) -> Any:
+        return self._call('locate', self._locate, callback, path, flags)
+
+    def _query(self, querycode: int, arg: str) -> Tuple[MockStatus, Any]:
+        # only the checksum query is supported: "adler32 <checksum>"
+        path = '/' + arg.strip('/')
+        status, statinfo = self._stat(path)
+        if not status.ok:
+            return status, None
+        with self._lock:
+            content = self._contents.get(path, b'\0' * statinfo.size)
+        return MockStatus(), f'adler32 {zlib.adler32(content) & 0xffffffff:08x}\0'.encode()
+
+    def query(self, querycode: int, arg: str, timeout=0, callback=None) -> Any:
+        return self._call('query', self._query, callback, querycode, arg)
+
+    @staticmethod
+    def _url_path(url: str) -> Tuple[bool, str]:
+        # (local?, path) of "file:///<path>" or "root://<host>:<port>//<path>"
+        if url.startswith('file://'):
+            return True, url[len('file://'):]
+        if '://' in url:
+            url = url[url.index('/', url.index('://') + 3):]
+        return False, '/' + url.strip('/')
+
+    def _copy(self, source: str, target: str, force: bool) -> Tuple[MockStatus, Any]:
+        source_local, source_path = self._url_path(source)
+        target_local, target_path = self._url_path(target)
+        if source_local:
+            if not os.path.isfile(source_path):
+                return MockStatus(False, f'[ERROR] {source_path}: No such file', 400, 3011), None
+            with open(source_path, 'rb') as f:
+                content = f.read()
+        else:
+            status, statinfo = self._stat(source_path)
+            if not status.ok or statinfo.flags == self._STAT_FLAGS[True]:
+                return MockStatus(False, '[ERROR] Server responded with an error: [3011] No such file', 400, 3011), None
+            with self._lock:
+                content = self._contents.get(source_path, b'\0' * statinfo.size)
+
+        if target_local:
+            if os.path.exists(target_path) and not force:
+                return MockStatus(False, f'[ERROR] {target_path}: File exists', 400, 3018), None
+            os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+            with open(target_path, 'wb') as f:
+                f.write(content)
+        else:
+            if self._stat(target_path)[0].ok and not force:
+                return MockStatus(False, '[ERROR] Server responded with an error: [3018] File exists', 400, 3018), None
+            parent, _ = self._split(target_path)
+            self.add_dir(parent)  # like the mkdir option of the copy jobs
+            self.add_file(target_path, len(content), content=content)
+            with self._lock:
+                self._dirs_touch(parent)
+        return MockStatus(), None
+
+    def copy(self, source: str, target: str, force=False) -> Any:
+        """
+        Copies between local files ("file://<path>") and the mock ("root://<host>//<path>") in both directions.
+        Missing remote target directories are created.
+        """
+        return self._call('copy', self._copy, None, source, target, force)
+
+    def ping(self, timeout=0, callback=None) -> Any:
+        return self._call('ping', lambda: (MockStatus(), None), callback)
+
+    def _dirs_touch(self, directory: str) -> None:
+        # new modtime of <directory> within its parent (lock has to be held)
+        if directory == '/':
+            return None
+        parent, name = self._split(directory)
+        if name in self._dirs.get(parent, {}):
+            self._dirs[parent][name][1] = int(time.time())
+        return None
+
+
+class MockCopyProcess:
+    """
+    Replacement for client.CopyProcess: the jobs are copied one after the other with MockFileSystem.copy.
+    The progress handler is called like by the bindings (begin, update, should_cancel, end).
+
+    Parameters
+    ----------
+    fs : MockFileSystem
+    """
+
+    def __init__(self, fs: MockFileSystem) -> None:
+        self.fs = fs
+        self.jobs: list = []
+        self.n_parallel = 1
+
+    def add_job(self, source: str, target: str, force=False, **kwargs: Any) -> None:
+        self.jobs.append((source, target, force))
+
+    def parallel(self, n: int) -> None:
+        self.n_parallel = n
+
+    def prepare(self) -> MockStatus:
+        return MockStatus()
+
+    def run(self, handler: Any = None) -> Tuple[MockStatus, list]:
+        results = []
+        for job_id, (source, target, force) in enumerate(self.jobs, 1):
+            if handler is not None:
+                handler.begin(job_id, len(self.jobs), source, target)
+                if handler.should_cancel(job_id):
+                    results.append({'status': MockStatus(False, '[ERROR] Operation canceled', 400, 3015)})
+                    handler.end(job_id, results[-1])
+                    continue
+            status, _ = self.fs.copy(source, target, force)
+            if handler is not None:
+                handler.update(job_id, 1, 1)
+                handler.end(job_id, {'status': status})
+            results.append({'status': status})
+        return MockStatus(), results
+
+
+class MockFile:
+    """
+    Replacement for client.File (read only): open, stat, read and close of one file of <fs>.
+    open and read count as round trips. Files without content read as zeros.
+
+    Parameters
+    ----------
+    fs : MockFileSystem
+    """
+
+    def __init__(self, fs: MockFileSystem) -> None:
+        self.fs = fs
+        self.path: Optional[str] = None
+
+    def open(self, url: str, flags=0, mode=0, timeout=0, callback=None) -> Any:
+        def _open() -> Tuple[MockStatus, Any]:
+            _, path = self.fs._url_path(url)
+            status, statinfo = self.fs._stat(path)
+            if status.ok and statinfo.flags == self.fs._STAT_FLAGS[True]:
+                return MockStatus(False, '[ERROR] Server responded with an error: [3016] Is a directory', 400, 3016), None
+            self.path = path if status.ok else None
+            return status, None
+        return self.fs._call('open', _open, callback)
+
+    def is_open(self) -> bool:
+        return self.path is not None
+
+    def stat(self, force=False, timeout=0, callback=None) -> Any:
+        return self.fs._call('stat', lambda: self.fs._stat(self.path), callback)
+
+    def read(self, offset=0, size=0, timeout=0, callback=None) -> Any:
+        def _read() -> Tuple[MockStatus, Any]:
+            if self.path is None:
+                return MockStatus(False, '[ERROR] Invalid operation: file not open', 400, 3003), None
+            status, statinfo = self.fs._stat(self.path)
+            if not status.ok:
+                return status, None
+            with self.fs._lock:
+                content = self.fs._contents.get(self.path)
+            if content is None:
+                return MockStatus(), b'\0' * max(min(size or statinfo.size, statinfo.size - offset), 0)
+            return MockStatus(), content[offset:offset + size] if size else content[offset:]
+        return self.fs._call('read', _read, callback)
+
+    def close(self, timeout=0, callback=None) -> Any:
+        self.path = None
+        return MockStatus(), None
+
+    def __enter__(self) -> 'MockFile':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class MockClient:
+    """
+    Replacement for the module XRootD.client: FileSystem, File and CopyProcess use <fs>.
+    """
+
+    def __init__(self, fs: MockFileSystem) -> None:
+        self.FileSystem = lambda url: fs
+        self.File = lambda: MockFile(fs)
+        self.CopyProcess = lambda: MockCopyProcess(fs)
+
+
+########## trees ###############
+def make_tree(fs: MockFileSystem, top: str, n_entries: int, files_per_dir=100, dirs_per_dir=10,
+              file_size=1 << 20) -> None:
+    """
+    Creates a synthetic tree with <n_entries> entries (files and directories) below <top>.
+    Every directory gets <files_per_dir> files and up to <dirs_per_dir> subdirectories (breadth first).
+    files_per_dir=n_entries gives one flat directory.
+
+    Parameters
+    ----------
+    fs            : MockFileSystem
+    top           : str
+    n_entries     : int
+    files_per_dir : int
+    dirs_per_dir  : int
+    file_size     : int
+        size of every file in Byte
+
+    Returns
+    -------
+    None
+    """
+    top = '/' + top.strip('/')
+    fs.add_dir(top, modtime=1600000000)
+    queue = [top]
+    created = 0
+    while queue and created < n_entries:
+        current = queue.pop(0)
+        for i in range(min(files_per_dir, n_entries - created)):
+            fs.add_file(f'{current}/file_{i}.root', file_size, modtime=1600000000 + created)
+            created += 1
+        for i in range(dirs_per_dir):
+            if created >= n_entries:
+                break
+            fs.add_dir(f'{current}/dir_{i}', modtime=1600000000)
+            queue.append(f'{current}/dir_{i}')
+            created += 1
+    return None
+
+
+def from_local_directory(fs: MockFileSystem, local_dir: str, top: str) -> None:
+    """
+    Copies the structure (and content) of the local directory <local_dir> to <top> of the mock.
+
+    Parameters
+    ----------
+    fs        : MockFileSystem
+    local_dir : str
+    top       : str
+
+    Returns
+    -------
+    None
+    """
+    top = '/' + top.strip('/')
+    fs.add_dir(top)
+    for dirpath, dirnames, filenames in os.walk(local_dir):
+        relative = os.path.relpath(dirpath, local_dir)
+        remote = top if relative == '.' else f'{top}/{relative}'
+        for dirname in dirnames:
+            fs.add_dir(f'{remote}/{dirname}', modtime=int(os.stat(os.path.join(dirpath, dirname)).st_mtime))
+        for filename in filenames:
+            with open(os.path.join(dirpath, filename), 'rb') as f:
+                content = f.read()
+            fs.add_file(f'{remote}/{filename}', len(content), int(os.stat(os.path.join(dirpath, filename)).st_mtime),
+                        content)
+    return None
+
+
+def install(fs: MockFileSystem) -> None:
+    """
+    All helpers of xrootd_utils use <fs> for every redirector from now on (including File and CopyProcess).
+    If the bindings are not available, the flags of xrootd_mock are used.
+
+    Parameters
+    ----------
+    fs : MockFileSystem
+
+    Returns
+    -------
+    None
+    """
+    import xrootd_utils
+    xrootd_utils.sessions.set_backend(lambda redirector: fs)
+    xrootd_utils.client.replace(MockClient(fs))
+    if importlib.util.find_spec('XRootD') is None:
+        for flags, mock_flags in ((xrootd_utils.DirListFlags, MockDirListFlags), (xrootd_utils.OpenFlags, MockOpenFlags),
+                                  (xrootd_utils.MkDirFlags, MockMkDirFlags), (xrootd_utils.QueryCode, MockQueryCode)):
+            flags.replace(mock_flags)
+    xrootd_utils.listing_cache.clear()
+    xrootd_utils.location_cache.clear()
+    return None
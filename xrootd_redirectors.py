@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from xrootd_metrics import INSTRUMENTED
+from xrootd_utils import sessions
+
+log = logging.getLogger()
+
+#################################################################
+# Redirector selection and failover                             #
+# The candidates are probed concurrently with a stat (ping is   #
+# not supported by the dCache door) and the fastest healthy     #
+# one is used. During the session, a request which fails with   #
+# a timeout or connection error is sent again to the next       #
+# healthy candidate. The probe results and failures are kept    #
+# in a small json file, so that the next run starts with the    #
+# redirector that was healthy recently.                         #
+#################################################################
+
+CANDIDATES = [
+    'root://cmsxrootd-kit.gridka.de:1094/',
+    'root://cmsxrootd-redirectors.gridka.de:1094/',
+]
+
+STATE_FILE = os.path.join(os.path.expanduser('~'), '.xrd_redirectors.json')
+
+# XRootDStatus codes after which the request is sent to the next redirector:
+# socket/connection errors (errInvalidAddr ... errTlsError) and errOperationExpired (timeout)
+FAILOVER_CODES = set(range(101, 111)) | {206}
+
+# only these requests are sent again: a timed out mv/rm/mkdir could have been applied already
+IDEMPOTENT = ('stat', 'dirlist', 'locate', 'query')
+
+
+class RedirectorManager:
+    """
+    Probes the <candidates>, picks the fastest healthy one and fails over during the session.
+
+    Parameters
+    ----------
+    candidates : list
+        redirector urls (root://host:port/)
+    probe_path : str
+        path for the probe stat, has to be readable on all candidates (e.g. the base path)
+    timeout    : int
+        timeout of the probes in seconds
+        (the timeout of the other requests is set by XRootD, e.g. XRD_REQUESTTIMEOUT=30)
+    state_file : str
+        json file with the recent health stats (None: not persisted)
+    history    : int
+        number of recent results kept per redirector
+    """
+
+    def __init__(self, candidates: Optional[List[str]] = None, probe_path='/store/user/', timeout=10,
+                 state_file: Optional[str] = STATE_FILE, history=20) -> None:
+        self.candidates = list(CANDIDATES if candidates is None else candidates)
+        self.probe_path = probe_path
+        self.timeout = timeout
+        self.state_file = state_file
+        self.history = history
+        self.current: Optional[str] = None
+        self._health: Dict[str, List] = {}  # redirector -> [[timestamp, ok, latency], ...]
+        self._lock = threading.Lock()
+        if state_file is not None and os.path.exists(state_file):
+            try:
+                with open(state_file) as f:
+                    self._health = json.load(f)
+            except ValueError:
+                log.warning(f'{state_file} is corrupt, the health stats start from scratch.')
+
+    def _record(self, redirector: str, ok: bool, latency: float) -> None:
+        with self._lock:
+            results = self._health.setdefault(redirector, [])
+            results.append([time.time(), ok, latency])
+            del results[:-self.history]
+        return None
+
+    def save(self) -> None:
+        """
+        Writes the health stats to the state file (atomically).
+        """
+        if self.state_file is None:
+            return None
+        with self._lock:
+            with open(self.state_file + '.tmp', 'w') as f:
+                json.dump(self._health, f)
+            os.replace(self.state_file + '.tmp', self.state_file)
+        return None
+
+    def score(self, redirector: str) -> Tuple[float, float]:
+        """
+        Recent failure rate and median latency of the successful requests, (1, inf) without history.
+        Lower is better.
+        """
+        with self._lock:
+            results = list(self._health.get(redirector, []))
+        if len(results) == 0:
+            return 1., float('inf')
+        latencies = [latency for _, ok, latency in results if ok]
+        failure_rate = 1 - len(latencies) / len(results)
+        return failure_rate, statistics.median(latencies) if latencies else float('inf')
+
+    def probe(self) -> List[Tuple[str, bool, float]]:
+        """
+        Stats <probe_path> on all candidates at the same time.
+
+        Returns
+        -------
+        list
+            (redirector, ok, latency in seconds) sorted by the latency, the healthy ones first
+        """
+        def _probe(redirector: str) -> Tuple[str, bool, float]:
+            start = time.perf_counter()
+            try:
+                status, _ = sessions.new(redirector).stat(self.probe_path, timeout=self.timeout)
+                ok = bool(status.ok)
+            except Exception as error:  # e.g. invalid url
+                log.debug(f'[redirectors] {redirector}: {error}')
+                ok = False
+            latency = time.perf_counter() - start
+            self._record(redirector, ok, latency)
+            log.debug(f'[redirectors] probe {redirector}: ok: {ok}, {latency * 1000:.1f} ms')
+            return redirector, ok, latency
+
+        with ThreadPoolExecutor(max_workers=max(len(self.candidates), 1)) as pool:
+            results = list(pool.map(_probe, self.candidates))
+        self.save()
+        return sorted(results, key=lambda result: (not result[1], result[2]))
+
+    def select(self) -> str:
+        """
+        Probes all candidates and selects the fastest healthy one.
+        If no candidate answers, the one with the best recent history is used.
+
+        Returns
+        -------
+        str
+            the selected redirector
+        """
+        results = self.probe()
+        for redirector, ok, latency in results:
+            log.info('{0:<50} {1:>8} {2:>10.1f} ms'.format(redirector, 'ok' if ok else 'FAILED', latency * 1000))
+        healthy = [redirector for redirector, ok, _ in results if ok]
+        if healthy:
+            self.current = healthy[0]
+        else:
+            self.current = min(self.candidates, key=self.score)
+            log.critical(f'No redirector answered the probe, {self.current} is used (best recent history).')
+        log.info(f'Redirector selected: {self.current}')
+        return self.current
+
+    def failover_order(self) -> List[str]:
+        """
+        All candidates, the current one first, the others ordered by their recent health.
+        """
+        others = sorted((c for c in self.candidates if c != self.current), key=self.score)
+        return ([self.current] if self.current is not None else []) + others
+
+    def activate(self, redirector: Optional[str] = None) -> str:
+        """
+        Selects a redirector (see select) and registers a FileSystem with failover for it in the session pool.
+        All functions of xrootd_utils, which are called with the returned redirector, fail over automatically.
+        Note: only read requests are failed over (see IDEMPOTENT). Copies, which are started after a failover,
+        use the new redirector (see SessionPool.current_url), a running copy is not failed over.
+
+        Parameters
+        ----------
+        redirector : str
+            use this redirector first instead of probing
+
+        Returns
+        -------
+        str
+            the redirector to pass to the functions of xrootd_utils
+        """
+        if redirector is None:
+            redirector = self.select()
+        self.current = redirector
+        if redirector not in self.candidates:
+            self.candidates.insert(0, redirector)
+        sessions.register(redirector, FailoverFileSystem(self))
+        return redirector
+
+
+class FailoverFileSystem:
+    """
+    FileSystem, which sends every request to the current redirector of the <manager>.
+    If a read request (IDEMPOTENT) fails with a timeout or connection error (FAILOVER_CODES),
+    the redirector is marked as unhealthy and the request is sent to the next candidate.
+    Namespace changes (mv, rm, mkdir, ...) and requests with a callback are sent to the
+    current redirector only.
+
+    Parameters
+    ----------
+    manager : RedirectorManager
+    """
+
+    def __init__(self, manager: RedirectorManager) -> None:
+        self._manager = manager
+        self._filesystems: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def current_redirector(self) -> Optional[str]:
+        # used by SessionPool.current_url to build the urls of copies
+        return self._manager.current
+
+    def _filesystem(self, redirector: str) -> Any:
+        with self._lock:
+            if redirector not in self._filesystems:
+                self._filesystems[redirector] = sessions.new(redirector)
+            return self._filesystems[redirector]
+
+    def __getattr__(self, name: str) -> Any:
+        current = self._manager.current
+        attribute = getattr(self._filesystem(current), name)
+        if name not in INSTRUMENTED or not callable(attribute):
+            return attribute
+
+        def _with_failover(*args: Any, **kwargs: Any) -> Any:
+            if kwargs.get('callback') is not None:
+                return getattr(self._filesystem(self._manager.current), name)(*args, **kwargs)
+            if name not in IDEMPOTENT:
+                start = time.perf_counter()
+                response = getattr(self._filesystem(self._manager.current), name)(*args, **kwargs)
+                status = response[0] if isinstance(response, tuple) else response
+                if not status.ok and status.code in FAILOVER_CODES:
+                    log.warning(f'{name} on {self._manager.current} failed ({status.message}), '
+                                f'not sent again: it may have been applied.')
+                    self._manager._record(self._manager.current, False, time.perf_counter() - start)
+                    self._manager.save()
+                return response
+            response = None
+            for redirector in self._manager.failover_order():
+                start = time.perf_counter()
+                response = getattr(self._filesystem(redirector), name)(*args, **kwargs)
+                status = response[0] if isinstance(response, tuple) else response
+                if status.ok or status.code not in FAILOVER_CODES:
+                    if redirector != self._manager.current:
+                        log.warning(f'Failover: {self._manager.current} -> {redirector}')
+                        self._manager.current = redirector
+                        self._manager.save()
+                    return response
+                log.warning(f'{name} on {redirector} failed ({status.message}), trying the next redirector.')
+                self._manager._record(redirector, False, time.perf_counter() - start)
+            self._manager.save()
+            return response
+
+        return _with_failover
+
+
+########################## Examples #############################
+# manager = RedirectorManager(probe_path='/store/user/<username>/')
+# redirector = manager.activate()  # probes all candidates, the fastest healthy one is used
+# ls(redirector, '/store/user/<username>/')  # timeouts of reads fail over to the next candidate
@@ -1,41 +1,519 @@
+import csv
+import fnmatch
+import heapq
+import importlib
+import json
 import logging
-from typing import Tuple, Dict, Any, List
-# import argparse
+import os
+import posixpath
+import re
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import accumulate
+from typing import Tuple, Dict, Any, List, Iterable, Iterator, Optional, NamedTuple
+
+from xrootd_metrics import metrics, InstrumentedFileSystem
+
+
+########## lazy imports ###############
+class _LazyImport:
+    """
+    Placeholder for a module (or an attribute of a module), which is imported on the first attribute access.
+    Importing the XRootD bindings loads the client library, which is noticeable from CVMFS.
+    This way, it is only paid once the first request is sent (and not at all for e.g. --help).
+
+    Parameters
+    ----------
+    module    : str
+    attribute : str
+        e.g. the flags class within the module
+    """
 
+    def __init__(self, module: str, attribute: Optional[str] = None) -> None:
+        self._module = module
+        self._attribute = attribute
+        self._target = None
 
-from XRootD import client
-from XRootD.client.flags import DirListFlags, OpenFlags, MkDirFlags, QueryCode
+    def _resolve(self) -> Any:
+        if self._target is None:
+            target = importlib.import_module(self._module)
+            self._target = target if self._attribute is None else getattr(target, self._attribute)
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def replace(self, target: Any) -> None:
+        """
+        Uses <target> instead of the module (e.g. the stand-ins of xrootd_mock), None imports the module again.
+        """
+        self._target = target
+
+
+client = _LazyImport('XRootD.client')
+DirListFlags = _LazyImport('XRootD.client.flags', 'DirListFlags')
+OpenFlags = _LazyImport('XRootD.client.flags', 'OpenFlags')
+MkDirFlags = _LazyImport('XRootD.client.flags', 'MkDirFlags')
+QueryCode = _LazyImport('XRootD.client.flags', 'QueryCode')
 
 
 ##################################
-# Comment in for CLI usage without argparse
-##################################
-# redirector = 'root://cmsxrootd-kit.gridka.de/'
-# user = <username> in /store/<username>
+# For the command line (subcommands and batch files) see xrootd_cli.py
 ##################################
 
-""" #### for the standalone version with cli arguments, comment in:
-parser = argparse.ArgumentParser(
-                    description = 'xrootd python bindings for dummies')
-parser.add_argument('-r', '--redirector', help='root://xrd-redirector:1094/', required=True)
-parser.add_argument('-u', '--user', help='cms username', required=True)
-parser.add_argument('-l', '--loglevel', help='python loglevel={"INFO", "VERBOSE", "DEBUG"}', default='INFO')
-args = vars(parser.parse_args())
-
-##################################################
-redirector = args["redirector"]  # '<redirector>'
-user = args["user"]  # '<username>'
-loglevel = args["loglevel"]
-##################################################
-"""
-
 ########## logging ###############
-loglevel = 'INFO'
-
-FORMAT = '%(message)s'
-logging.basicConfig(format=FORMAT)
+# the logging is configured by the application (see xrootd_interactive.py or the examples below),
+# importing this module has no side effects
 log = logging.getLogger()
-log.setLevel(loglevel)
+
+
+########## session pool ###############
+class SessionPool:
+    """
+    Pool of client.FileSystem objects keyed by the redirector.
+    All helpers in this module take the FileSystem from the pool instead of
+    creating a fresh client per call, so that the connection (and login)
+    to the redirector is reused for the whole session.
+
+    The FileSystem objects of the bindings are thread safe,
+    therefore one object per redirector is sufficient.
+
+    The backend is pluggable (see set_backend), e.g. to run against the
+    in-memory FileSystem of xrootd_mock for benchmarks.
+    Every FileSystem is wrapped by InstrumentedFileSystem, so that all calls are recorded (see xrootd_metrics).
+    """
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._backend = None  # None: client.FileSystem
+
+    def set_backend(self, factory: Any = None) -> None:
+        """
+        Sets the factory which creates the FileSystem for a redirector.
+        All existing sessions are dropped.
+
+        Parameters
+        ----------
+        factory : callable
+            factory(redirector) -> FileSystem like object; None restores client.FileSystem
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._backend = factory
+            self._sessions.clear()
+        return None
+
+    def new(self, redirector: str) -> Any:
+        """
+        Creates a FileSystem for <redirector> with the current backend, without adding it to the pool.
+
+        Parameters
+        ----------
+        redirector : str
+
+        Returns
+        -------
+        client.FileSystem
+            wrapped by InstrumentedFileSystem
+        """
+        factory = client.FileSystem if self._backend is None else self._backend
+        return InstrumentedFileSystem(factory(redirector), metrics)
+
+    def get(self, redirector: str) -> Any:
+        """
+        Returns the FileSystem for <redirector>. It is created on first use.
+
+        Parameters
+        ----------
+        redirector : str
+
+        Returns
+        -------
+        client.FileSystem
+        """
+        with self._lock:
+            if redirector not in self._sessions:
+                log.debug(f'[session pool] new session for {redirector}')
+                self._sessions[redirector] = self.new(redirector)
+            return self._sessions[redirector]
+
+    def register(self, redirector: str, filesystem: Any) -> None:
+        """
+        Uses <filesystem> for all requests to <redirector>, e.g. a FileSystem with failover
+        (see xrootd_redirectors). It is dropped by set_backend and close.
+
+        Parameters
+        ----------
+        redirector : str
+        filesystem : FileSystem like object
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._sessions[redirector] = filesystem
+        return None
+
+    def current_url(self, url: str) -> str:
+        """
+        Returns <url> (redirector + path) with the redirector, which currently serves it.
+        After a failover (see xrootd_redirectors), copies then go to the new redirector as well,
+        while the callers (and the transfer journal) keep using the redirector they were given.
+        Local ("file://") urls and urls of other redirectors are returned unchanged.
+
+        Parameters
+        ----------
+        url : str
+
+        Returns
+        -------
+        str
+        """
+        with self._lock:
+            registered = list(self._sessions.items())
+        for redirector, filesystem in registered:
+            if url.startswith(redirector):
+                current = getattr(filesystem, 'current_redirector', None)  # only set by FailoverFileSystem
+                if current is not None and current != redirector:
+                    return current + url[len(redirector):]
+        return url
+
+    def close(self, redirector: str = None) -> None:
+        """
+        Drops the session of <redirector> or all sessions if no redirector is given.
+
+        Parameters
+        ----------
+        redirector : str
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            if redirector is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(redirector, None)
+        return None
+
+
+sessions = SessionPool()
+
+
+########## listing cache ###############
+class ListingCache:
+    """
+    In-process cache for directory listings with a TTL and LRU eviction.
+    It is used by the interactive navigation, so that going back to a directory,
+    which was listed seconds ago, does not cost another dirlist.
+    The listings also provide the file/dir type of each child without stating it.
+
+    Every function, which modifies the remote namespace (rm, rmdir, mv, mkdir, copy),
+    invalidates the affected listings.
+    """
+
+    def __init__(self, ttl=30., maxsize=128) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._listings: OrderedDict = OrderedDict()  # (redirector, directory) -> (timestamp, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(redirector: str, directory: str) -> Tuple[str, str]:
+        return redirector, directory.rstrip('/') + '/'
+
+    def get(self, redirector: str, directory: str) -> Optional[Any]:
+        """
+        Returns the cached listing of <directory> or None if it is not cached or expired.
+
+        Parameters
+        ----------
+        redirector : str
+        directory  : str
+
+        Returns
+        -------
+        object or None
+        """
+        key = self._key(redirector, directory)
+        with self._lock:
+            if key not in self._listings:
+                return None
+            timestamp, value = self._listings[key]
+            if time.monotonic() - timestamp > self.ttl:
+                del self._listings[key]
+                return None
+            self._listings.move_to_end(key)
+            return value
+
+    def put(self, redirector: str, directory: str, value: Any) -> None:
+        """
+        Stores the listing of <directory>. The least recently used listing is evicted if the cache is full.
+
+        Parameters
+        ----------
+        redirector : str
+        directory  : str
+        value      : object
+
+        Returns
+        -------
+        None
+        """
+        key = self._key(redirector, directory)
+        with self._lock:
+            self._listings[key] = (time.monotonic(), value)
+            self._listings.move_to_end(key)
+            while len(self._listings) > self.maxsize:
+                self._listings.popitem(last=False)
+        return None
+
+    def invalidate(self, redirector: str, path: str, ancestors=False) -> None:
+        """
+        Drops all listings affected by a modification of <path>:
+        the listing of <path> itself, of all cached subdirectories and of the parent directory.
+
+        Parameters
+        ----------
+        redirector : str
+        path       : str
+        ancestors  : bool
+            drop all parent directories as well (e.g. mkdir -p)
+
+        Returns
+        -------
+        None
+        """
+        _, prefix = self._key(redirector, path)
+        parents = set()
+        parent = prefix.rstrip('/').rsplit('/', 1)[0] + '/'
+        parents.add(parent)
+        while ancestors and parent != '/':
+            parent = parent.rstrip('/').rsplit('/', 1)[0] + '/'
+            parents.add(parent)
+        with self._lock:
+            for key in list(self._listings):
+                if key[0] == redirector and (key[1].startswith(prefix) or key[1] in parents):
+                    del self._listings[key]
+        log.debug(f'[listing cache] invalidated {path}')
+        return None
+
+    def entry_type(self, redirector: str, path: str) -> Optional[str]:
+        """
+        Returns the type of <path> from the cached listings without asking the server.
+
+        Parameters
+        ----------
+        redirector : str
+        path       : str
+
+        Returns
+        -------
+        str or None
+            "dir" or "file", None if <path> is not within a cached listing
+        """
+        if self.get(redirector, path) is not None:
+            return 'dir'
+        parent = path.rstrip('/').rsplit('/', 1)[0] + '/'
+        cached = self.get(redirector, parent)
+        if cached is None:
+            return None
+        entry = cached.find(path.rstrip('/').rsplit('/', 1)[-1])
+        if entry is None:
+            return None
+        return 'dir' if entry.is_dir else 'file'
+
+    def clear(self) -> None:
+        with self._lock:
+            self._listings.clear()
+        return None
+
+
+listing_cache = ListingCache()
+
+
+########## location cache ###############
+class LocationCache:
+    """
+    In-process cache of the data server, which serves a file (see locate_servers).
+    Read queries (stat, checksum) can then be sent directly to the data server
+    without asking the redirector again, e.g. stat and verify the same files.
+    Namespace changes (rm, mv, mkdir) always go to the redirector: not every data server
+    serves them (e.g. dCache pools).
+    Entries are dropped after <ttl> seconds or if a request to the data server fails.
+    """
+
+    def __init__(self, ttl=600.) -> None:
+        self.ttl = ttl
+        self._servers: Dict[Tuple[str, str], Tuple[float, str]] = {}  # (redirector, path) -> (timestamp, server)
+        self._lock = threading.Lock()
+
+    def get(self, redirector: str, path: str) -> Optional[str]:
+        with self._lock:
+            cached = self._servers.get((redirector, path))
+            if cached is None or time.monotonic() - cached[0] > self.ttl:
+                return None
+            return cached[1]
+
+    def put(self, redirector: str, path: str, server: str) -> None:
+        with self._lock:
+            self._servers[(redirector, path)] = (time.monotonic(), server)
+        return None
+
+    def invalidate(self, redirector: str, path: str) -> None:
+        with self._lock:
+            self._servers.pop((redirector, path), None)
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._servers.clear()
+        return None
+
+
+location_cache = LocationCache()
+
+
+########## transfer journal ###############
+class TransferJournal:
+    """
+    On-disk journal of finished transfers, so that an interrupted batch copy or chunked download
+    can be repeated without transferring the finished work again.
+    The journal is append-only (one json object per line) and written after every finished file/range,
+    an incomplete last line (e.g. after a crash) is ignored.
+
+    A finished file is skipped if its local copy (source for uploads, destination for downloads)
+    still has the recorded size. The finished ranges of a chunked download are only reused if size and
+    mtime of the remote file and the chunk size did not change. Delete the journal for a fresh start.
+
+    Parameters
+    ----------
+    path : str
+        journal file, e.g. transfers.journal
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._files: Dict[Tuple[str, str], int] = {}  # (source, dest) -> size of the local copy
+        self._downloads: Dict[Tuple[str, str], Tuple[List, set]] = {}  # (source, dest) -> (stamp, offsets)
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    log.debug(f'[journal] incomplete record in {self.path} skipped.')
+                    continue
+                if 'file' in record:
+                    self._files[tuple(record['file'])] = record['size']
+                elif 'download' in record:
+                    self._downloads[tuple(record['download'])] = (record['stamp'], set())
+                elif 'range' in record and tuple(record['range']) in self._downloads:
+                    self._downloads[tuple(record['range'])][1].add(record['offset'])
+        log.debug(f'[journal] {self.path}: {len(self._files)} files, {len(self._downloads)} chunked downloads')
+        return None
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        # called with the lock held
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        return None
+
+    def is_done(self, source: str, dest: str, local_path: str) -> bool:
+        """
+        Checks if <source> -> <dest> was finished and <local_path> still has the recorded size.
+        """
+        with self._lock:
+            size = self._files.get((source, dest))
+        return size is not None and os.path.isfile(local_path) and os.path.getsize(local_path) == size
+
+    def add_file(self, source: str, dest: str, local_path: str) -> None:
+        """
+        Records <source> -> <dest> as finished, with the current size of <local_path>.
+        """
+        size = os.path.getsize(local_path)
+        with self._lock:
+            self._files[(source, dest)] = size
+            self._downloads.pop((source, dest), None)
+            self._append({'file': [source, dest], 'size': size})
+        return None
+
+    def finished_ranges(self, source: str, dest: str, stamp: List, resume=True) -> set:
+        """
+        Returns the offsets of the finished ranges of a chunked download.
+        If <stamp> (remote size, mtime, chunk size) changed, the download starts from scratch.
+
+        Parameters
+        ----------
+        source : str
+        dest   : str
+        stamp  : list
+        resume : bool
+            False: forget the finished ranges (e.g. the partial file is gone)
+
+        Returns
+        -------
+        set
+            offsets of the finished ranges
+        """
+        with self._lock:
+            if resume and (source, dest) in self._downloads and self._downloads[(source, dest)][0] == stamp:
+                return set(self._downloads[(source, dest)][1])
+            self._downloads[(source, dest)] = (stamp, set())
+            self._append({'download': [source, dest], 'stamp': stamp})
+            return set()
+
+    def add_range(self, source: str, dest: str, offset: int) -> None:
+        """
+        Records the range at <offset> of the chunked download <source> -> <dest> as finished.
+        """
+        with self._lock:
+            self._downloads[(source, dest)][1].add(offset)
+            self._append({'range': [source, dest], 'offset': offset})
+        return None
+
+
+class _JournalProgressHandler:
+    """
+    Progress handler for CopyProcess.run, which records every successful job in the journal
+    as soon as it ends (and not only after the whole CopyProcess).
+    It implements the full interface of XRootD.client.utils.CopyProgressHandler
+    (the bindings call all four methods), without importing the bindings.
+    """
+
+    def __init__(self, journal: TransferJournal, jobs: List[Tuple[str, str]], local_paths: List[str]) -> None:
+        self.journal = journal
+        self.jobs = jobs
+        self.local_paths = local_paths
+
+    def begin(self, jobId: int, total: int, source: Any, target: Any) -> None:
+        pass
+
+    def end(self, jobId: int, results: Dict[str, Any]) -> None:
+        if results['status'].ok:
+            source, target = self.jobs[jobId - 1]  # the jobs are numbered from 1
+            self.journal.add_file(source, target, self.local_paths[jobId - 1])
+
+    def update(self, jobId: int, processed: int, total: int) -> None:
+        pass
+
+    def should_cancel(self, jobId: int) -> bool:
+        return False
 
 
 ########## helper functions ###############
@@ -56,7 +534,7 @@ def _check_redirector(redirector: str) -> None:
     -------
     None
     """
-    status, _ = client.FileSystem(redirector).ping()  # not supported for -kit but works for -redirectors
+    status, _ = sessions.get(redirector).ping()  # not supported for -kit but works for -redirectors
     if not status.ok:
         log.critical(f'Status: {status.message}')
     assert status.ok  # redirector not available
@@ -64,6 +542,27 @@ def _check_redirector(redirector: str) -> None:
     return None
 
 
+def _stat(redirector: str, file_or_dir: str) -> Tuple[Any, Any]:
+    """
+    Single FileSystem.stat round trip on <file_or_dir>.
+    All helpers, which need the statinfo and the information whether
+    the path exists, should use this function to avoid stating twice.
+
+    Parameters
+    ----------
+    redirector  : str
+    file_or_dir : str
+
+    Returns
+    -------
+    (object, object)
+        xrd status and statinfo (None if the stat failed)
+    """
+    status, statinfo = sessions.get(redirector).stat(file_or_dir, DirListFlags.STAT)
+    log.debug(f'[stat] status: {status}, statinfo: {statinfo}, {file_or_dir}')
+    return status, statinfo
+
+
 def _exists(redirector: str, file_or_dir: str) -> bool:
     """
     Helper function to check if <file_or_dir> exists.
@@ -77,14 +576,8 @@ def _exists(redirector: str, file_or_dir: str) -> bool:
     -------
     bool
     """
-    myclient = client.FileSystem(redirector)
-    status, listing = myclient.stat(file_or_dir, DirListFlags.STAT)
-    log.debug(f'[exists] status: {status}listing: {listing}, {file_or_dir}')
-    if not status.ok:
-        exists = False
-    else:
-        exists = True
-    return exists
+    status, _ = _stat(redirector, file_or_dir)
+    return bool(status.ok)
 
 
 def _check_file_or_directory(redirector: str, input_path: str) -> str:  # currently only used for ls/stat
@@ -113,11 +606,15 @@ def _check_file_or_directory(redirector: str, input_path: str) -> str:  # curren
     _type       : str
         "dir" for directories, "file" for files
     """
-    myclient = client.FileSystem(redirector)
-    status, listing = myclient.stat(input_path, DirListFlags.STAT)  # use .stat!
+    _type = listing_cache.entry_type(redirector, input_path)  # no server call if the parent is cached
+    if _type is not None:
+        log.debug(f'[check_file_or_directory] {input_path} is a {_type} (cached)')
+        return _type
+
+    status, listing = _stat(redirector, input_path)  # use .stat!
 
     # check if file or dir exists
-    if not _exists(redirector, input_path):
+    if not status.ok:
         log.debug(f'[check_file_or_directory] Status: {status}')
         exit('The file or directory does not exist!')
 
@@ -174,82 +671,483 @@ def _is_file(redirector: str, filepath: str) -> bool:
 ###############################################
 
 
-def _get_directory_listing(redirector: str, directory: str) -> Tuple[Dict[str, int], Any]:
+########## compact listing ###############
+class ListingEntry(NamedTuple):
     """
-    Returns the files and directories within a directory as a dict.
+    One entry of a Listing.
+
+    name    : name within the parent directory
+    path    : full path (directories with a trailing "/")
+    size    : size in Byte (512 for directories)
+    modtime : modification time (unix timestamp)
+    flags   : xrd stat flags (see _check_file_or_directory)
+    """
+    name: str
+    path: str
+    size: int
+    modtime: int
+    flags: int
+
+    @property
+    def is_dir(self) -> bool:
+        return self.flags == 51 or self.flags == 19
+
+    @property
+    def modtimestr(self) -> str:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self.modtime))
+
+
+class Listing:
+    """
+    Compact, read-only listing of one directory, made for huge directories (millions of entries).
+    The parent is stored once, the names are packed into one utf-8 buffer (separated by NUL,
+    which is not allowed within names) and the sizes, mtimes and flags are kept in typed arrays:
+    26 Byte per entry plus the name, instead of a path string, a dict slot and the xrd entry objects.
+
+    The directories come first, then the files, both in the order of the server. Therefore the dirs/files
+    views are O(1) and slicing (listing[100:200], listing.files[:50]) returns a view on the same buffers,
+    nothing is copied. The entries (ListingEntry) are only created while iterating.
+    Sorted iteration (by name, size or mtime) uses an index array, which is computed on first use
+    and shared by all views of the listing.
+
+    Parameters
+    ----------
+    parent   : str
+        directory with a trailing "/"
+    names    : bytes
+        packed utf-8 names, each one enclosed by NUL
+    offsets  : array
+        start of each name within <names> (one more than entries)
+    sizes    : array
+    modtimes : array
+    flags    : array
+    n_dirs   : int
+        number of directories (the first entries)
+    start    : int
+    stop     : int
+        the entries of this view
+    orders   : dict
+        cache of the sorted index arrays (shared by the views)
+    """
+    __slots__ = ('parent', '_names', '_offsets', '_sizes', '_modtimes', '_flags', '_n_dirs', '_start', '_stop',
+                 '_orders')
+
+    SORT_KEYS = ('name', 'size', 'modtime')
+
+    def __init__(self, parent: str, names: bytes, offsets: array, sizes: array, modtimes: array, flags: array,
+                 n_dirs: int, start=0, stop: Optional[int] = None, orders: Optional[Dict] = None) -> None:
+        self.parent = parent
+        self._names = names
+        self._offsets = offsets
+        self._sizes = sizes
+        self._modtimes = modtimes
+        self._flags = flags
+        self._n_dirs = n_dirs
+        self._start = start
+        self._stop = len(sizes) if stop is None else stop
+        self._orders = {} if orders is None else orders
+
+    @classmethod
+    def from_dirlist(cls, dirlist: Any) -> 'Listing':
+        """
+        Packs the output of FileSystem.dirlist (with DirListFlags.STAT).
+        Note: The type is taken from the flags of the dirlist, no entry is stated.
+
+        Parameters
+        ----------
+        dirlist : object
+            xrd output of FileSystem.dirlist
+
+        Returns
+        -------
+        Listing
+        """
+        # names, sizes, modtimes, flags
+        dirs: Tuple[List[str], array, array, array] = ([], array('q'), array('q'), array('B'))
+        files: Tuple[List[str], array, array, array] = ([], array('q'), array('q'), array('B'))
+        for entry in dirlist:
+            statinfo = entry.statinfo
+            if statinfo.flags == 51 or statinfo.flags == 19:
+                # directories have a size of 512
+                assert (statinfo.size == 512)  # just to make sure for the recursive stuff
+                group = dirs
+            elif statinfo.flags == 48 or statinfo.flags == 16:
+                group = files
+            else:
+                log.debug(f'[get_directory_listing] Info: {entry}')
+                exit("Unknown flags. RO files, strange permissions?")
+            group[0].append(entry.name)
+            group[1].append(statinfo.size)
+            group[2].append(statinfo.modtime)
+            group[3].append(statinfo.flags)
+
+        names = dirs[0] + files[0]
+        joined = '\0'.join(names)
+        lengths = map(len, names) if joined.isascii() else (len(name.encode()) for name in names)
+        offsets = array('Q', accumulate((length + 1 for length in lengths), initial=1))
+        return cls(dirlist.parent, ('\0' + joined + '\0').encode(), offsets, dirs[1] + files[1], dirs[2] + files[2],
+                   dirs[3] + files[3], len(dirs[0]))
+
+    def _view(self, start: int, stop: int) -> 'Listing':
+        return Listing(self.parent, self._names, self._offsets, self._sizes, self._modtimes, self._flags,
+                       self._n_dirs, start, max(start, stop), self._orders)
+
+    def _name(self, i: int) -> str:
+        return self._names[self._offsets[i]:self._offsets[i + 1] - 1].decode()
+
+    def _entry(self, i: int) -> ListingEntry:
+        name = self._name(i)
+        is_dir = i < self._n_dirs
+        return ListingEntry(name, self.parent + name + ('/' if is_dir else ''), self._sizes[i], self._modtimes[i],
+                            self._flags[i])
+
+    @property
+    def size(self) -> int:
+        # number of entries, like DirectoryList.size
+        return self._stop - self._start
+
+    @property
+    def dirs(self) -> 'Listing':
+        return self._view(self._start, min(self._stop, self._n_dirs))
+
+    @property
+    def files(self) -> 'Listing':
+        return self._view(max(self._start, self._n_dirs), self._stop)
+
+    @property
+    def sizes(self) -> memoryview:
+        return memoryview(self._sizes)[self._start:self._stop]
+
+    @property
+    def modtimes(self) -> memoryview:
+        return memoryview(self._modtimes)[self._start:self._stop]
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('Listing views are contiguous, no step allowed.')
+            return self._view(self._start + start, self._start + stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Listing index out of range')
+        return self._entry(self._start + index)
+
+    def _blocks(self, block_size=4096) -> Iterator[Tuple[int, List[str]]]:
+        # decodes the names block-wise (one decode and split per block instead of one slice per name)
+        for start in range(self._start, self._stop, block_size):
+            stop = min(start + block_size, self._stop)
+            yield start, self._names[self._offsets[start]:self._offsets[stop] - 1].decode().split('\0')
+
+    def __iter__(self) -> Iterator[ListingEntry]:
+        parent, n_dirs, sizes, modtimes, flags = self.parent, self._n_dirs, self._sizes, self._modtimes, self._flags
+        for start, names in self._blocks():
+            for i, name in enumerate(names, start):
+                yield ListingEntry(name, parent + name + ('/' if i < n_dirs else ''), sizes[i], modtimes[i], flags[i])
+
+    def names(self) -> Iterator[str]:
+        for _, names in self._blocks():
+            yield from names
+
+    def paths(self) -> Iterator[str]:
+        for start, names in self._blocks():
+            for i, name in enumerate(names, start):
+                yield self.parent + name + ('/' if i < self._n_dirs else '')
+
+    def order(self, key='name', reverse=False) -> array:
+        """
+        Positions (within this view) of the entries sorted by <key>.
+        The directories and files are sorted separately, the directories stay first.
+        Computed once per key and view range, then taken from the cache of the listing.
+
+        Parameters
+        ----------
+        key     : str
+            "name", "size" or "modtime"
+        reverse : bool
+            descending, e.g. the largest or newest entries first
+
+        Returns
+        -------
+        array
+        """
+        if key not in self.SORT_KEYS:
+            raise ValueError(f'Unknown sort key {key}. Available: {self.SORT_KEYS}')
+        cached = self._orders.get((key, reverse, self._start, self._stop))
+        if cached is not None:
+            return cached
+        order = array('Q')
+        for start, stop in ((self._start, min(self._stop, self._n_dirs)), (max(self._start, self._n_dirs), self._stop)):
+            if key == 'name':
+                # decoded once (block-wise) for the sort, faster than one slice per key
+                names = list(self._view(start, stop).names())
+                positions = sorted(range(stop - start), key=names.__getitem__, reverse=reverse)
+                del names
+                order.extend(position + start - self._start for position in positions)
+                continue
+            values = self._sizes if key == 'size' else self._modtimes
+            order.extend(i - self._start for i in sorted(range(start, stop), key=values.__getitem__, reverse=reverse))
+        self._orders[(key, reverse, self._start, self._stop)] = order
+        return order
+
+    def take(self, positions: Iterable[int]) -> Iterator[ListingEntry]:
+        """
+        The entries at <positions> (within this view), e.g. one page of order or search.
+        """
+        for position in positions:
+            yield self._entry(self._start + position)
+
+    def iter_sorted(self, key='name', reverse=False) -> Iterator[ListingEntry]:
+        """
+        Iterates over the entries sorted by <key> (see order),
+        e.g. files.iter_sorted('size', reverse=True) for the largest files.
+        """
+        return self.take(self.order(key, reverse))
+
+    def search(self, query: str, fuzzy=False) -> array:
+        """
+        Positions (within this view) of the entries, whose name starts with <query> (case sensitive).
+        fuzzy=True: the name contains the characters of <query> in this order (case insensitive),
+        ranked by prefix matches, then substring matches, then the shortest names.
+        One regular expression over the packed names, only the matches are looked at.
+
+        Parameters
+        ----------
+        query : str
+        fuzzy : bool
+
+        Returns
+        -------
+        array
+            in the order of the listing (fuzzy: ranked), all positions for an empty <query>
+        """
+        if len(query) == 0:
+            return array('Q', range(len(self)))
+        first, last = self._offsets[self._start] - 1, self._offsets[self._stop]
+        if not fuzzy:
+            pattern = re.compile(re.escape(b'\0' + query.encode()))
+            return array('Q', (bisect_left(self._offsets, match.start() + 1) - self._start
+                               for match in pattern.finditer(self._names, first, last)))
+
+        key = query.lower().encode()
+        pattern = re.compile(b'(?<=\0)[^\0]*?' + b'[^\0]*?'.join(re.escape(char.encode()) for char in query) +
+                             b'[^\0]*(?=\0)', re.IGNORECASE)
+        ranked = []
+        for match in pattern.finditer(self._names, first, last):
+            name = match.group().lower()
+            rank = 0 if name.startswith(key) else 1 if key in name else 2
+            ranked.append((rank, len(name), bisect_left(self._offsets, match.start()) - self._start))
+        ranked.sort()
+        return array('Q', (position for _, _, position in ranked))
+
+    def find(self, name: str) -> Optional[ListingEntry]:
+        """
+        Looks up an entry by its name or full path (one search within the packed names).
+
+        Parameters
+        ----------
+        name : str
+            name within the parent or full path (directories with or without a trailing "/")
+
+        Returns
+        -------
+        ListingEntry or None
+            None if there is no such entry within this view
+        """
+        if name.startswith(self.parent):
+            name = name[len(self.parent):]
+        name = name.rstrip('/')
+        position = self._names.find(b'\0' + name.encode() + b'\0') if len(name) > 0 else -1
+        if position < 0:
+            return None
+        i = bisect_left(self._offsets, position + 1)
+        if not self._start <= i < self._stop:
+            return None
+        return self._entry(i)
+
+    def __contains__(self, name: Any) -> bool:
+        return isinstance(name, str) and self.find(name) is not None
+
+    def __repr__(self) -> str:
+        return f'<Listing {self.parent}: {len(self.dirs)} dirs, {len(self.files)} files>'
+
+
+def _get_directory_listing(redirector: str, directory: str, use_cache=True) -> Listing:
+    """
+    Returns the files and directories within a directory as compact Listing.
     Note: A small workaround is used for the type check to spare the storage servers
+    The result is taken from/stored in the listing cache if use_cache=True.
 
     Parameters
     ----------
     redirector : str
     directory  : str
+    use_cache  : bool
 
     Returns
     -------
-    (dict, object)
-        contains the full directory listing (dirs and files) and the xrd output
+    Listing
+        contains the full directory listing (dirs and files)
     """
-    dir_dict = {}
-    myclient = client.FileSystem(redirector)
-    status, listing = myclient.dirlist(directory, DirListFlags.STAT)
+    if use_cache:
+        cached = listing_cache.get(redirector, directory)
+        if cached is not None:
+            log.debug(f'[get_directory_listing] {directory} (cached)')
+            return cached
+
+    status, dirlist = sessions.get(redirector).dirlist(directory, DirListFlags.STAT)
     log.debug(f'[get_directory_listing] Status: {status.message}')
     if not status.ok:
         log.critical(f'[get_directory_listing] Status: {status.message}')
     assert status.ok  # directory or redirector faulty
 
-    for entry in listing:
-        #####################################################################################
-        # the correct way would be to check each file:                                      #
-        # if _check_file_or_directory(redirector, listing.parent + entry.name) == 'file':   #
-        #    dir_listing[f"{listing.parent + entry.name}"] = 0                              #
-        # elif _check_file_or_directory(redirector, listing.parent + entry.name) == 'dir':  #
-        #    dir_listing[f"{listing.parent + entry.name}"] = 1                              #
-        #####################################################################################
-        # faster way to check if file or dir: less DDOS with only one query
-        if entry.statinfo.flags == 51 or entry.statinfo.flags == 19:
-            # directories have a size of 512
-            assert (entry.statinfo.size == 512)  # just to make sure for the recursive stuff
-            dir_dict[f"{listing.parent + entry.name}/"] = 1
-        elif entry.statinfo.flags == 48 or entry.statinfo.flags == 16:
-            dir_dict[f"{listing.parent + entry.name}"] = 0
-        else:
-            log.debug(f'[get_directory_listing] Info: {entry}')
-            exit("Unknown flags. RO files, strange permissions?")
-    return dir_dict, listing
-
-
-def _get_file_list(dir_dict: dict) -> List:
+    #####################################################################################
+    # the correct way would be to check each file:                                      #
+    # if _check_file_or_directory(redirector, listing.parent + entry.name) == 'file':   #
+    #    dir_listing[f"{listing.parent + entry.name}"] = 0                              #
+    # elif _check_file_or_directory(redirector, listing.parent + entry.name) == 'dir':  #
+    #    dir_listing[f"{listing.parent + entry.name}"] = 1                              #
+    #####################################################################################
+    # faster way to check if file or dir: less DDOS with only one query (see Listing.from_dirlist)
+    listing = Listing.from_dirlist(dirlist)
+    if use_cache:
+        listing_cache.put(redirector, directory, listing)
+    return listing
+
+
+def _is_dir_entry(statinfo: Any) -> bool:
     """
-    Helper function to extract the files from a listing.
+    Helper function to check if a dirlist/stat entry is a directory.
+    See _check_file_or_directory for the flags.
 
     Parameters
     ----------
-    dir_dict : dict
-        contains the full directory listing (dirs and files)
+    statinfo : object
+        xrd statinfo of the entry
 
     Returns
     -------
-    list
-        list of files
+    bool
     """
-    return [k for k, v in dir_dict.items() if v == 0]
+    if statinfo.flags == 51 or statinfo.flags == 19:
+        assert statinfo.size == 512  # just to make sure
+        return True
+    return False
 
 
-def _get_dir_list(dir_dict: dict) -> List:
+def walk(redirector: str, top: str, prefetch=8, top_listing: Any = None) -> Iterator[Tuple[str, List, List]]:
     """
-    Helper function to extract the directories from a listing.
+    Recursive directory walk like os.walk (top-down) for the remote storage.
+    The tree is traversed iteratively and lazily: Only the directories, which are not listed yet
+    (the frontier), are kept in memory, not the whole tree.
+    Up to <prefetch> dirlists are already in flight (thread pool) while the caller
+    processes the current directory. prefetch=0 lists one directory after the other.
+
+    Like for os.walk, the caller can remove entries from <dirs> (in-place!) to skip these subdirectories.
+    A directory is always yielded before its subdirectories.
 
     Parameters
     ----------
-    dir_dict : dict
-        contains the full directory listing (dirs and files)
+    redirector  : str
+    top         : str
+    prefetch    : int
+        number of directory listings requested in advance
+    top_listing : DirectoryList
+        dirlist (with statinfo) of <top>, if the caller has it already; <top> is not listed again
+
+    Yields
+    ------
+    (str, list, list)
+        directory path with a trailing "/", the subdirectories and the files
+        as lists of (name, statinfo)
+    """
+    myclient = sessions.get(redirector)
+    frontier = deque([top if top.endswith('/') else top + '/'])
+
+    def _entries(listing: Any) -> Tuple[List, List]:
+        dirs, files = [], []
+        for entry in listing:
+            if _is_dir_entry(entry.statinfo):
+                dirs.append((entry.name, entry.statinfo))
+            else:
+                files.append((entry.name, entry.statinfo))
+        return dirs, files
+
+    def _split(current: str, status: Any, listing: Any) -> Tuple[List, List]:
+        if not status.ok:
+            log.critical(f'[walk] {current} Status: {status.message}')
+        assert status.ok  # dirlist failed, does the dir exist?
+        return _entries(listing)
+
+    if top_listing is not None:
+        current = frontier.pop()
+        dirs, files = _entries(top_listing)
+        yield current, dirs, files
+        frontier.extend(current + name + '/' for name, _ in reversed(dirs))
+
+    if prefetch < 1:
+        while frontier:
+            current = frontier.pop()
+            dirs, files = _split(current, *myclient.dirlist(current, DirListFlags.STAT))
+            yield current, dirs, files
+            frontier.extend(current + name + '/' for name, _ in reversed(dirs))
+        return
+
+    with ThreadPoolExecutor(max_workers=prefetch) as pool:
+        in_flight = {}
+
+        def _top_up() -> None:
+            while frontier and len(in_flight) < prefetch:
+                directory = frontier.pop()  # depth first keeps the frontier small
+                in_flight[pool.submit(myclient.dirlist, directory, DirListFlags.STAT)] = directory
+
+        _top_up()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                current = in_flight.pop(future)
+                dirs, files = _split(current, *future.result())
+                _top_up()  # keep the pool busy while the caller works
+                yield current, dirs, files
+                frontier.extend(current + name + '/' for name, _ in reversed(dirs))
+                _top_up()
+
+
+def _dir_sizes(redirector: str, directory: str, max_workers=8, top_listing: Any = None) -> Dict[str, int]:
+    """
+    Size of <directory> and all its subdirectories, calculated
+    from one concurrent traversal (see walk).
+
+    Parameters
+    ----------
+    redirector  : str
+    directory   : str
+    max_workers : int
+        maximum number of parallel dirlist requests (prefetch of walk)
+    top_listing : DirectoryList
+        dirlist of <directory>, if it is known already (see walk)
 
     Returns
     -------
-    list
-        list of directories
+    dict
+        size in Byte of every (sub)directory including its subdirectories,
+        keyed by the directory path with a trailing "/"
     """
-    return [k for k, v in dir_dict.items() if v == 1]
+    sizes = {}  # files directly within the directory
+    parents = {}  # subdirectory -> parent directory
+    for current, dirs, files in walk(redirector, directory, max_workers, top_listing):
+        sizes[current] = sum(statinfo.size for _, statinfo in files)
+        for name, _ in dirs:
+            parents[current + name + '/'] = current
+
+    # aggregate bottom-up: deepest directories first
+    for subdir in sorted(parents, key=lambda d: d.count('/'), reverse=True):
+        sizes[parents[subdir]] += sizes[subdir]
+    return sizes
 
 ###########################################
 
@@ -290,11 +1188,10 @@ def stat(redirector: str, input_path: str) -> None:
     """
     #############################################################################
 
-    myclient = client.FileSystem(redirector)
-    status, listing = myclient.stat(input_path, DirListFlags.STAT)  # use FS.stat!
+    status, listing = _stat(redirector, input_path)  # use FS.stat!
 
     # check if file or dir exists
-    if not _exists(redirector, input_path):
+    if not status.ok:
         log.debug(f'[stat] Status: {status}')
         log.info('The file or directory does not exist!')
         return None
@@ -311,7 +1208,7 @@ def stat(redirector: str, input_path: str) -> None:
     return None
 
 
-def stat_dir(redirector: str, directory: str, show_output=True, get_size=False) -> int:
+def stat_dir(redirector: str, directory: str, show_output=True, get_size=False, max_workers=8) -> int:
     """
     xrdfs binding for stat on <directory>
 
@@ -321,6 +1218,8 @@ def stat_dir(redirector: str, directory: str, show_output=True, get_size=False)
     directory   : str
     show_output : bool
     get_size    : bool
+    max_workers : int
+        parallel dirlist requests for the size calculation
 
     Returns
     -------
@@ -328,8 +1227,7 @@ def stat_dir(redirector: str, directory: str, show_output=True, get_size=False)
         directory size if get_size=True, else 0
     """
 
-    myclient = client.FileSystem(redirector)
-    status, listing = myclient.dirlist(directory, DirListFlags.STAT)
+    status, listing = sessions.get(redirector).dirlist(directory, DirListFlags.STAT)
     if not status.ok:
         log.critical(f'[stat dir] Status: {status.message}')
     assert status.ok  # stat on dir failed, does the dir exist?
@@ -350,18 +1248,13 @@ def stat_dir(redirector: str, directory: str, show_output=True, get_size=False)
         log.debug(f'[stat dir] status: {status}')
 
     if get_size:
-        for entry in listing:
-            if entry.statinfo.size == 512:
-                assert (entry.statinfo.flags == 51 or entry.statinfo.flags == 19)  # make sure it's a directory
-                dirsize += dir_size(redirector, listing.parent + entry.name, False)
-            else:
-                dirsize += entry.statinfo.size
+        dirsize = _dir_sizes(redirector, listing.parent, max_workers, top_listing=listing)[listing.parent]
     return dirsize
 
 
-def dir_size(redirector: str, directory: str, show_output=True) -> int:
+def dir_size(redirector: str, directory: str, show_output=True, max_workers=8) -> int:
     """
-    Returns the directory size, calculated by the stat_dir function.
+    Returns the directory size, calculated by a concurrent traversal (see _dir_sizes).
     To prevent spam, the subdirectories with sizes are only listed on DEBUG loglevel.
 
     Parameters
@@ -369,20 +1262,254 @@ def dir_size(redirector: str, directory: str, show_output=True) -> int:
     redirector  : str
     directory   : str
     show_output : bool
+    max_workers : int
+        maximum number of parallel dirlist requests
 
     Returns
     -------
     int
         directory size in Byte
     """
-    dirsize = stat_dir(redirector, directory, False, True)  # don't show output, get size
+    sizes = _dir_sizes(redirector, directory, max_workers)
+    for subdir, subdir_size in sorted(sizes.items()):
+        log.debug(f'[Debug] Directory size of {subdir}: GiB: {subdir_size / (1 << 30)}')
+    dirsize = sizes[directory if directory.endswith('/') else directory + '/']
     GiB = dirsize / (1 << 30)
-    log.debug(f'[Debug] Directory size of {directory}: GiB: {GiB}')
     if show_output:
         log.info(f'Byte: {dirsize} (GiB: {GiB}G)')
     return dirsize
 
 
+def dir_size_incremental(redirector: str, directory: str, cache_file: str, show_output=True, max_workers=8) -> int:
+    """
+    Incremental version of dir_size for regular (e.g. daily) reports.
+    The per-directory results of the previous run are kept in <cache_file> (json) together
+    with the size and modtime of each directory.
+    A directory is only listed again if its size/modtime changed (or if it is new).
+    The size/modtime is taken from the dirlist of the parent, if the parent was listed,
+    else the directory is stated, which is much cheaper than the dirlist with statinfo of all its files.
+    Unchanged directories are taken from the cache and the totals are re-aggregated.
+
+    Note: A directory's modtime only changes if entries are created, removed or renamed within it.
+    Files, which are modified in place, are therefore not noticed in unchanged directories.
+    On the dcache (write once) this is not an issue, else run dir_size from time to time.
+
+    Parameters
+    ----------
+    redirector  : str
+    directory   : str
+    cache_file  : str
+        results of the previous run; created if it does not exist
+    show_output : bool
+    max_workers : int
+        maximum number of parallel requests
+
+    Returns
+    -------
+    int
+        directory size in Byte
+    """
+    top = directory if directory.endswith('/') else directory + '/'
+    old_dirs = {}
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cache = json.load(f)
+        if cache.get('redirector') == redirector and cache.get('top') == top:
+            old_dirs = cache['dirs']
+        else:
+            log.warning(f'{cache_file} belongs to a different directory. Starting from scratch.')
+
+    myclient = sessions.get(redirector)
+    new_dirs = {}  # directory -> {'stat': [size, modtime], 'files': size of the files, 'subdirs': [names]}
+    n_listed = 0
+    n_reused = 0
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        pending = {pool.submit(myclient.stat, top, DirListFlags.STAT): ('stat', top, None)}
+
+        def _check(path: str, dir_stat: List) -> None:
+            # list the directory if it changed, else take it from the cache and check its subdirectories
+            nonlocal n_reused
+            old_entry = old_dirs.get(path)
+            if old_entry is None or old_entry['stat'] != dir_stat:
+                pending[pool.submit(myclient.dirlist, path, DirListFlags.STAT)] = ('dirlist', path, dir_stat)
+                return None
+            new_dirs[path] = old_entry
+            n_reused += 1
+            for name in old_entry['subdirs']:
+                subdir = path + name + '/'
+                pending[pool.submit(myclient.stat, subdir, DirListFlags.STAT)] = ('stat', subdir, None)
+            return None
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, current, dir_stat = pending.pop(future)
+                status, response = future.result()
+                if not status.ok:
+                    log.critical(f'[dir size incremental] {kind} {current} Status: {status.message}')
+                assert status.ok  # directory removed during the run?
+
+                if kind == 'stat':
+                    _check(current, [response.size, response.modtime])
+                    continue
+                n_listed += 1
+                new_dirs[current] = {'stat': dir_stat, 'files': 0, 'subdirs': []}
+                for entry in response:
+                    if _is_dir_entry(entry.statinfo):
+                        new_dirs[current]['subdirs'].append(entry.name)
+                        _check(current + entry.name + '/', [entry.statinfo.size, entry.statinfo.modtime])
+                    else:
+                        new_dirs[current]['files'] += entry.statinfo.size
+
+    # aggregate bottom-up: deepest directories first
+    sizes = {path: entry['files'] for path, entry in new_dirs.items()}
+    for path in sorted(sizes, key=lambda d: d.count('/'), reverse=True):
+        if path != top:
+            sizes[path.rstrip('/').rsplit('/', 1)[0] + '/'] += sizes[path]
+
+    with open(cache_file + '.tmp', 'w') as f:
+        json.dump({'redirector': redirector, 'top': top, 'dirs': new_dirs}, f)
+    os.replace(cache_file + '.tmp', cache_file)  # do not leave a broken cache behind
+
+    log.debug(f'[dir size incremental] listed: {n_listed}, taken from cache: {n_reused}')
+    for subdir, subdir_size in sorted(sizes.items()):
+        log.debug(f'[Debug] Directory size of {subdir}: GiB: {subdir_size / (1 << 30)}')
+    dirsize = sizes[top]
+    GiB = dirsize / (1 << 30)
+    if show_output:
+        log.info(f'Byte: {dirsize} (GiB: {GiB}G), {n_listed} directories listed, {n_reused} taken from {cache_file}')
+    return dirsize
+
+
+REPORT_COLUMNS = ['path', 'depth', 'size', 'files', 'dirs', 'oldest', 'newest']
+
+
+def usage_report(redirector: str, directory: str, depth=2, top_n=20, max_workers=8, json_file: Optional[str] = None,
+                 csv_file: Optional[str] = None, show_output=True) -> Dict[str, Any]:
+    """
+    du-like usage report of a directory tree from one concurrent traversal (see walk):
+    size, number of files and subdirectories and the oldest/newest file modtime of every directory
+    up to <depth> levels below <directory> (deeper directories are included in their ancestor),
+    the <top_n> largest directories and files, the <top_n> oldest files and the directories,
+    which contain only old data (sorted by their newest file).
+    Only the aggregates up to <depth> and the top lists are kept in memory, not the whole tree.
+
+    Parameters
+    ----------
+    redirector  : str
+    directory   : str
+    depth       : int
+        levels of subdirectories within the report (0: only <directory>)
+    top_n       : int
+        length of the top lists
+    max_workers : int
+        maximum number of parallel dirlist requests (prefetch of walk)
+    json_file   : str
+        full report as json
+    csv_file    : str
+        one row per directory (REPORT_COLUMNS, modtimes as unix timestamps)
+    show_output : bool
+
+    Returns
+    -------
+    dict
+        'total', 'dirs' (sorted by path), 'largest_dirs', 'largest_files', 'oldest_files', 'oldest_dirs'
+    """
+    top = directory if directory.endswith('/') else directory + '/'
+    rows: Dict[str, Dict[str, Any]] = {}  # directory (up to <depth>) -> aggregates
+    largest: List[Tuple[int, str, int]] = []  # min-heaps of the top lists: (size, path, modtime)
+    oldest: List[Tuple[int, str, int]] = []  # (-modtime, path, size)
+    for current, dirs, files in walk(redirector, top, max_workers):
+        parts = current[len(top):].split('/')[:-1]
+        key = top + ''.join(part + '/' for part in parts[:depth])
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {'path': key, 'depth': min(len(parts), depth), 'size': 0, 'files': 0, 'dirs': 0,
+                               'oldest': None, 'newest': None}
+        row['dirs'] += len(dirs)
+        for name, statinfo in files:
+            size, modtime = statinfo.size, statinfo.modtime
+            row['size'] += size
+            row['files'] += 1
+            if row['oldest'] is None or modtime < row['oldest']:
+                row['oldest'] = modtime
+            if row['newest'] is None or modtime > row['newest']:
+                row['newest'] = modtime
+            if len(largest) < top_n:
+                heapq.heappush(largest, (size, current + name, modtime))
+            elif size > largest[0][0]:
+                heapq.heapreplace(largest, (size, current + name, modtime))
+            if len(oldest) < top_n:
+                heapq.heappush(oldest, (-modtime, current + name, size))
+            elif -modtime > oldest[0][0]:
+                heapq.heapreplace(oldest, (-modtime, current + name, size))
+
+    # aggregate bottom-up: deepest directories first
+    for path in sorted(rows, key=lambda d: d.count('/'), reverse=True):
+        if path == top:
+            continue
+        row, parent = rows[path], rows[path.rstrip('/').rsplit('/', 1)[0] + '/']
+        for column in ('size', 'files', 'dirs'):
+            parent[column] += row[column]
+        if row['oldest'] is not None:
+            parent['oldest'] = row['oldest'] if parent['oldest'] is None else min(parent['oldest'], row['oldest'])
+            parent['newest'] = row['newest'] if parent['newest'] is None else max(parent['newest'], row['newest'])
+
+    subdirs = [row for path, row in rows.items() if path != top]
+    report = {
+        'redirector': redirector,
+        'top': top,
+        'depth': depth,
+        'created': int(time.time()),
+        'total': rows[top],
+        'dirs': sorted(rows.values(), key=lambda row: row['path']),
+        'largest_dirs': sorted(subdirs, key=lambda row: row['size'], reverse=True)[:top_n],
+        'largest_files': [{'path': path, 'size': size, 'modtime': modtime}
+                          for size, path, modtime in sorted(largest, reverse=True)],
+        'oldest_files': [{'path': path, 'size': size, 'modtime': -modtime}
+                         for modtime, path, size in sorted(oldest, reverse=True)],
+        'oldest_dirs': sorted((row for row in subdirs if row['newest'] is not None),
+                              key=lambda row: row['newest'])[:top_n],
+    }
+
+    if json_file is not None:
+        with open(json_file, 'w') as f:
+            json.dump(report, f, indent=1)
+        log.info(f'{json_file} created.')
+    if csv_file is not None:
+        with open(csv_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(report['dirs'])
+        log.info(f'{csv_file} created.')
+    if show_output:
+        _print_usage_report(report)
+    return report
+
+
+def _print_usage_report(report: Dict[str, Any]) -> None:
+    def _date(modtime: Optional[int]) -> str:
+        return '-' if modtime is None else time.strftime('%Y-%m-%d', time.gmtime(modtime))
+
+    total = report['total']
+    log.info(f'{report["top"]}: GiB: {total["size"] / (1 << 30):.3f}, files: {total["files"]}, '
+             f'directories: {total["dirs"]}, oldest: {_date(total["oldest"])}, newest: {_date(total["newest"])}')
+    log.info(f'--- Largest directories (up to depth {report["depth"]}) ---')
+    for row in report['largest_dirs']:
+        log.info('{0:>12.3f} GiB {1:>10} files  {2}'.format(row['size'] / (1 << 30), row['files'], row['path']))
+    log.info('--- Largest files ---')
+    for row in report['largest_files']:
+        log.info('{0:>12.3f} GiB  {1}  {2}'.format(row['size'] / (1 << 30), _date(row['modtime']), row['path']))
+    log.info('--- Oldest files ---')
+    for row in report['oldest_files']:
+        log.info('{0}  {1:>12.3f} GiB  {2}'.format(_date(row['modtime']), row['size'] / (1 << 30), row['path']))
+    log.info('--- Directories with the oldest data (newest file) ---')
+    for row in report['oldest_dirs']:
+        log.info('{0}  {1:>12.3f} GiB {2:>10} files  {3}'.format(
+            _date(row['newest']), row['size'] / (1 << 30), row['files'], row['path']))
+    return None
+
+
 def ls(redirector: str, input_path: str) -> None:
     """
     xrdfs ls: the exact behavior is mirrored
@@ -407,30 +1534,76 @@ def ls(redirector: str, input_path: str) -> None:
         log.info(f'{input_path}')
         return None
 
-    _, listing = _get_directory_listing(redirector, input_path)
+    _print_listing(_get_directory_listing(redirector, input_path))
+    return None
+
+
+def _print_listing(listing: Listing) -> None:
+    """
+    Prints a listing in the format of xrdfs ls -l.
+
+    Parameters
+    ----------
+    listing : Listing
+        see _get_directory_listing
 
+    Returns
+    -------
+    None
+    """
     log.info(f'{listing.parent}, N: {listing.size}')
     for entry in listing:
         # different way to check if dir or file (see above)
-        if entry.statinfo.size == 512 and '.' not in entry.name:
+        if entry.size == 512 and '.' not in entry.name:
             _is_dir = '(dir)'
-        elif entry.statinfo.size == 512 and '.' in entry.name:
+        elif entry.size == 512 and '.' in entry.name:
             _is_dir = '(dir) [TO BE REVIEWED BECAUSE OF "."]'
             log.debug(f'[ls] entry: {entry}')
-            assert (entry.statinfo.flags == 51 or entry.statinfo.flags == 19)  # to make sure it is a directory; evtl wrong permissions?
+            assert entry.is_dir  # to make sure it is a directory; evtl wrong permissions?
         else:
             _is_dir = '(file)'
         log.info('{0} {1:>10} {2} {3}'.format(
-            entry.statinfo.modtimestr, entry.statinfo.size, entry.name, _is_dir)
+            entry.modtimestr, entry.size, entry.name, _is_dir)
         )
     return None
 
 
 def interactive_ls(redirector: str, directory: str) -> Tuple[List, List]:
-    dir_dict, listing = _get_directory_listing(redirector, directory)
-    dirs = list(_get_dir_list(dir_dict))  # convert to list for type hints...
-    files = list(_get_file_list(dir_dict))  # convert to list for type hints...
-    return dirs, files
+    """
+    The full paths of the directories (with a trailing "/") and files within <directory>.
+    For huge directories, use interactive_listing, which does not build the lists.
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+
+    Returns
+    -------
+    (list, list)
+        directories and files
+    """
+    dirs, files = interactive_listing(redirector, directory)
+    return list(dirs.paths()), list(files.paths())
+
+
+def interactive_listing(redirector: str, directory: str) -> Tuple[Listing, Listing]:
+    """
+    The directories and files within <directory> for the interactive navigation.
+    Both are views on the (cached) listing, nothing is copied.
+
+    Parameters
+    ----------
+    redirector : str
+    directory  : str
+
+    Returns
+    -------
+    (Listing, Listing)
+        directories and files; "path in dirs" checks the type without a stat
+    """
+    listing = _get_directory_listing(redirector, directory)
+    return listing.dirs, listing.files
 
 
 def copy_file_to_remote(redirector: str, source: str, dest: str) -> None:
@@ -453,8 +1626,9 @@ def copy_file_to_remote(redirector: str, source: str, dest: str) -> None:
     -------
     None
     """
-    myclient = client.FileSystem(redirector)
-    status, _ = myclient.copy('file://' + source, redirector + dest, force=False)  # force: overwrite target!
+    status, _ = sessions.get(redirector).copy('file://' + source, sessions.current_url(redirector + dest),
+                                              force=False)  # force: overwrite target!
+    listing_cache.invalidate(redirector, dest)
     log.debug(f'[copy to] Status: {status}')
     if not status.ok:
         log.critical(f'Status: {status.message}')
@@ -483,8 +1657,8 @@ def copy_file_from_remote(redirector: str, remote_source: str, dest: str) -> Non
     -------
     None
     """
-    myclient = client.FileSystem(redirector)
-    status, _ = myclient.copy(redirector + remote_source, 'file://' + dest, force=False)
+    status, _ = sessions.get(redirector).copy(sessions.current_url(redirector + remote_source), 'file://' + dest,
+                                              force=False)
     log.debug(f'[copy from] Status: {status}')
     if not status.ok:
         log.critical(f'Status: {status.message}')
@@ -494,47 +1668,649 @@ def copy_file_from_remote(redirector: str, remote_source: str, dest: str) -> Non
     return None
 
 
-def del_file(redirector: str, filepath: str, user: str, ask=True) -> None:
+def _chunk_ranges(size: int, chunk_size: int) -> List[Tuple[int, int]]:
     """
-    Function to delete files from remote.
-    Note: you have to specify the RW redirector!
+    Splits <size> Byte into (offset, length) ranges of at most <chunk_size> Byte.
+    """
+    chunk_size = max(chunk_size, 1)
+    return [(offset, min(chunk_size, size - offset)) for offset in range(0, size, chunk_size)]
+
+
+def download_chunked(redirector: str, remote_source: str, dest: str, streams=8, chunk_size=1 << 24,
+                     verify=True, journal: Optional[str] = None) -> bool:
+    """
+    Downloads one (large) file with <streams> parallel byte range reads (client.File) instead of one stream.
+    The local file is preallocated and every range is written to its offset. The data goes into
+    <dest>.part, which is renamed to <dest> after the size (and with verify=True the adler32) was checked.
+    Note: vector reads are meant for many small scattered ranges, for contiguous ranges parallel reads are faster.
 
     Parameters
     ----------
-    redirector : str
-    filepath   : str
-    user       : str
-    ask        : bool
+    redirector    : str
+    remote_source : str
+        full remote path, e.g. /store/user/<username>/file.root
+    dest          : str
+        local path including the filename
+    streams       : int
+        number of ranges read at the same time (one open file per stream)
+    chunk_size    : int
+        size of one range in Byte; at most <streams> * <chunk_size> Byte are held in memory
+    verify        : bool
+        compare the adler32 of the local file with the server side checksum
+    journal       : str
+        transfer journal (see TransferJournal); an interrupted download is resumed
+        and only the missing ranges are read
 
     Returns
     -------
-    None
+    bool
+        True if the download was complete (and the checksum matched)
     """
-    myclient = client.FileSystem(redirector)
-    to_be_deleted = redirector + filepath
+    status, statinfo = _stat(redirector, remote_source)
+    if not status.ok:
+        log.critical(f'Status: {status.message}')
+    assert status.ok  # file does not exist?
+    size = statinfo.size
+    ranges = _chunk_ranges(size, chunk_size)
+    part = dest + '.part'
+    url = redirector + remote_source
+    target = 'file://' + os.path.abspath(dest)  # journal keys like for copy_files_from_remote
+    stamp = [size, statinfo.modtime, chunk_size]
+    transfer_journal = None
+    if journal is not None:
+        transfer_journal = TransferJournal(journal)
+        if transfer_journal.is_done(url, target, dest):
+            log.info(f'{remote_source} already copied to {dest} according to {journal}.')
+            return True
+        finished = transfer_journal.finished_ranges(url, target, stamp, resume=os.path.exists(part))
+        ranges = [(offset, length) for offset, length in ranges if offset not in finished]
+        log.info(f'{len(finished)} ranges of {remote_source} already copied according to {journal}.')
+    log.info(f'{remote_source}: {size} Byte in {len(ranges)} ranges with {streams} streams.')
+
+    local = threading.local()
+    opened: List[Any] = []
+    opened_lock = threading.Lock()
+
+    def _read_range(offset: int, length: int) -> bool:
+        if not hasattr(local, 'file'):  # one open file per worker thread
+            local.file = client.File()
+            open_status, _ = local.file.open(sessions.current_url(url), OpenFlags.READ)
+            if not open_status.ok:
+                log.critical(f'[download] open {url} Status: {open_status.message}')
+                return False
+            with opened_lock:
+                opened.append(local.file)
+        with metrics.timed('read', f'{remote_source}@{offset}') as result:
+            read_status, data = local.file.read(offset, length)
+            result.append(read_status)
+        if not read_status.ok or len(data) != length:
+            log.critical(f'[download] {remote_source} range {offset}+{length}: {read_status.message}')
+            return False
+        os.pwrite(fd, data, offset)
+        if transfer_journal is not None:
+            os.fsync(fd)  # the range is on disk before the journal claims it (crash of the machine)
+            transfer_journal.add_range(url, target, offset)
+        log.debug(f'[download] {remote_source} range {offset}+{length} written.')
+        return True
+
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    fd = os.open(part, os.O_WRONLY | os.O_CREAT, 0o644)
+    start = time.monotonic()
+    try:
+        os.ftruncate(fd, size)  # preallocate
+        with ThreadPoolExecutor(max_workers=max(streams, 1)) as pool:
+            ok = all(pool.map(lambda r: _read_range(*r), ranges))
+    finally:
+        os.close(fd)
+        for remote_file in opened:
+            remote_file.close()
+    duration = time.monotonic() - start
+    if not ok:
+        log.critical(f'Download of {remote_source} incomplete, {part} is kept.')
+        return False
+
+    if os.path.getsize(part) != size:
+        log.critical(f'{part}: size {os.path.getsize(part)} instead of {size} Byte.')
+        return False
+    if verify:
+        checksum_status, remote_checksum = _remote_checksum(redirector, remote_source)
+        if not checksum_status.ok:
+            log.warning(f'{remote_source}: no server side checksum ({checksum_status.message}), only the size was checked.')
+        elif _local_adler32(part) != remote_checksum:
+            log.critical(f'{part}: checksum mismatch (remote: {remote_checksum}).')
+            if transfer_journal is not None:
+                transfer_journal.finished_ranges(url, target, stamp, resume=False)  # start over next time
+            return False
+    os.replace(part, dest)
+    if transfer_journal is not None:
+        transfer_journal.add_file(url, target, dest)
+    log.info(f'File {remote_source} copied to {dest} ({size / (1 << 20) / max(duration, 1e-9):.1f} MiB/s).')
+    return True
 
-    # for security reasons... If you want to delete something else, comment this out
-    if user in filepath:
-        log.debug(f'{user} tries to delete {filepath}')
-    else:
-        log.critical('Permission denied. Your username was not found in the filepath!')
-        exit(-1)
 
-    if ask:
-        log.info(f'The following file will be deleted: {filepath}')
-        stat(redirector, filepath)
-    if ask:
-        if str(input(f"Are you sure to delete <{to_be_deleted}>? ")) == 'y':
-            status, _ = myclient.rm(filepath)
-            log.debug(f'[rm] Status: {status}')
-            if not status.ok:
-                log.critical(f'Status: {status.message}')
-            assert status.ok  # file deletion failed; RO redirector?
-        else:
-            log.critical("failed.")
-            return None
-    else:
-        status, _ = myclient.rm(filepath)
+def _run_copy_process(jobs: List[Tuple[str, str]], parallel=4, force=False, journal: Optional[str] = None,
+                      local_paths: Optional[List[str]] = None) -> List[Tuple[str, str, bool]]:
+    """
+    Queues all <jobs> into one client.CopyProcess and runs them with
+    <parallel> jobs at the same time. The per-job status is reported at the end.
+    Missing target directories are created by the CopyProcess.
+
+    Parameters
+    ----------
+    jobs        : list
+        (source url, target url) pairs
+    parallel    : int
+        number of parallel copy jobs
+    force       : bool
+        overwrite existing targets
+    journal     : str
+        transfer journal (see TransferJournal): jobs finished in a previous run are skipped,
+        finished jobs are recorded
+    local_paths : list
+        local file of each job (for the journal)
+
+    Returns
+    -------
+    list
+        (source, target, ok) for each job, skipped jobs count as ok
+    """
+    report = []
+    handler = None
+    if journal is not None:
+        transfer_journal = TransferJournal(journal)
+        todo = []
+        for (source, target), path in zip(jobs, local_paths):
+            if transfer_journal.is_done(source, target, path):
+                log.info(f'[DONE]   {source} -> {target}')
+                report.append((source, target, True))
+            else:
+                todo.append(((source, target), path))
+        log.info(f'{len(report)} of {len(jobs)} files already copied according to {journal}.')
+        jobs = [job for job, _ in todo]
+        handler = _JournalProgressHandler(transfer_journal, jobs, [path for _, path in todo])
+        if len(jobs) == 0:
+            return report
+
+    process = client.CopyProcess()
+    for source, target in jobs:
+        # returns nothing, invalid urls fail in prepare/run; the journal keeps the urls of the given redirector
+        process.add_job(sessions.current_url(source), sessions.current_url(target), force=force, mkdir=True)
+    process.parallel(parallel)
+    status = process.prepare()
+    if not status.ok:
+        log.critical(f'Status: {status.message}')
+    assert status.ok
+
+    with metrics.timed('copyprocess', f'{len(jobs)} jobs') as timed:
+        status, results = process.run(handler)
+        timed.append(status)
+    log.debug(f'[batch copy] Status: {status}')
+    for (source, target), result in zip(jobs, results):
+        job_status = result['status']
+        if job_status.ok:
+            log.info(f'[OK]     {source} -> {target}')
+        else:
+            log.critical(f'[FAILED] {source} -> {target}: {job_status.message}')
+        report.append((source, target, bool(job_status.ok)))
+    n_failed = sum(1 for _, _, ok in report if not ok)
+    log.info(f'{len(report) - n_failed} of {len(report)} files copied, {n_failed} failed.')
+    return report
+
+
+def read_copy_list(list_file: str) -> List[Tuple[str, str]]:
+    """
+    Reads source/destination pairs for the batch copy (or the mapping file of bulk_mv) from a text file.
+    Each line contains "<source> <destination>", empty lines and lines starting with "#" are skipped.
+
+    Parameters
+    ----------
+    list_file : str
+
+    Returns
+    -------
+    list
+        (source, destination) pairs
+    """
+    pairs = []
+    with open(list_file) as f:
+        for line in f:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            source, dest = line.split()
+            pairs.append((source, dest))
+    return pairs
+
+
+def copy_files_to_remote(redirector: str, pairs: List[Tuple[str, str]], parallel=4, force=False,
+                         journal: Optional[str] = None) -> List[Tuple[str, str, bool]]:
+    """
+    Batch version of copy_file_to_remote. All files are copied by one CopyProcess.
+    The paths are given like for copy_file_to_remote (filenames within the dest paths!).
+
+    Parameters
+    ----------
+    redirector : str
+    pairs      : list
+        (local source, remote destination) pairs
+    parallel   : int
+        number of parallel copy jobs
+    force      : bool
+        overwrite existing files
+    journal    : str
+        transfer journal; files copied by a previous (interrupted) run are skipped
+
+    Returns
+    -------
+    list
+        (source, dest, ok) for each file
+    """
+    jobs = [('file://' + os.path.abspath(source), redirector + dest) for source, dest in pairs]
+    try:
+        return _run_copy_process(jobs, parallel, force, journal, [source for source, _ in pairs])
+    finally:
+        for _, dest in pairs:
+            listing_cache.invalidate(redirector, dest, ancestors=True)  # target directories may be created
+
+
+def copy_files_from_remote(redirector: str, pairs: List[Tuple[str, str]], parallel=4, force=False,
+                           journal: Optional[str] = None) -> List[Tuple[str, str, bool]]:
+    """
+    Batch version of copy_file_from_remote. All files are copied by one CopyProcess.
+    The paths are given like for copy_file_from_remote (filenames within the dest paths!).
+
+    Parameters
+    ----------
+    redirector : str
+    pairs      : list
+        (remote source, local destination) pairs
+    parallel   : int
+        number of parallel copy jobs
+    force      : bool
+        overwrite existing files
+    journal    : str
+        transfer journal; files copied by a previous (interrupted) run are skipped
+
+    Returns
+    -------
+    list
+        (source, dest, ok) for each file
+    """
+    jobs = [(redirector + source, 'file://' + os.path.abspath(dest)) for source, dest in pairs]
+    return _run_copy_process(jobs, parallel, force, journal, [dest for _, dest in pairs])
+
+
+def copy_dir_to_remote(redirector: str, local_dir: str, remote_dir: str, parallel=4, force=False,
+                       journal: Optional[str] = None) -> List[Tuple[str, str, bool]]:
+    """
+    Copies all files within <local_dir> (including subdirectories) into <remote_dir>.
+    The directory structure is kept.
+
+    Parameters
+    ----------
+    redirector : str
+    local_dir  : str
+    remote_dir : str
+    parallel   : int
+    force      : bool
+    journal    : str
+        transfer journal (see copy_files_to_remote)
+
+    Returns
+    -------
+    list
+        (source, dest, ok) for each file
+    """
+    local_dir = os.path.abspath(local_dir)
+    remote_dir = remote_dir if remote_dir.endswith('/') else remote_dir + '/'
+    pairs = []
+    for dirpath, _, filenames in os.walk(local_dir):
+        for filename in filenames:
+            source = os.path.join(dirpath, filename)
+            pairs.append((source, remote_dir + os.path.relpath(source, local_dir)))
+    log.info(f'{len(pairs)} files will be copied to {remote_dir}')
+    return copy_files_to_remote(redirector, pairs, parallel, force, journal)
+
+
+def copy_dir_from_remote(redirector: str, remote_dir: str, local_dir: str, parallel=4, force=False,
+                        journal: Optional[str] = None) -> List[Tuple[str, str, bool]]:
+    """
+    Copies all files within <remote_dir> (including subdirectories) into <local_dir>.
+    The directory structure is kept.
+
+    Parameters
+    ----------
+    redirector : str
+    remote_dir : str
+    local_dir  : str
+    parallel   : int
+    force      : bool
+    journal    : str
+        transfer journal (see copy_files_from_remote)
+
+    Returns
+    -------
+    list
+        (source, dest, ok) for each file
+    """
+    top = remote_dir if remote_dir.endswith('/') else remote_dir + '/'
+    pairs = []
+    for current, _, files in walk(redirector, top):
+        for name, _ in files:
+            source = current + name
+            pairs.append((source, os.path.join(local_dir, source[len(top):])))
+    log.info(f'{len(pairs)} files will be copied to {local_dir}')
+    return copy_files_from_remote(redirector, pairs, parallel, force, journal)
+
+
+def _local_tree(local_dir: str) -> Tuple[Dict[str, Tuple[int, int]], set]:
+    """
+    Helper function to collect all files (with size and mtime) and directories of a local tree.
+
+    Parameters
+    ----------
+    local_dir : str
+
+    Returns
+    -------
+    (dict, set)
+        relative file path -> (size, mtime) and the relative directory paths
+    """
+    files = {}
+    dirs = set()
+    for dirpath, dirnames, filenames in os.walk(local_dir):
+        relative = os.path.relpath(dirpath, local_dir)
+        prefix = '' if relative == '.' else relative.replace(os.sep, '/') + '/'
+        dirs.update(prefix + dirname for dirname in dirnames)
+        for filename in filenames:
+            stat_result = os.stat(os.path.join(dirpath, filename))
+            files[prefix + filename] = (stat_result.st_size, int(stat_result.st_mtime))
+    return files, dirs
+
+
+def _remote_tree(redirector: str, remote_dir: str) -> Tuple[Dict[str, Tuple[int, int]], set, bool]:
+    """
+    Helper function to collect all files (with size and mtime) and directories of a remote tree (see walk).
+    A missing <remote_dir> is treated as empty tree.
+
+    Parameters
+    ----------
+    redirector : str
+    remote_dir : str
+
+    Returns
+    -------
+    (dict, set, bool)
+        relative file path -> (size, mtime), the relative directory paths and whether <remote_dir> exists
+    """
+    top = remote_dir if remote_dir.endswith('/') else remote_dir + '/'
+    files = {}
+    dirs = set()
+    if not _exists(redirector, top):
+        return files, dirs, False
+    for current, subdirs, current_files in walk(redirector, top):
+        prefix = current[len(top):]
+        dirs.update(prefix + name for name, _ in subdirs)
+        for name, statinfo in current_files:
+            files[prefix + name] = (statinfo.size, statinfo.modtime)
+    return files, dirs, True
+
+
+def _sync_plan(source_files: Dict[str, Tuple[int, int]], dest_files: Dict[str, Tuple[int, int]],
+               checksum_equal: Any = None) -> List[str]:
+    """
+    Minimal transfer set of a sync: files missing at the destination, files with a different size and
+    files which are newer at the source. With <checksum_equal>, equal sized files are compared
+    by their checksum instead of the mtime.
+
+    Parameters
+    ----------
+    source_files   : dict
+        relative path -> (size, mtime)
+    dest_files     : dict
+        relative path -> (size, mtime)
+    checksum_equal : callable
+        checksum_equal(list of relative paths) -> list of bool
+
+    Returns
+    -------
+    list
+        relative paths to be transferred
+    """
+    transfer = []
+    same_size = []
+    for path, (size, mtime) in sorted(source_files.items()):
+        if path not in dest_files or dest_files[path][0] != size:
+            transfer.append(path)
+        elif checksum_equal is not None:
+            same_size.append(path)
+        elif mtime > dest_files[path][1]:
+            transfer.append(path)
+    if same_size:
+        transfer += [path for path, equal in zip(same_size, checksum_equal(same_size)) if not equal]
+    return sorted(transfer)
+
+
+def _normalize_dir(directory: str) -> str:
+    """
+    Helper function to normalize an absolute directory path: no duplicate slashes
+    or "." components and exactly one trailing "/" (e.g. //store//user/./x -> /store/user/x/).
+    """
+    directory = posixpath.normpath('/' + directory.strip('/'))
+    return directory if directory == '/' else directory + '/'
+
+
+def _leaf_dirs(directories: Iterable[str]) -> List[str]:
+    """
+    Helper function to reduce <directories> to the deepest ones (mkdir -p creates the parents).
+    After sorting, all subdirectories of a directory directly follow it,
+    therefore it is enough to compare each directory with its successor (O(n log n)).
+
+    Parameters
+    ----------
+    directories : iterable
+        absolute directory paths (normalized, see _normalize_dir)
+
+    Returns
+    -------
+    list
+        sorted leaf directories with a trailing "/"
+    """
+    ordered = sorted({_normalize_dir(d) for d in directories})
+    return [d for d, successor in zip(ordered, ordered[1:] + ['']) if not successor.startswith(d)]
+
+
+def _checksums_equal(redirector: str, local_dir: str, remote_dir: str, paths: List[str],
+                      max_workers=8) -> List[bool]:
+    """
+    Compares the adler32 of the local and the remote copy of each relative path in <paths>
+    (local checksums and server side checksum queries in parallel).
+
+    Parameters
+    ----------
+    redirector  : str
+    local_dir   : str
+    remote_dir  : str
+        with trailing "/"
+    paths       : list
+        relative paths
+    max_workers : int
+
+    Returns
+    -------
+    list
+        True for each path with equal checksums
+    """
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        local = pool.map(lambda path: _local_adler32(os.path.join(local_dir, path)), paths)
+        remote = pool.map(lambda path: _remote_checksum(redirector, remote_dir + path)[1], paths)
+        return [a == b for a, b in zip(local, remote)]
+
+
+def sync_to_remote(redirector: str, local_dir: str, remote_dir: str, checksum=False, parallel=4,
+                   dry_run=False) -> List[Tuple[str, str, bool]]:
+    """
+    rsync-like upload of <local_dir> to <remote_dir>.
+    Only files, which are missing on remote, have a different size or are newer locally,
+    are copied (with checksum=True: different adler32 instead of newer).
+    The missing remote directories are created once, before the files are copied in parallel.
+    A sync can be repeated after a partial failure, then only the missing files are copied.
+
+    Parameters
+    ----------
+    redirector : str
+    local_dir  : str
+    remote_dir : str
+    checksum   : bool
+        compare equal sized files by checksum (server side checksum query) instead of mtime
+    parallel   : int
+        number of parallel copy jobs
+    dry_run    : bool
+        only show what would be copied
+
+    Returns
+    -------
+    list
+        (source, dest, ok) for each copied file
+    """
+    local_dir = os.path.abspath(local_dir)
+    remote_dir = remote_dir if remote_dir.endswith('/') else remote_dir + '/'
+    local_files, local_dirs = _local_tree(local_dir)
+    remote_files, remote_dirs, remote_exists = _remote_tree(redirector, remote_dir)
+
+    def _checksum_equal(paths: List[str]) -> List[bool]:
+        return _checksums_equal(redirector, local_dir, remote_dir, paths, parallel)
+
+    transfer = _sync_plan(local_files, remote_files, _checksum_equal if checksum else None)
+    log.info(f'sync {local_dir} -> {remote_dir}: {len(transfer)} of {len(local_files)} files to be copied.')
+
+    # create the missing directories once; mkdir -p, therefore only the deepest ones are necessary
+    missing_dirs = {remote_dir + path.rsplit('/', 1)[0] + '/' for path in transfer if '/' in path}
+    missing_dirs |= {remote_dir + d + '/' for d in local_dirs}  # keep empty directories as well
+    missing_dirs -= {remote_dir + d + '/' for d in remote_dirs}
+    if not remote_exists:
+        missing_dirs.add(remote_dir)
+    leaves = _leaf_dirs(missing_dirs)
+    if dry_run:
+        for directory in leaves:
+            log.info(f'mkdir {directory}')
+        for path in transfer:
+            log.info(f'copy {path}')
+        return []
+    myclient = sessions.get(redirector)
+    with ThreadPoolExecutor(max_workers=max(parallel, 1)) as pool:
+        for directory, (status, _) in zip(leaves, pool.map(
+                lambda d: myclient.mkdir(d, MkDirFlags.MAKEPATH), leaves)):
+            log.debug(f'[sync] mkdir {directory} Status: {status}')
+            if not status.ok:
+                log.critical(f'Status: {status.message}')
+            assert status.ok  # creation failed; RO redirector?
+    if leaves:
+        listing_cache.invalidate(redirector, remote_dir, ancestors=True)
+
+    if len(transfer) == 0:
+        log.info('Nothing to do.')
+        return []
+    return copy_files_to_remote(redirector, [(os.path.join(local_dir, path), remote_dir + path) for path in transfer],
+                                parallel, force=True)
+
+
+def sync_from_remote(redirector: str, remote_dir: str, local_dir: str, checksum=False, parallel=4,
+                     dry_run=False) -> List[Tuple[str, str, bool]]:
+    """
+    rsync-like download of <remote_dir> to <local_dir> (see sync_to_remote).
+
+    Parameters
+    ----------
+    redirector : str
+    remote_dir : str
+    local_dir  : str
+    checksum   : bool
+        compare equal sized files by checksum instead of mtime
+    parallel   : int
+        number of parallel copy jobs
+    dry_run    : bool
+        only show what would be copied
+
+    Returns
+    -------
+    list
+        (source, dest, ok) for each copied file
+    """
+    local_dir = os.path.abspath(local_dir)
+    remote_dir = remote_dir if remote_dir.endswith('/') else remote_dir + '/'
+    remote_files, remote_dirs, _ = _remote_tree(redirector, remote_dir)
+    local_files, _ = _local_tree(local_dir) if os.path.isdir(local_dir) else ({}, set())
+
+    def _checksum_equal(paths: List[str]) -> List[bool]:
+        return _checksums_equal(redirector, local_dir, remote_dir, paths, parallel)
+
+    transfer = _sync_plan(remote_files, local_files, _checksum_equal if checksum else None)
+    log.info(f'sync {remote_dir} -> {local_dir}: {len(transfer)} of {len(remote_files)} files to be copied.')
+    if dry_run:
+        for path in transfer:
+            log.info(f'copy {path}')
+        return []
+    for directory in remote_dirs:
+        os.makedirs(os.path.join(local_dir, directory), exist_ok=True)
+    if len(transfer) == 0:
+        log.info('Nothing to do.')
+        return []
+    return copy_files_from_remote(redirector, [(remote_dir + path, os.path.join(local_dir, path)) for path in transfer],
+                                  parallel, force=True)
+
+
+class PermissionDenied(SystemExit):
+    """
+    Raised by the username safeguard of del_file and del_dir.
+    It is a SystemExit, so the interactive mode still stops, callers like the
+    command line can catch it and report the operation as failed.
+    """
+
+
+def del_file(redirector: str, filepath: str, user: str, ask=True) -> None:
+    """
+    Function to delete files from remote.
+    Note: you have to specify the RW redirector!
+
+    Parameters
+    ----------
+    redirector : str
+    filepath   : str
+    user       : str
+    ask        : bool
+
+    Returns
+    -------
+    None
+    """
+    myclient = sessions.get(redirector)
+    to_be_deleted = redirector + filepath
+
+    # for security reasons... If you want to delete something else, comment this out
+    if user in filepath:
+        log.debug(f'{user} tries to delete {filepath}')
+    else:
+        log.critical('Permission denied. Your username was not found in the filepath!')
+        raise PermissionDenied(f'username {user} not in {filepath}')
+
+    if ask:
+        log.info(f'The following file will be deleted: {filepath}')
+        stat(redirector, filepath)
+    if ask:
+        if str(input(f"Are you sure to delete <{to_be_deleted}>? ")) == 'y':
+            status, _ = myclient.rm(filepath)
+            listing_cache.invalidate(redirector, filepath)
+            log.debug(f'[rm] Status: {status}')
+            if not status.ok:
+                log.critical(f'Status: {status.message}')
+            assert status.ok  # file deletion failed; RO redirector?
+        else:
+            log.critical("failed.")
+            return None
+    else:
+        status, _ = myclient.rm(filepath)
+        listing_cache.invalidate(redirector, filepath)
         log.debug(f'[rm] Status: {status}')
         if not status.ok:
             log.critical(f'Status: {status.message}')
@@ -543,18 +2319,24 @@ def del_file(redirector: str, filepath: str, user: str, ask=True) -> None:
     return None
 
 
-def del_dir(redirector: str, directory: str, user: str, ask=True) -> None:
+def del_dir(redirector: str, directory: str, user: str, ask=True, max_workers=8) -> None:
     """
     Function to delete a directory.
     There is no recursive way available (or enabled) in xrootd.
     Therefore, looping over all files and removeing them is the only way...
 
+    The full deletion plan is built with one concurrent traversal (see walk) and
+    the confirmation is asked only once. The files are deleted in parallel with
+    at most <max_workers> requests in flight, afterwards the directories are
+    removed bottom-up. The username safeguard is checked for every entry.
+
     Parameters
     ----------
-    redirector : str
-    directory  : str
-    user       : str
-    ask        : bool
+    redirector  : str
+    directory   : str
+    user        : str
+    ask         : bool
+    max_workers : int
 
     Returns
     -------
@@ -564,36 +2346,58 @@ def del_dir(redirector: str, directory: str, user: str, ask=True) -> None:
         log.debug(f'{user} tries to delete {directory}')
     else:
         log.critical('Permission denied. Your username was not found in the directory path!')
-        exit(-1)
-
-    myclient = client.FileSystem(redirector)
-    status, listing = myclient.dirlist(directory, DirListFlags.STAT)
-    log.debug(f'[rm dir] Status: {status}')
-    if not status.ok:
-        log.critical(f'Status: {status.message}')
-    assert status.ok  # directory does not exists
-
-    log.info(f'The following files will be deleted within {directory}:')
-    ls(redirector, directory)  # list the directory content that will be deleted
-
-    if str(input(f'Are you sure to delete the following directory: {directory}? ')) == 'y':
-        for file in listing:  # unfortunately, there is no recursive way in xrd...
-            log.debug(f'{redirector}{listing.parent}{file.name}')
-            if file.statinfo.size == 512:  # check if "file" is a directory -> delete recursively
-                log.debug(f'[rm dir] list entry: {file}')
-                assert (file.statinfo.flags == 51 or file.statinfo.flags == 19)  # make sure it is a directory; evtl wrong permissions?
-                del_dir(redirector, listing.parent + file.name, user, True)
-            else:
-                del_file(redirector, listing.parent + file.name, user, False)
-    else:
+        raise PermissionDenied(f'username {user} not in {directory}')
+
+    # build the deletion plan with one concurrent traversal
+    dirs = []  # top-down order
+    files = []
+    total_size = 0
+    for current, _, current_files in walk(redirector, directory, max_workers):
+        dirs.append(current)
+        for name, statinfo in current_files:
+            files.append(current + name)
+            total_size += statinfo.size
+
+    # for security reasons... the safeguard is applied to every entry
+    for path in dirs + files:
+        if user not in path:
+            log.critical(f'Permission denied. Your username was not found in {path}!')
+            raise PermissionDenied(f'username {user} not in {path}')
+
+    log.info(f'The following directory will be deleted: {directory}')
+    log.info(f'files: {len(files)}, directories: {len(dirs)}, Byte: {total_size} (GiB: {total_size / (1 << 30)}G)')
+    for path in dirs + files:
+        log.debug(f'[rm dir] to be deleted: {path}')
+    if ask and str(input(f'Are you sure to delete the following directory: {directory}? ')) != 'y':
         log.critical('failed.')
         return None
 
-    status, _ = myclient.rmdir(directory)  # when empty, remove empty dir
-    log.debug(f'[rm dir] rm status: {status}')
-    if not status.ok:
-        log.critical(f'Status: {status.message}')
-    assert status.ok  # dir removal failed: check path or redirector
+    myclient = sessions.get(redirector)
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+            responses = list(pool.map(myclient.rm, files))
+        for path, (status, _) in zip(files, responses):
+            log.debug(f'[rm] {path} Status: {status}')
+            if not status.ok:
+                log.critical(f'{path} Status: {status.message}')
+                failed.append(path)
+        assert not failed  # file deletion failed; RO redirector?
+        log.info(f'{len(files)} files removed.')
+
+        # bottom-up: all directories of the same depth can be removed in parallel
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+            depths = sorted({d.count('/') for d in dirs}, reverse=True)
+            for depth in depths:
+                level = [d for d in dirs if d.count('/') == depth]
+                for path, (status, _) in zip(level, pool.map(myclient.rmdir, level)):
+                    log.debug(f'[rm dir] {path} Status: {status}')
+                    if not status.ok:
+                        log.critical(f'{path} Status: {status.message}')
+                        failed.append(path)
+                assert not failed  # dir removal failed: check path or redirector
+    finally:
+        listing_cache.invalidate(redirector, directory)
 
     log.info('Directory removed.')
     return None
@@ -617,9 +2421,12 @@ def mv(redirector: str, source: str, dest: str) -> None:
     -------
     None
     """
-    myclient = client.FileSystem(redirector)
+    myclient = sessions.get(redirector)
     log.info(f'mv: {source} to {dest}')
     status, _ = myclient.mv(source, dest)
+    listing_cache.invalidate(redirector, source)
+    location_cache.invalidate(redirector, source)
+    listing_cache.invalidate(redirector, dest)
     log.debug(f'[mv] Status: {status}')
     if not status.ok:
         log.critical(f'Status: {status.message}')
@@ -627,6 +2434,112 @@ def mv(redirector: str, source: str, dest: str) -> None:
     return None
 
 
+def mv_pairs_from_pattern(redirector: str, directory: str, pattern: str, replacement: str,
+                          recursive=False) -> List[Tuple[str, str]]:
+    """
+    Builds the (source, dest) pairs for bulk_mv from a rule: every file within <directory>, whose path
+    relative to <directory> matches the regular expression <pattern>, is moved to re.sub(<pattern>, <replacement>).
+    e.g. per-run subdirectories: pattern=r'^(run\\d+)_(.*)$', replacement=r'\\1/\\1_\\2'
+
+    Parameters
+    ----------
+    redirector  : str
+    directory   : str
+    pattern     : str
+        regular expression (re.search)
+    replacement : str
+        replacement for re.sub, relative to <directory>
+    recursive   : bool
+        include the files of all subdirectories
+
+    Returns
+    -------
+    list
+        (source, dest) pairs
+    """
+    top = directory if directory.endswith('/') else directory + '/'
+    regex = re.compile(pattern)
+    pairs = []
+    for current, dirs, files in walk(redirector, top):
+        if not recursive:
+            dirs[:] = []
+        for name, _ in files:
+            relative = current[len(top):] + name
+            if regex.search(relative):
+                dest = top + regex.sub(replacement, relative, count=1)
+                if dest != top + relative:
+                    pairs.append((top + relative, dest))
+    log.info(f'{len(pairs)} files in {top} match {pattern}.')
+    return pairs
+
+
+def bulk_mv(redirector: str, pairs: List[Tuple[str, str]], max_workers=32, dry_run=False,
+            report_file: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    """
+    Moves many files/directories at once (e.g. from read_copy_list or mv_pairs_from_pattern).
+    The target directories are created once in advance (mkdir -p, only the deepest ones),
+    afterwards the mv requests are sent in parallel with at most <max_workers> in flight.
+    A failed mv does not stop the others (no overwrite, like mv), the failures are reported at the end.
+
+    Parameters
+    ----------
+    redirector  : str
+    pairs       : list
+        (source, dest) pairs with full remote paths
+    max_workers : int
+        number of requests in flight
+    dry_run     : bool
+        only show the moves
+    report_file : str
+        write the failed pairs as "<source> <dest>" lines into this file (to retry them with read_copy_list)
+
+    Returns
+    -------
+    list
+        (source, dest, message) for each failed mv
+    """
+    log.info(f'{len(pairs)} entries will be moved.')
+    targets = {_normalize_dir(dest.rstrip('/').rsplit('/', 1)[0]) for _, dest in pairs}
+    leaves = _leaf_dirs(targets)
+    for source, dest in pairs:
+        log.debug(f'[bulk mv] {source} -> {dest}')
+    if dry_run:
+        for directory in leaves:
+            log.info(f'mkdir {directory}')
+        for source, dest in pairs:
+            log.info(f'mv {source} {dest}')
+        return []
+
+    myclient = sessions.get(redirector)
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+            for directory, (status, _) in zip(leaves, pool.map(
+                    lambda d: myclient.mkdir(d, MkDirFlags.MAKEPATH), leaves)):
+                log.debug(f'[bulk mv] mkdir {directory} Status: {status}')
+                if not status.ok:
+                    log.critical(f'Status: {status.message}')
+                assert status.ok  # creation failed; RO redirector?
+
+            for (source, dest), (status, _) in zip(pairs, pool.map(lambda pair: myclient.mv(*pair), pairs)):
+                if not status.ok:
+                    log.critical(f'[FAILED] {source} -> {dest}: {status.message}')
+                    failed.append((source, dest, status.message))
+    finally:
+        for directory in {path.rstrip('/').rsplit('/', 1)[0] for pair in pairs for path in pair} | targets:
+            listing_cache.invalidate(redirector, directory, ancestors=True)
+        for source, _ in pairs:
+            location_cache.invalidate(redirector, source)
+
+    log.info(f'{len(pairs) - len(failed)} of {len(pairs)} entries moved, {len(failed)} failed.')
+    if report_file is not None and failed:
+        with open(report_file, 'w') as f:
+            for source, dest, _ in failed:
+                f.write(f'{source} {dest}\n')
+        log.info(f'{report_file} created.')
+    return failed
+
+
 def mkdir(redirector: str, directory: str) -> None:
     """
     xrdfs mkdir "-p" (recursive, creates the entire tree)
@@ -640,8 +2553,9 @@ def mkdir(redirector: str, directory: str) -> None:
     -------
     None
     """
-    myclient = client.FileSystem(redirector)
+    myclient = sessions.get(redirector)
     status, _ = myclient.mkdir(directory, MkDirFlags.MAKEPATH)
+    listing_cache.invalidate(redirector, directory, ancestors=True)
     log.debug(f'[mkdir] Status: {status}')
     if not status.ok:
         log.critical(f'Status: {status.message}')
@@ -664,7 +2578,7 @@ def locate(redirector: str, filepath: str) -> bool:
     -------
     bool
     """
-    myclient = client.FileSystem(redirector)
+    myclient = sessions.get(redirector)
     status, locations = myclient.locate(filepath, OpenFlags.REFRESH)
     log.debug(f'[locate] Status: {status}')
     if not status.ok:
@@ -675,39 +2589,382 @@ def locate(redirector: str, filepath: str) -> bool:
     return True
 
 
-def create_file_list(redirector: str, directory: str, exclude: str) -> None:
+def _server_url(locations: Any) -> Optional[str]:
     """
-    Function to create the file list of a directory and write it to file. Certain files can be excluded with "exclude".
-    Note: if directories are present within the directory, they will be written as well.
+    url of the first data server within the locations of a locate response (None if only managers are given).
+    """
+    for location in locations:
+        if location.is_server:
+            return f'root://{location.address}/'
+    return None
+
+
+def locate_servers(redirector: str, paths: List[str], max_workers=8) -> Dict[str, List[str]]:
+    """
+    Locates all <paths> (concurrently, once: the results are kept in location_cache)
+    and groups them by the data server, which serves them.
+    Paths, which could not be located, are grouped under the <redirector>.
+
+    Parameters
+    ----------
+    redirector  : str
+    paths       : list
+    max_workers : int
+        number of parallel locate requests
+
+    Returns
+    -------
+    dict
+        data server url (or redirector) -> paths
+    """
+    myclient = sessions.get(redirector)
+
+    def _locate(path: str) -> str:
+        server = location_cache.get(redirector, path)
+        if server is not None:
+            return server
+        status, locations = myclient.locate(path, OpenFlags.NONE)
+        server = _server_url(locations) if status.ok else None
+        log.debug(f'[locate] {path}: {server} Status: {status}')
+        if server is None:
+            return redirector
+        location_cache.put(redirector, path, server)
+        return server
+
+    groups: Dict[str, List[str]] = {}
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        for path, server in zip(paths, pool.map(_locate, paths)):
+            groups.setdefault(server, []).append(path)
+    for server, server_paths in groups.items():
+        log.debug(f'[locate] {server}: {len(server_paths)} paths')
+    return groups
+
+
+def affine_requests(redirector: str, paths: List[str], request: Any, max_workers=8) -> List[Any]:
+    """
+    Sends request(filesystem, path) for all <paths> directly to the data server of each path
+    (see locate_servers), grouped by data server over one pooled session per server.
+    If a request to a data server fails, the location is dropped and the request is sent to the redirector.
+
+    Parameters
+    ----------
+    redirector  : str
+    paths       : list
+    request     : callable
+        request(filesystem, path) -> response of the bindings, e.g. lambda fs, p: fs.stat(p)
+    max_workers : int
+        number of requests in flight
+
+    Returns
+    -------
+    list
+        responses in the order of <paths>
+    """
+    groups = locate_servers(redirector, paths, max_workers)
+    log.info(f'{len(paths)} paths on {len([s for s in groups if s != redirector])} data servers.')
+
+    def _request(server: str, path: str) -> Any:
+        response = request(sessions.get(server), path)
+        status = response[0] if isinstance(response, tuple) else response
+        if status.ok or server == redirector:
+            return response
+        log.debug(f'[affinity] {path} on {server} failed ({status.message}), falling back to {redirector}')
+        location_cache.invalidate(redirector, path)
+        return request(sessions.get(redirector), path)
+
+    jobs = [(server, path) for server, server_paths in groups.items() for path in server_paths]
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        responses = dict(zip((path for _, path in jobs), pool.map(lambda job: _request(*job), jobs)))
+    return [responses[path] for path in paths]
+
+
+def bulk_stat(redirector: str, paths: List[str], max_workers=8, affinity=False) -> Dict[str, Any]:
+    """
+    Stats all <paths> concurrently.
+
+    Parameters
+    ----------
+    redirector  : str
+    paths       : list
+    max_workers : int
+        number of requests in flight
+    affinity    : bool
+        send the requests directly to the data servers (see affine_requests), opt-in:
+        the locate costs one extra round trip per path
+
+    Returns
+    -------
+    dict
+        path -> statinfo (None if the stat failed)
+    """
+    if affinity:
+        responses = affine_requests(redirector, paths, lambda fs, p: fs.stat(p), max_workers)
+    else:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+            responses = list(pool.map(lambda p: _stat(redirector, p), paths))
+    statinfos = {}
+    for path, (status, statinfo) in zip(paths, responses):
+        if not status.ok:
+            log.critical(f'[FAILED] {path}: {status.message}')
+        statinfos[path] = statinfo if status.ok else None
+    return statinfos
+
+
+def _local_adler32(filepath: str, blocksize=1 << 22) -> str:
+    """
+    adler32 checksum of a local file (as 8 digit hex string like xrdadler32).
+
+    Parameters
+    ----------
+    filepath  : str
+    blocksize : int
+        read size in Byte
+
+    Returns
+    -------
+    str
+    """
+    checksum = 1  # adler32 start value
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            checksum = zlib.adler32(block, checksum)
+    return f'{checksum & 0xffffffff:08x}'
+
+
+def _remote_checksum(redirector: str, filepath: str) -> Tuple[Any, Optional[str]]:
+    """
+    Server side checksum of <filepath> (QueryCode.CHECKSUM). The server answers with "<type> <checksum>".
+    Note: The file is not read by the client, the checksum is usually known by the storage.
 
     Parameters
     ----------
     redirector : str
-    directory  : str
-    exclude    : str
+    filepath   : str
+
+    Returns
+    -------
+    (object, str)
+        xrd status and the checksum (None if the query failed)
+    """
+    return _parse_checksum(filepath, *sessions.get(redirector).query(QueryCode.CHECKSUM, filepath))
+
+
+def _parse_checksum(filepath: str, status: Any, response: Any) -> Tuple[Any, Optional[str]]:
+    """
+    Parses the response "<type> <checksum>" of a checksum query (see _remote_checksum).
+    """
+    log.debug(f'[checksum] {filepath} Status: {status}, response: {response}')
+    if not status.ok:
+        return status, None
+    checksum_type, checksum = response.decode().strip('\x00').strip().split()[:2]
+    if checksum_type != 'adler32':
+        log.warning(f'{filepath}: checksum type {checksum_type} instead of adler32')
+    return status, checksum.lower().zfill(8)
+
+
+def read_checksum_manifest(manifest: str) -> Dict[str, str]:
+    """
+    Reads a checksum manifest with "<adler32> <remote path>" per line
+    (the output format of xrdadler32). Empty lines and lines starting with "#" are skipped.
+
+    Parameters
+    ----------
+    manifest : str
+
+    Returns
+    -------
+    dict
+        remote path -> checksum
+    """
+    checksums = {}
+    with open(manifest) as f:
+        for line in f:
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            checksum, path = line.split()[:2]
+            checksums[path] = checksum.lower().zfill(8)
+    return checksums
+
+
+def verify_checksums(redirector: str, expected: Dict[str, str], max_workers=8,
+                     affinity=False) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Queries the server side adler32 checksums of all files in <expected> concurrently
+    and compares them with the expected checksums. Mismatches and failed queries are reported.
+
+    Parameters
+    ----------
+    redirector  : str
+    expected    : dict
+        remote path -> expected adler32 checksum (see read_checksum_manifest, checksums_from_local)
+    max_workers : int
+        number of parallel checksum queries
+    affinity    : bool
+        send the queries directly to the data servers (see affine_requests), opt-in:
+        the locate costs one extra round trip per path
+
+    Returns
+    -------
+    list
+        (remote path, remote checksum or None, expected checksum) of all mismatches and failed queries
+    """
+    paths = list(expected)
+    mismatches = []
+    if affinity:
+        responses = affine_requests(redirector, paths, lambda fs, p: fs.query(QueryCode.CHECKSUM, p), max_workers)
+        results = [_parse_checksum(path, *response) for path, response in zip(paths, responses)]
+    else:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+            results = list(pool.map(lambda p: _remote_checksum(redirector, p), paths))
+    for path, (status, checksum) in zip(paths, results):
+        if not status.ok:
+            log.critical(f'[FAILED]   {path}: {status.message}')
+            mismatches.append((path, None, expected[path]))
+        elif checksum != expected[path]:
+            log.critical(f'[MISMATCH] {path}: remote {checksum}, expected {expected[path]}')
+            mismatches.append((path, checksum, expected[path]))
+        else:
+            log.debug(f'[OK]       {path}: {checksum}')
+    log.info(f'{len(paths) - len(mismatches)} of {len(paths)} checksums verified, {len(mismatches)} mismatches/failures.')
+    return mismatches
+
+
+def checksums_from_local(redirector: str, remote_dir: str, local_dir: str, max_workers=8) -> Dict[str, str]:
+    """
+    Computes the adler32 checksums of the local copies of all files within <remote_dir> (full tree).
+    The local files are expected at the same relative path within <local_dir> (see copy_dir_from_remote).
+
+    Parameters
+    ----------
+    redirector  : str
+    remote_dir  : str
+    local_dir   : str
+    max_workers : int
+        number of files checksummed in parallel
+
+    Returns
+    -------
+    dict
+        remote path -> checksum of the local file
+    """
+    top = remote_dir if remote_dir.endswith('/') else remote_dir + '/'
+    pairs = []
+    for current, _, files in walk(redirector, top):
+        for name, _ in files:
+            local_file = os.path.join(local_dir, (current + name)[len(top):])
+            if not os.path.exists(local_file):
+                log.warning(f'{local_file} does not exist, {current + name} is not verified.')
+                continue
+            pairs.append((current + name, local_file))
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as pool:
+        return dict(zip([remote for remote, _ in pairs], pool.map(_local_adler32, [local for _, local in pairs])))
+
+
+def _matches(path: str, patterns: List[str]) -> bool:
+    """
+    Helper function to check <path> against a list of patterns.
+    Patterns are globs (e.g. "*.root", "*/2018*/*"), regular expressions have to start with "re:"
+    (e.g. "re:_[0-9]+\\.root$"). The full path is matched (re: search).
+
+    Parameters
+    ----------
+    path     : str
+    patterns : list
+
+    Returns
+    -------
+    bool
+        True if any pattern matches
+    """
+    for pattern in patterns:
+        if pattern.startswith('re:'):
+            if re.search(pattern[3:], path):
+                return True
+        elif fnmatch.fnmatchcase(path, pattern):
+            return True
+    return False
+
+
+def create_file_list(redirector: str, directory: str, exclude: str, recursive=False,
+                     include: Optional[List[str]] = None, exclude_patterns: Optional[List[str]] = None,
+                     min_size: Optional[int] = None, max_size: Optional[int] = None, shards=1, prefetch=8) -> None:
+    """
+    Function to create the file list of a directory and write it to file. Certain files can be excluded with "exclude".
+    Note: if directories are present within the directory, they will be written as well (only if recursive=False).
+
+    recursive=True: All files of the full tree are listed (see walk). The entries are written
+    to the file(s) as soon as a directory is listed, nothing is kept in memory.
+    The list can be split into <shards> files (list<dir>_<i>.txt) for batch jobs.
+
+    Parameters
+    ----------
+    redirector       : str
+    directory        : str
+    exclude          : str
         file type ending to be excluded
+    recursive        : bool
+    include          : list
+        only files matching any of these glob or "re:" patterns are written (see _matches)
+    exclude_patterns : list
+        files matching any of these glob or "re:" patterns are not written
+    min_size         : int
+        minimal file size in Byte
+    max_size         : int
+        maximal file size in Byte
+    shards           : int
+        number of output files (round robin)
+    prefetch         : int
+        number of directory listings requested in advance (recursive=True)
 
     Returns
     -------
     None
     """
     log.debug(f'[create file list] directory: {directory}')
-    dir_dict, _ = _get_directory_listing(redirector, directory)
+    include = include or []
+    exclude_patterns = exclude_patterns or []
+
+    def _entries() -> Iterator[Tuple[str, int, bool]]:
+        # (path, size, is_dir)
+        if not recursive:
+            for entry in _get_directory_listing(redirector, directory):
+                yield entry.path, entry.size, entry.is_dir
+            return
+        for current, _, files in walk(redirector, directory, prefetch):
+            for name, statinfo in files:
+                yield current + name, statinfo.size, False
+
     dir_str = directory.replace('/', '_')
-    output_name = f'list{dir_str}.txt'
+    if shards > 1:
+        output_names = [f'list{dir_str}_{i}.txt' for i in range(shards)]
+    else:
+        output_names = [f'list{dir_str}.txt']
+    filelists = [open(output_name, 'w') for output_name in output_names]
     warn = False
-    with open(output_name, 'w') as filelist:
-        for entry, v in dir_dict.items():
+    n_written = 0
+    try:
+        for entry, size, is_dir in _entries():
             if len(exclude) > 0 and exclude in entry:
                 log.debug(f'[create file list] {entry} excluded.')
                 continue
-            if v == 1:
+            if not is_dir:
+                if (include and not _matches(entry, include)) or _matches(entry, exclude_patterns) or \
+                        (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                    log.debug(f'[create file list] {entry} filtered.')
+                    continue
+            else:
                 warn = True
-            filelist.write(entry + '\n')
+            filelists[n_written % len(filelists)].write(entry + '\n')
+            n_written += 1
+    finally:
+        for filelist in filelists:
+            filelist.close()
     if warn:
         log.warning('+++ Warning +++ There are directories listed in your filelist')
-    log.info(f'{output_name} created.')
-    # log.debug(f'content: {dir_dict}') # spam
+    for output_name in output_names:
+        log.info(f'{output_name} created.')
+    log.info(f'{n_written} entries written.')
     return None
 
 
@@ -717,9 +2974,17 @@ def create_file_list(redirector: str, directory: str, exclude: str) -> None:
 # functions are available in standalone mode.                   #                                                  #
 #################################################################
 # the redirector is hardcoded in the functions to prevent file prefix errors (especially with all the "/")
+# the functions log their output, therefore configure the logging first:
+# logging.basicConfig(format='%(message)s', level='INFO')
 
 # ls
 # ls(redirector, full_path_to_file_or_dir)
+# dirs, files = interactive_ls(redirector, full_path_to_dir)  # lists of full paths
+
+# compact listing of a (huge) directory: dirs/files views and slices without copies
+# dirs, files = interactive_listing(redirector, full_path_to_dir)
+# for entry in files[:100]: ...  # ListingEntry(name, path, size, modtime, flags)
+# largest = list(islice(files.iter_sorted('size', reverse=True), 10))
 
 # stat file or direcectory
 # stat(redirector, full_path_to_file_or_dir)
@@ -730,12 +2995,22 @@ def create_file_list(redirector: str, directory: str, exclude: str) -> None:
 # dir size
 # dir_size(redirector, full_path_to_dir, show_output=True)
 
+# usage report: size/files/age per directory up to <depth>, top-N largest dirs/files and the oldest data
+# usage_report(redirector, full_path_to_dir, depth=2, top_n=20, json_file='usage.json', csv_file='usage.csv')
+
+# dir size, only changed subtrees are listed again
+# dir_size_incremental(redirector, full_path_to_dir, 'dirsize_cache.json', show_output=True)
+
 # delete a file
 # del_file(redirector, '/store/user/<username>/<path>/file_to_be_deleted.txt', user='<username>', ask=True)
 
 # delete all files and the directory
 # del_dir(redirector, '/store/user/<username>/<path_to_be_deleted>', user='<username>', ask=True)
 
+# walk through a directory tree (like os.walk)
+# for dirpath, dirs, files in walk(redirector, full_path_to_dir, prefetch=8):
+#     for name, statinfo in files: ...
+
 # mv
 # mv(redirector, '/store/user/<username>/<path>/file.txt', /store/user/<username>/<new_path>/file.txt')
 
@@ -747,8 +3022,38 @@ def create_file_list(redirector: str, directory: str, exclude: str) -> None:
 # Note: the filename has to be given in the destination path!
 # copy_file_from_remote(redirector, '/store/user//<username>/<dir>/file.txt', '/home/<user>/<dir>/file.txt')
 
+# copy a large file from remote with parallel byte range reads (size and adler32 are checked)
+# download_chunked(redirector, '/store/user/<username>/<dir>/large.root', '/home/<user>/<dir>/large.root', streams=8)
+# resumable: finished files/ranges are recorded in the journal, a rerun only transfers the rest
+# download_chunked(redirector, '/store/user/<username>/<dir>/large.root', '/home/<user>/<dir>/large.root', journal='transfers.journal')
+# copy_dir_to_remote(redirector, '/home/<user>/<dir>', '/store/user/<username>/<dir>', parallel=4, journal='transfers.journal')
+
+# sync (only missing or changed files are copied, like rsync)
+# sync_to_remote(redirector, '/home/<user>/<dir>', '/store/user/<username>/<dir>', checksum=False, parallel=4, dry_run=True)
+# sync_from_remote(redirector, '/store/user/<username>/<dir>', '/home/<user>/<dir>', parallel=4)
+
+# batch copy (one CopyProcess, <parallel> jobs at the same time)
+# copy_files_to_remote(redirector, [('/home/<user>/a.root', '/store/user/<username>/a.root'), ...], parallel=4)
+# copy_files_from_remote(redirector, read_copy_list('pairs.txt'), parallel=4)
+# copy_dir_to_remote(redirector, '/home/<user>/<dir>', '/store/user/<username>/<dir>', parallel=4)
+# copy_dir_from_remote(redirector, '/store/user/<username>/<dir>', '/home/<user>/<dir>', parallel=4)
+
+# bulk mv: target directories are created once, <max_workers> mv requests in flight
+# bulk_mv(redirector, read_copy_list('moves.txt'), max_workers=32, report_file='failed_moves.txt')
+# bulk_mv(redirector, mv_pairs_from_pattern(redirector, full_path_to_dir, r'^(run\d+)_(.*)$', r'\1/\1_\2'), dry_run=True)
+
 # mkdir
 # mkdir(redirector, full_path_to_dir/<newdir_name>')  # full path is created (<=> -p)
 
+# bulk stat, opt-in: stat/checksum queries directly on the data servers (locate once, fallback to the redirector)
+# bulk_stat(redirector, [path_1, path_2, ...], max_workers=16)
+# bulk_stat(redirector, [path_1, path_2, ...], max_workers=16, affinity=True)
+
+# verify checksums (server side adler32 against local copies or a manifest "<adler32> <path>")
+# verify_checksums(redirector, checksums_from_local(redirector, full_path_to_dir, '/home/<user>/<dir>'))
+# verify_checksums(redirector, read_checksum_manifest('manifest.txt'), max_workers=16)
+
 # create filelist
 # create_file_list(redirector, full_path_to_dir, exclude='.log')
+# full tree, only ROOT files > 1 MB, split into 10 lists
+# create_file_list(redirector, full_path_to_dir, exclude='', recursive=True, include=['*.root'], min_size=1 << 20, shards=10)